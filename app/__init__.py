@@ -1,3 +1,6 @@
 """Application package for the NOAA FastAPI service.""" 
 
+from app.lazy_client import defer_package_init
 
+# Must run before any module imports from `openapi_client`.
+defer_package_init()
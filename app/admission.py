@@ -0,0 +1,309 @@
+"""
+Admission control and load shedding for the FastAPI app.
+
+Requests are grouped into route classes (by path prefix). Each class has a
+bounded number of in-flight requests and a bounded wait queue, so a slow
+upstream cannot pile work up in the threadpool:
+
+- `/health`, `/ready` and `/metrics` always bypass the queue.
+- URLs last answered entirely from cache bypass it while those entries stay
+  fresh, since they do not touch upstream.
+- When the queue is full the request is rejected at once with 503 and a
+  `Retry-After` estimate.
+- When all slots are busy, requests whose deadline (`X-Request-Timeout`
+  header in seconds, capped by the class latency budget) cannot be met given
+  the queue and observed service time are rejected up front instead of
+  timing out later. An idle class always admits.
+
+The deadline is also exposed to the repository through `RequestContext`,
+which passes the remaining budget to upstream calls as their timeout and
+stops issuing upstream calls once the client has disconnected. Budgets can
+be overridden per class with `NOAA_ROUTE_BUDGETS`, e.g. `alerts=4,products=12`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, replace
+
+import anyio.to_thread
+
+from app import metrics
+from app.request_context import RequestContext, current_request
+
+PRIORITY_PATHS = frozenset({"/health", "/ready", "/metrics"})
+
+DEADLINE_HEADER = b"x-request-timeout"
+SERVICE_TIME_SEED = 0.5
+
+
+@dataclass(frozen=True)
+class RouteClassLimits:
+    max_concurrency: int
+    max_queue: int
+    default_deadline: float
+
+
+# Path prefix -> route class. The threadpool is sized at start-up to the total
+# concurrency plus `THREADPOOL_HEADROOM` (see `size_threadpool`), so
+# priority-lane and cache-bypass requests always find a thread.
+ROUTE_CLASSES = {
+    "/alerts": "alerts",
+    "/gridpoints": "gridpoints",
+    "/points": "gridpoints",
+    "/stations": "stations",
+    "/products": "products",
+    "/export": "export",
+    "/tiles": "tiles",
+}
+
+ROUTE_CLASS_LIMITS = {
+    "alerts": RouteClassLimits(max_concurrency=8, max_queue=32, default_deadline=10.0),
+    "gridpoints": RouteClassLimits(max_concurrency=8, max_queue=32, default_deadline=10.0),
+    "stations": RouteClassLimits(max_concurrency=6, max_queue=24, default_deadline=10.0),
+    "products": RouteClassLimits(max_concurrency=4, max_queue=16, default_deadline=15.0),
+    # Map clients request many tiles at once; most are served from the tile cache.
+    "tiles": RouteClassLimits(max_concurrency=16, max_queue=64, default_deadline=10.0),
+    # Long-running NDJSON exports: few at a time, generous budget.
+    "export": RouteClassLimits(max_concurrency=2, max_queue=4, default_deadline=300.0),
+    "default": RouteClassLimits(max_concurrency=6, max_queue=24, default_deadline=10.0),
+}
+
+
+def apply_route_budgets(
+    limits: dict[str, RouteClassLimits], spec: str
+) -> dict[str, RouteClassLimits]:
+    """Override per-class budgets from a `class=seconds,...` spec."""
+
+    limits = dict(limits)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, seconds = item.partition("=")
+        if name not in limits:
+            raise ValueError(f"unknown route class in NOAA_ROUTE_BUDGETS: {name!r}")
+        limits[name] = replace(limits[name], default_deadline=float(seconds))
+    return limits
+
+
+ROUTE_CLASS_LIMITS = apply_route_budgets(
+    ROUTE_CLASS_LIMITS, os.environ.get("NOAA_ROUTE_BUDGETS", "")
+)
+
+
+THREADPOOL_HEADROOM = 16
+
+
+def threadpool_size(limits: dict[str, RouteClassLimits]) -> int:
+    """Worker threads needed to run every class at its concurrency limit."""
+
+    return sum(limit.max_concurrency for limit in limits.values()) + THREADPOOL_HEADROOM
+
+
+def size_threadpool(limits: dict[str, RouteClassLimits] = ROUTE_CLASS_LIMITS) -> int:
+    """Grow AnyIO's default threadpool (40) to fit `limits`; never shrinks it.
+
+    Must run inside the event loop, e.g. from the app lifespan.
+    """
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(int(limiter.total_tokens), threadpool_size(limits))
+    return int(limiter.total_tokens)
+
+
+def route_class_for(path: str) -> str:
+    for prefix, route_class in ROUTE_CLASSES.items():
+        if path == prefix or path.startswith(prefix + "/"):
+            return route_class
+    return "default"
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RouteGate:
+    """Concurrency limit, bounded queue and service-time estimate for one class."""
+
+    def __init__(self, name: str, limits: RouteClassLimits) -> None:
+        self.name = name
+        self.limits = limits
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        # Exponentially weighted mean service time, seeded conservatively.
+        self.service_time = SERVICE_TIME_SEED
+        self._slots = asyncio.Semaphore(limits.max_concurrency)
+
+    @property
+    def saturated(self) -> bool:
+        return self.active >= self.limits.max_concurrency or self.waiting > 0
+
+    def estimated_wait(self) -> float:
+        if not self.saturated:
+            return 0.0
+        return (self.waiting + 1) / self.limits.max_concurrency * self.service_time
+
+    async def acquire(self, deadline: float) -> None:
+        if not self.saturated:
+            # An idle slot is always taken: the request either meets its
+            # deadline or yields a fresh service-time sample.
+            await self._slots.acquire()
+            self.active += 1
+            return
+
+        wait = self.estimated_wait()
+        if self.waiting >= self.limits.max_queue:
+            self.rejected += 1
+            raise Rejected("queue full", wait)
+        if wait + self.service_time > deadline:
+            self.rejected += 1
+            # Rejected requests produce no sample; let the estimate decay
+            # towards the seed so a burst of slow calls cannot shed forever.
+            self.service_time += 0.1 * (SERVICE_TIME_SEED - self.service_time)
+            raise Rejected("deadline cannot be met", wait)
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(
+                self._slots.acquire(), timeout=max(0.0, deadline - self.service_time)
+            )
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Rejected("deadline exceeded while queued", self.estimated_wait()) from None
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    def release(self, elapsed: float) -> None:
+        self.active -= 1
+        self.service_time += 0.2 * (elapsed - self.service_time)
+        self._slots.release()
+
+
+class AdmissionControl:
+    """Pure ASGI middleware applying `RouteGate`s per route class."""
+
+    def __init__(self, app, limits: dict[str, RouteClassLimits] | None = None) -> None:
+        self.app = app
+        self.gates = {
+            name: RouteGate(name, class_limits)
+            for name, class_limits in (limits or ROUTE_CLASS_LIMITS).items()
+        }
+        for gate in self.gates.values():
+            metrics.route_budget_seconds.set(
+                gate.name, value=gate.limits.default_deadline
+            )
+        # URL -> time until which it can be answered from cache alone.
+        self._fresh_urls: dict[str, float] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        if path in PRIORITY_PATHS:
+            return await self.app(scope, receive, send)
+
+        route_class = route_class_for(path)
+        gate = self.gates.get(route_class) or self.gates["default"]
+        deadline = self._deadline(scope, gate)
+        context = RequestContext(
+            route_class=gate.name, deadline=time.monotonic() + deadline
+        )
+        token = current_request.set(context)
+        try:
+            if self._is_fresh(scope):
+                return await self._serve(scope, receive, send, context)
+
+            try:
+                await gate.acquire(deadline)
+            except Rejected as exc:
+                metrics.admission_rejected_total.inc(gate.name, exc.reason)
+                return await self._reject(send, gate, exc)
+
+            started = time.monotonic()
+            try:
+                await self._serve(scope, receive, send, context)
+            finally:
+                gate.release(time.monotonic() - started)
+                self._remember(scope, context)
+        finally:
+            current_request.reset(token)
+
+    async def _serve(self, scope, receive, send, context: RequestContext) -> None:
+        # Relay ASGI messages through a queue so a disconnect is noticed while
+        # the route is still running, and flag it on the request context.
+        messages: asyncio.Queue = asyncio.Queue()
+
+        async def watch_disconnect() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    context.cancelled.set()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await self.app(scope, messages.get, send)
+        finally:
+            watcher.cancel()
+            metrics.budget_remaining_seconds.observe(
+                context.route_class, value=max(0.0, context.remaining())
+            )
+
+    @staticmethod
+    def _url(scope) -> str:
+        return scope["path"] + "?" + scope.get("query_string", b"").decode("latin-1")
+
+    def _is_fresh(self, scope) -> bool:
+        fresh_until = self._fresh_urls.get(self._url(scope))
+        return fresh_until is not None and fresh_until > time.time()
+
+    def _remember(self, scope, context: RequestContext) -> None:
+        url = self._url(scope)
+        if context.served_from_cache and math.isfinite(context.fresh_until):
+            if len(self._fresh_urls) >= 10_000:
+                now = time.time()
+                self._fresh_urls = {
+                    key: until for key, until in self._fresh_urls.items() if until > now
+                }
+            self._fresh_urls[url] = context.fresh_until
+        else:
+            self._fresh_urls.pop(url, None)
+
+    @staticmethod
+    def _deadline(scope, gate: RouteGate) -> float:
+        budget = gate.limits.default_deadline
+        for name, value in scope.get("headers", ()):
+            if name == DEADLINE_HEADER:
+                try:
+                    return min(budget, max(0.0, float(value)))
+                except ValueError:
+                    break
+        return budget
+
+    @staticmethod
+    async def _reject(send, gate: RouteGate, exc: Rejected) -> None:
+        body = json.dumps(
+            {"detail": f"overloaded: {exc.reason}", "route_class": gate.name}
+        ).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"retry-after", str(max(1, math.ceil(exc.retry_after))).encode("ascii")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,349 @@
+"""
+Historical alerts from the compacted archive the ingestion DAGs write.
+
+`NOAA_ALERT_ARCHIVE` points at the compaction output, a local directory or
+`s3://bucket/prefix` (S3 needs pyarrow):
+
+    <root>/daily/ingest_date=20240501/alerts.parquet
+    <root>/hourly/ingest_date=20240501/ingest_hour=13/alerts.parquet
+
+Each ingestion day is read from its daily file, or from its hourly files
+while no daily file exists yet. Compacted NDJSON (`alerts.ndjson.gz`) is read
+as well.
+
+Queries touch only the files that can match. Each file has an index entry:
+the UTC range of `sent` and the events, severities and zone ids it contains.
+The entry is taken from the `stats` of the compaction `_manifest.json` next to
+the file when that is at least as new as the file. Otherwise the file is
+scanned once and the entry kept until the file changes. Within a Parquet file,
+event, severity and `sent` range filters are pushed down to the reader.
+Files are sorted by event, so whole row groups are skipped.
+
+Files are read newest first. With a limit, reading stops once `limit` alerts
+were found that are all newer than anything in the remaining files.
+
+Reading Parquet, and any S3 archive, needs pyarrow. Without it the archive
+raises `ArchiveUnavailable`, which the API reports as 503.
+
+An alert updated on several days is returned once, in its latest version
+that matches the query.
+"""
+
+from __future__ import annotations
+
+import gzip
+import importlib.util
+import io
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+NOAA_ALERT_ARCHIVE = os.environ.get("NOAA_ALERT_ARCHIVE")
+
+JSON_COLUMNS = ("affected_zones", "parameters", "geometry")
+MANIFEST = "_manifest.json"
+MAX_LIMIT = 10_000
+
+_MAX_OFFSET = pd.Timedelta(hours=14)
+_NEVER = pd.Timestamp.min.tz_localize("UTC")
+
+_PARQUET = importlib.util.find_spec("pyarrow") is not None
+
+_DATA_FILE = re.compile(
+    r"^(?P<level>daily|hourly)/ingest_date=(?P<date>\d{8})/(?:ingest_hour=\d{2}/)?"
+    r"alerts\.(?:parquet|ndjson\.gz)$"
+)
+
+
+class ArchiveUnavailable(RuntimeError):
+    """The archive cannot be read in this environment (pyarrow is missing)."""
+
+
+# Storage -----------------------------------------------------------------------
+
+class _LocalFiles:
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def list(self) -> dict[str, float]:
+        """Key -> modification time of every file under the root."""
+
+        if not self.root.is_dir():
+            return {}
+        return {
+            path.relative_to(self.root).as_posix(): path.stat().st_mtime
+            for path in self.root.rglob("*")
+            if path.is_file()
+        }
+
+    def read(self, key: str) -> bytes:
+        return (self.root / key).read_bytes()
+
+
+class _S3Files:
+    def __init__(self, root: str) -> None:
+        try:
+            from pyarrow import fs
+        except ImportError:
+            raise ArchiveUnavailable("reading an S3 alert archive needs pyarrow") from None
+
+        self._fs = fs.S3FileSystem()
+        self._selector = fs.FileSelector
+        self.base = root.removeprefix("s3://").rstrip("/")
+
+    def list(self) -> dict[str, float]:
+        infos = self._fs.get_file_info(self._selector(self.base, recursive=True))
+        return {
+            info.path[len(self.base) + 1:]: info.mtime.timestamp()
+            for info in infos
+            if info.is_file
+        }
+
+    def read(self, key: str) -> bytes:
+        with self._fs.open_input_stream(f"{self.base}/{key}") as stream:
+            return stream.readall()
+
+
+# Index -------------------------------------------------------------------------
+
+def _zone_ids(affected_zones: str | None) -> list[str]:
+    try:
+        urls = json.loads(affected_zones) if affected_zones else []
+    except ValueError:
+        return []
+    return [url.rstrip("/").rpartition("/")[2] for url in urls if isinstance(url, str)]
+
+
+def _utc(value) -> pd.Timestamp | None:
+    if value is None:
+        return None
+    stamp = pd.Timestamp(value)
+    return stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")
+
+
+@dataclass(frozen=True)
+class FileStats:
+    sent_min: pd.Timestamp | None
+    sent_max: pd.Timestamp | None
+    events: frozenset[str]
+    severities: frozenset[str]
+    zones: frozenset[str]
+
+    @classmethod
+    def from_manifest(cls, stats: dict) -> FileStats:
+        return cls(
+            _utc(stats.get("sent_min")),
+            _utc(stats.get("sent_max")),
+            frozenset(stats.get("events") or ()),
+            frozenset(stats.get("severities") or ()),
+            frozenset(stats.get("zones") or ()),
+        )
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> FileStats:
+        if frame.empty:
+            return cls(None, None, frozenset(), frozenset(), frozenset())
+        sent = _sent(frame).dropna()
+        return cls(
+            sent.min() if len(sent) else None,
+            sent.max() if len(sent) else None,
+            frozenset(frame["event"].dropna()),
+            frozenset(frame["severity"].dropna()),
+            frozenset(z for zones in frame["affected_zones"] for z in _zone_ids(zones)),
+        )
+
+    def may_match(self, start, end, events, severities, zones) -> bool:
+        if start is not None and (self.sent_max is None or self.sent_max < start):
+            return False
+        if end is not None and (self.sent_min is None or self.sent_min > end):
+            return False
+        if events and self.events.isdisjoint(events):
+            return False
+        if severities and self.severities.isdisjoint(severities):
+            return False
+        return not zones or not self.zones.isdisjoint(zones)
+
+
+def _sent(frame: pd.DataFrame) -> pd.Series:
+    return pd.to_datetime(frame["sent"], utc=True, errors="coerce", format="ISO8601")
+
+
+def _wall_clock(stamp: pd.Timestamp) -> str:
+    return stamp.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _read_frame(key: str, data: bytes, filters: list | None = None) -> pd.DataFrame:
+    if key.endswith(".parquet"):
+        if not _PARQUET:
+            raise ArchiveUnavailable("reading Parquet alert files needs pyarrow")
+        return pd.read_parquet(io.BytesIO(data), filters=filters or None)
+    lines = gzip.decompress(data).splitlines()
+    return pd.DataFrame([json.loads(line) for line in lines if line])
+
+
+# Archive -----------------------------------------------------------------------
+
+class AlertArchive:
+    """Query access to the compacted alert archive, with a per-file index."""
+
+    def __init__(self, root: str, refresh_interval: float = 60.0) -> None:
+        self._files = _S3Files(root) if root.startswith("s3://") else _LocalFiles(root)
+        self._refresh_interval = refresh_interval
+        self._listing: dict[str, float] = {}
+        self._listed_at = float("-inf")
+        self._index: dict[str, tuple[float, FileStats]] = {}
+        self._lock = threading.Lock()
+        self.files_read = 0
+
+    def _list(self) -> dict[str, float]:
+        with self._lock:
+            if time.monotonic() - self._listed_at >= self._refresh_interval:
+                self._listing = self._files.list()
+                self._listed_at = time.monotonic()
+            return self._listing
+
+    def data_files(self) -> list[str]:
+        """Daily files, plus the hourly files of days without one."""
+
+        by_day: dict[str, dict[str, list[str]]] = {}
+        for key in self._list():
+            match = _DATA_FILE.match(key)
+            if match:
+                levels = by_day.setdefault(match["date"], {})
+                levels.setdefault(match["level"], []).append(key)
+        return sorted(
+            key
+            for levels in by_day.values()
+            for key in levels.get("daily") or levels.get("hourly", [])
+        )
+
+    def stats(self, key: str) -> FileStats:
+        listing = self._list()
+        mtime = listing.get(key, 0.0)
+        with self._lock:
+            cached = self._index.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        manifest_key = f"{key.rpartition('/')[0]}/{MANIFEST}"
+        stats = None
+        if listing.get(manifest_key, float("-inf")) >= mtime:
+            document = json.loads(self._files.read(manifest_key))
+            if "stats" in document:
+                stats = FileStats.from_manifest(document["stats"])
+        if stats is None:
+            self.files_read += 1
+            stats = FileStats.from_frame(_read_frame(key, self._files.read(key)))
+        with self._lock:
+            self._index[key] = (mtime, stats)
+        return stats
+
+    def query(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        event: list[str] | None = None,
+        severity: list[str] | None = None,
+        zone: list[str] | None = None,
+        limit: int | None = None,
+        include_geometry: bool = False,
+    ) -> dict:
+        """Alerts sent in `[start, end]` matching every given filter, newest first."""
+
+        start, end = _utc(start), _utc(end)
+        events, severities = set(event or ()), set(severity or ())
+        zones = {z.upper() for z in zone or ()}
+        candidates = self.data_files()
+        stats = {key: self.stats(key) for key in candidates}
+        matching = [
+            key
+            for key in candidates
+            if stats[key].may_match(start, end, events, severities, zones)
+        ]
+        # Newest first, so a limited query stops once nothing older can rank.
+        matching.sort(key=lambda key: stats[key].sent_max or _NEVER, reverse=True)
+
+        filters = []
+        if events:
+            filters.append(("event", "in", sorted(events)))
+        if severities:
+            filters.append(("severity", "in", sorted(severities)))
+        # `sent` keeps its original offset; compare local wall-clock strings
+        # against a range widened by the largest UTC offset. Exact below.
+        if start is not None:
+            filters.append(("sent", ">=", _wall_clock(start - _MAX_OFFSET)))
+        if end is not None:
+            filters.append(("sent", "<", _wall_clock(end + _MAX_OFFSET)))
+        frames = []
+        newest = pd.Series(dtype="datetime64[ns, UTC]")  # id -> latest sent
+        scanned = 0
+        for key in matching:
+            if limit is not None and len(newest) >= limit:
+                cutoff = newest.nlargest(limit).iloc[-1]
+                if (stats[key].sent_max or _NEVER) < cutoff:
+                    break
+            scanned += 1
+            self.files_read += 1
+            frame = _read_frame(key, self._files.read(key), filters)
+            if frame.empty:
+                continue
+            sent = _sent(frame)
+            mask = pd.Series(True, index=frame.index)
+            if start is not None:
+                mask &= sent >= start
+            if end is not None:
+                mask &= sent <= end
+            if events:
+                mask &= frame["event"].isin(events)
+            if severities:
+                mask &= frame["severity"].isin(severities)
+            if zones:
+                pattern = "|".join(re.escape(f"/{z}\"") for z in sorted(zones))
+                mask &= frame["affected_zones"].fillna("").str.contains(pattern)
+            mask = mask.to_numpy()
+            frames.append(frame[mask])
+            found = pd.Series(sent[mask].to_numpy(), index=frame["id"][mask].to_numpy())
+            newest = pd.concat([newest, found.dropna()]).groupby(level=0).max()
+
+        alerts = []
+        if frames:
+            frame = pd.concat(frames, ignore_index=True)
+            # Latest version of each alert wins across days.
+            frame["_updated"] = pd.to_datetime(
+                frame["updated"], utc=True, errors="coerce", format="ISO8601"
+            )
+            frame["_sent"] = _sent(frame)
+            frame = frame.sort_values(["_updated", "ingested_at"], na_position="first")
+            frame = frame.drop_duplicates("id", keep="last")
+            frame = frame.sort_values(["_sent", "id"], ascending=False, na_position="last")
+            frame = frame.drop(columns=["_updated", "_sent"])
+            if not include_geometry:
+                frame = frame.drop(columns=["geometry"], errors="ignore")
+            if limit is not None:
+                frame = frame.head(limit)
+            alerts = frame.astype(object).where(frame.notna(), None).to_dict("records")
+            for alert in alerts:
+                for column in JSON_COLUMNS:
+                    if isinstance(alert.get(column), str):
+                        alert[column] = json.loads(alert[column])
+        return {
+            "alerts": alerts,
+            "files": {"total": len(candidates), "scanned": scanned},
+        }
+
+
+@lru_cache
+def get_alert_archive() -> AlertArchive | None:
+    """The process-wide archive, or None when no location is configured."""
+
+    if not NOAA_ALERT_ARCHIVE:
+        return None
+    return AlertArchive(NOAA_ALERT_ARCHIVE)
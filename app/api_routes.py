@@ -1,8 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
-
-from openapi_client.rest import ApiException
-
+from datetime import datetime
+from itertools import chain
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+
+from openapi_client.exceptions import ApiException
+
+from app import metrics
+from app.alert_archive import MAX_LIMIT, AlertArchive, get_alert_archive
 from app.domain_noaa_repository import NOAARepository, get_noaa_repository
+from app.forecast_summary import (
+    MAX_BATCH,
+    ForecastSummaries,
+    get_forecast_summaries,
+    parse_gridpoint,
+)
+from app.geometry import get_simplify_tolerance
+from app.gridpoint_layers import GridpointDecoder, get_gridpoint_decoder, select
+from app.icon_cache import (
+    ICON_CACHE_CONTROL,
+    Icon,
+    IconCache,
+    get_icon_cache,
+    icon_key,
+)
+from app.observation_store import (
+    AGGREGATIONS,
+    NUMERIC_COLUMNS,
+    ObservationPoller,
+    ObservationStore,
+    TrackingLimitReached,
+    frame_records,
+    get_observation_poller,
+)
+from app.projection import Projection, get_projection
+from app.query_params import (
+    active_alert_filters,
+    alert_query_filters,
+    observation_filters,
+    product_filters,
+    sigmet_filters,
+    station_filters,
+    zone_filters,
+)
+from app.streaming import (
+    DEFAULT_MAX_ITEMS,
+    MAX_ITEMS_LIMIT,
+    NDJSON_MEDIA_TYPE,
+    ndjson_lines,
+)
+from app.tiles import MVT_MEDIA_TYPE, TileService, get_tile_service, tile_in_range
+from app.units import UNIT_SYSTEMS
+from app.warmup import readiness
 
 
 router = APIRouter()
@@ -16,14 +71,31 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@router.get("/ready", summary="Readiness check")
+def ready():
+    """Reports 503 until the start-up cache warm-up has finished."""
+    return JSONResponse(readiness.detail, status_code=200 if readiness.ready else 503)
+
+
+@router.get("/metrics", summary="Prometheus metrics")
+def metrics_endpoint():
+    """Per-worker metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(
+        metrics.registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 # Alerts ----------------------------------------------------------------------
 
 @router.get("/alerts/active")
 def alerts_active(
+    filters: dict = Depends(active_alert_filters),
+    simplify: float | None = Depends(get_simplify_tolerance),
+    projection: Projection = Depends(get_projection),
     repo: NOAARepository = Depends(get_noaa_repository),
 ):
     try:
-        return repo.alerts_active()
+        return projection(repo.alerts_active(simplify=simplify, **filters))
     except ApiException as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
@@ -83,14 +155,39 @@ def alerts_types(
 
 @router.get("/alerts")
 def alerts_query(
+    filters: dict = Depends(alert_query_filters),
+    projection: Projection = Depends(get_projection),
     repo: NOAARepository = Depends(get_noaa_repository),
 ):
     try:
-        return repo.alerts_query()
+        return projection(repo.alerts_query(**filters))
     except ApiException as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
 
+def _alert_archive(
+    archive: AlertArchive | None = Depends(get_alert_archive),
+) -> AlertArchive:
+    if archive is None:
+        raise HTTPException(status_code=503, detail="Alert archive is not configured")
+    return archive
+
+
+@router.get("/alerts/history")
+def alerts_history(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    event: list[str] | None = Query(None),
+    severity: list[str] | None = Query(None),
+    zone: list[str] | None = Query(None),
+    limit: int = Query(1000, ge=1, le=MAX_LIMIT),
+    include_geometry: bool = False,
+    archive: AlertArchive = Depends(_alert_archive),
+):
+    """Archived alerts sent in a time range, newest first."""
+    return archive.query(start, end, event, severity, zone, limit, include_geometry)
+
+
 @router.get("/alerts/{id}")
 def alerts_single(
     id: str,
@@ -154,10 +251,12 @@ def sigmet(
 
 @router.get("/aviation/sigmets")
 def sigmet_query(
+    filters: dict = Depends(sigmet_filters),
+    projection: Projection = Depends(get_projection),
     repo: NOAARepository = Depends(get_noaa_repository),
 ):
     try:
-        return repo.sigmet_query()
+        return projection(repo.sigmet_query(**filters))
     except ApiException as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
@@ -212,6 +311,68 @@ def gridpoint(
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
 
+@router.get("/gridpoints/{wfo}/{x},{y}/forecast/daily")
+def gridpoint_forecast_daily(
+    wfo: str,
+    x: int,
+    y: int,
+    units: str = Query("si", pattern=f"^({'|'.join(UNIT_SYSTEMS)})$"),
+    precipitation: bool = False,
+    summaries: ForecastSummaries = Depends(get_forecast_summaries),
+    repo: NOAARepository = Depends(get_noaa_repository),
+):
+    """Daily highs/lows and maxima computed from the hourly forecast."""
+    try:
+        return summaries.summarize(repo, wfo, x, y, units, precipitation)
+    except ApiException as exc:
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+
+
+@router.get("/gridpoints/daily")
+def gridpoints_forecast_daily(
+    gridpoint: list[str] = Query(..., description="`WFO/x,y`, repeatable."),
+    units: str = Query("si", pattern=f"^({'|'.join(UNIT_SYSTEMS)})$"),
+    precipitation: bool = False,
+    summaries: ForecastSummaries = Depends(get_forecast_summaries),
+    repo: NOAARepository = Depends(get_noaa_repository),
+):
+    """Daily summaries for a batch of gridpoints; failures are reported per entry."""
+    if len(gridpoint) > MAX_BATCH:
+        raise HTTPException(
+            status_code=422, detail=f"At most {MAX_BATCH} gridpoints per request"
+        )
+    try:
+        gridpoints = [parse_gridpoint(spec) for spec in gridpoint]
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return summaries.summarize_batch(repo, gridpoints, units, precipitation)
+
+
+@router.get("/gridpoints/{wfo}/{x},{y}/layers")
+def gridpoint_layers(
+    wfo: str,
+    x: int,
+    y: int,
+    layers: list[str] | None = Query(None),
+    units: str = Query("si", pattern=f"^({'|'.join(UNIT_SYSTEMS)})$"),
+    freq: str | None = Query(None, description="Resample, e.g. `3h` or `1D`."),
+    how: str = Query("mean", pattern="^(mean|min|max|sum|median|first|last)$"),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    decoder: GridpointDecoder = Depends(get_gridpoint_decoder),
+    repo: NOAARepository = Depends(get_noaa_repository),
+):
+    """Raw gridpoint layers decoded onto an hourly grid (column-oriented)."""
+    try:
+        decoded = decoder.get(repo, wfo, x, y)
+    except ApiException as exc:
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+    try:
+        return select(decoded, layers, units, freq, how, start, end)
+    except (KeyError, ValueError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
 @router.get("/gridpoints/{wfo}/{x},{y}/forecast")
 def gridpoint_forecast(
     wfo: str,
@@ -253,17 +414,52 @@ def gridpoint_stations(
 
 # Icons -----------------------------------------------------------------------
 
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _icon_response(icon, if_none_match: str | None):
+    if not isinstance(icon, Icon):
+        return icon  # not an image; passed through uncached
+    headers = {"ETag": icon.etag, "Cache-Control": ICON_CACHE_CONTROL}
+    if _etag_matches(if_none_match, icon.etag):
+        return Response(status_code=304, headers=headers)
+    if icon.content is not None:
+        return Response(icon.content, media_type=icon.media_type, headers=headers)
+    return FileResponse(icon.path, media_type=icon.media_type, headers=headers)
+
+
+def _icon_options(size: str | None, fontsize: int | None) -> dict:
+    options = {"size": size, "fontsize": fontsize}
+    return {name: value for name, value in options.items() if value is not None}
+
+
 @router.get("/icons/{icon_set}/{time_of_day}/{first}")
 def icons(
     icon_set: str,
     time_of_day: str,
     first: str,
+    size: str | None = Query(None, description="Icon size, e.g. small, medium, large"),
+    fontsize: int | None = Query(None, ge=2, le=24),
+    if_none_match: str | None = Header(None),
     repo: NOAARepository = Depends(get_noaa_repository),
+    cache: IconCache = Depends(get_icon_cache),
 ):
+    options = _icon_options(size, fontsize)
+    key = icon_key(icon_set, time_of_day, first, None, size, fontsize)
     try:
-        return repo.icons(icon_set=icon_set, time_of_day=time_of_day, first=first)
+        icon = cache.get_or_generate(
+            key,
+            lambda: repo.icons(
+                icon_set=icon_set, time_of_day=time_of_day, first=first, **options
+            ),
+        )
     except ApiException as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
+    return _icon_response(icon, if_none_match)
 
 
 @router.get("/icons/{icon_set}/{time_of_day}/{first}/{second}")
@@ -272,17 +468,28 @@ def icons_dual_condition(
     time_of_day: str,
     first: str,
     second: str,
+    size: str | None = Query(None, description="Icon size, e.g. small, medium, large"),
+    fontsize: int | None = Query(None, ge=2, le=24),
+    if_none_match: str | None = Header(None),
     repo: NOAARepository = Depends(get_noaa_repository),
+    cache: IconCache = Depends(get_icon_cache),
 ):
+    options = _icon_options(size, fontsize)
+    key = icon_key(icon_set, time_of_day, first, second, size, fontsize)
     try:
-        return repo.icons_dual_condition(
-            icon_set=icon_set,
-            time_of_day=time_of_day,
-            first=first,
-            second=second,
+        icon = cache.get_or_generate(
+            key,
+            lambda: repo.icons_dual_condition(
+                icon_set=icon_set,
+                time_of_day=time_of_day,
+                first=first,
+                second=second,
+                **options,
+            ),
         )
     except ApiException as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
+    return _icon_response(icon, if_none_match)
 
 
 @router.get("/icons")
@@ -353,10 +560,12 @@ def product(
 
 @router.get("/products")
 def products_query(
+    filters: dict = Depends(product_filters),
+    projection: Projection = Depends(get_projection),
     repo: NOAARepository = Depends(get_noaa_repository),
 ):
     try:
-        return repo.products_query()
+        return projection(repo.products_query(**filters))
     except ApiException as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
@@ -410,10 +619,12 @@ def obs_station(
 
 @router.get("/stations")
 def obs_stations(
+    filters: dict = Depends(station_filters),
+    projection: Projection = Depends(get_projection),
     repo: NOAARepository = Depends(get_noaa_repository),
 ):
     try:
-        return repo.obs_stations()
+        return projection(repo.obs_stations(**filters))
     except ApiException as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
@@ -432,14 +643,92 @@ def station_observation_latest(
 @router.get("/stations/{station_id}/observations")
 def station_observation_list(
     station_id: str,
+    filters: dict = Depends(observation_filters),
+    projection: Projection = Depends(get_projection),
     repo: NOAARepository = Depends(get_noaa_repository),
 ):
     try:
-        return repo.station_observation_list(station_id=station_id)
+        return projection(
+            repo.station_observation_list(station_id=station_id, **filters)
+        )
     except ApiException as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
 
+def stored_observations(
+    station_id: str,
+    poller: ObservationPoller | None = Depends(get_observation_poller),
+) -> ObservationStore:
+    """The observation store, with `station_id` tracked and loaded."""
+    if poller is None:
+        raise HTTPException(status_code=503, detail="Observation store is not configured")
+    try:
+        tracked = poller.track(station_id)
+    except TrackingLimitReached as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    if tracked:
+        try:
+            poller.poll_station(station_id)
+        except Exception as exc:
+            # Unknown or failing stations are not polled every interval.
+            poller.untrack(station_id)
+            if isinstance(exc, ApiException):
+                raise HTTPException(status_code=502, detail=str(exc)) from exc
+            raise
+    return poller.store
+
+
+def _observation_columns(
+    columns: list[str] | None = Query(None),
+) -> list[str] | None:
+    unknown = sorted(set(columns or ()) - set(NUMERIC_COLUMNS))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown columns: {unknown}")
+    return columns
+
+
+@router.get("/stations/{station_id}/observations/history")
+def station_observation_history(
+    station_id: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: list[str] | None = Depends(_observation_columns),
+    store: ObservationStore = Depends(stored_observations),
+):
+    """Stored observations of a station in a time range."""
+    return frame_records(store.query(station_id, start, end, columns))
+
+
+@router.get("/stations/{station_id}/observations/resample")
+def station_observation_resample(
+    station_id: str,
+    freq: str = "1h",
+    how: str = Query("mean", pattern=f"^({'|'.join(AGGREGATIONS)})$"),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: list[str] | None = Depends(_observation_columns),
+    store: ObservationStore = Depends(stored_observations),
+):
+    """Stored observations resampled to a fixed frequency (e.g. `15min`, `1h`, `1D`)."""
+    try:
+        frame = store.resample(station_id, freq, how, start, end, columns)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return frame_records(frame)
+
+
+@router.get("/stations/{station_id}/observations/summary")
+def station_observation_summary(
+    station_id: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: list[str] | None = Depends(_observation_columns),
+    store: ObservationStore = Depends(stored_observations),
+):
+    """Min, max, mean and count of stored observations in a time range."""
+    return store.aggregate(station_id, start, end, columns)
+
+
 @router.get("/stations/{station_id}/observations/{time}")
 def station_observation_time(
     station_id: str,
@@ -646,10 +935,11 @@ def satellite_thumbnails(
 def zone(
     zone_type: str,
     zone_id: str,
+    simplify: float | None = Depends(get_simplify_tolerance),
     repo: NOAARepository = Depends(get_noaa_repository),
 ):
     try:
-        return repo.zone(zone_type=zone_type, zone_id=zone_id)
+        return repo.zone(zone_type=zone_type, zone_id=zone_id, simplify=simplify)
     except ApiException as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
@@ -668,10 +958,12 @@ def zone_forecast(
 
 @router.get("/zones")
 def zone_list(
+    filters: dict = Depends(zone_filters),
+    projection: Projection = Depends(get_projection),
     repo: NOAARepository = Depends(get_noaa_repository),
 ):
     try:
-        return repo.zone_list()
+        return projection(repo.zone_list(**filters))
     except ApiException as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
@@ -709,3 +1001,101 @@ def zone_stations(
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
 
+# Vector tiles ----------------------------------------------------------------
+
+@router.get("/tiles/{layer}/{z}/{x}/{y}")
+def vector_tile(
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    if_none_match: str | None = Header(None),
+    tiles: TileService = Depends(get_tile_service),
+    repo: NOAARepository = Depends(get_noaa_repository),
+):
+    """Mapbox vector tile of active alert or zone polygons (204 when empty)."""
+    if layer not in tiles.layers or not tile_in_range(z, x, y):
+        raise HTTPException(status_code=404, detail="Unknown tile")
+    max_age = int(tiles.layers[layer].refresh_interval)
+    try:
+        # Tiles are versioned per layer snapshot: a match needs no rendering.
+        version = tiles.version(repo, layer)
+        if _etag_matches(if_none_match, f'"{version}"'):
+            headers = {"Cache-Control": f"public, max-age={max_age}", "ETag": f'"{version}"'}
+            return Response(status_code=304, headers=headers)
+        content, version = tiles.tile(repo, layer, z, x, y)
+    except ApiException as exc:
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+    headers = {"Cache-Control": f"public, max-age={max_age}", "ETag": f'"{version}"'}
+    if not content:
+        return Response(status_code=204, headers=headers)
+    return Response(content, media_type=MVT_MEDIA_TYPE, headers=headers)
+
+
+# Exports ---------------------------------------------------------------------
+#
+# Stream every page of a paginated collection as NDJSON (see app.streaming).
+# The first page is fetched before the response starts so upstream errors
+# still map to 502.
+
+def _ndjson_export(
+    repo: NOAARepository,
+    method: str,
+    max_items: int,
+    projection: Projection,
+    **query,
+):
+    pages = repo.iter_pages(method, **query)
+    try:
+        first = next(pages)
+    except ApiException as exc:
+        pages.close()
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+    return StreamingResponse(
+        ndjson_lines(map(projection, chain([first], pages)), max_items=max_items),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.get("/export/alerts")
+def export_alerts(
+    filters: dict = Depends(alert_query_filters),
+    max_items: int = Query(DEFAULT_MAX_ITEMS, ge=1, le=MAX_ITEMS_LIMIT),
+    projection: Projection = Depends(get_projection),
+    repo: NOAARepository = Depends(get_noaa_repository),
+):
+    return _ndjson_export(repo, "alerts_query", max_items, projection, **filters)
+
+
+@router.get("/export/products")
+def export_products(
+    filters: dict = Depends(product_filters),
+    max_items: int = Query(DEFAULT_MAX_ITEMS, ge=1, le=MAX_ITEMS_LIMIT),
+    projection: Projection = Depends(get_projection),
+    repo: NOAARepository = Depends(get_noaa_repository),
+):
+    return _ndjson_export(repo, "products_query", max_items, projection, **filters)
+
+
+@router.get("/export/stations")
+def export_stations(
+    filters: dict = Depends(station_filters),
+    max_items: int = Query(DEFAULT_MAX_ITEMS, ge=1, le=MAX_ITEMS_LIMIT),
+    projection: Projection = Depends(get_projection),
+    repo: NOAARepository = Depends(get_noaa_repository),
+):
+    return _ndjson_export(repo, "obs_stations", max_items, projection, **filters)
+
+
+@router.get("/export/stations/{station_id}/observations")
+def export_station_observations(
+    station_id: str,
+    filters: dict = Depends(observation_filters),
+    max_items: int = Query(DEFAULT_MAX_ITEMS, ge=1, le=MAX_ITEMS_LIMIT),
+    projection: Projection = Depends(get_projection),
+    repo: NOAARepository = Depends(get_noaa_repository),
+):
+    return _ndjson_export(
+        repo, "station_observation_list", max_items, projection,
+        station_id=station_id, **filters,
+    )
@@ -0,0 +1,583 @@
+"""
+Pluggable response cache backends for the NOAA repository.
+
+Every backend stores compact serialized entries (zlib-compressed JSON) with a
+per-entry TTL, so different backends are interchangeable:
+
+- `MemoryCache`: per-process LRU, the default for a single worker.
+- `RedisCache`: shared across workers and hosts; speaks the Redis wire
+  protocol (RESP) directly, so it works against Redis, Valkey, KeyDB or a
+  local stand-in without an extra client dependency.
+- `MmapCache`: shared between the workers of a single host through a
+  memory-mapped file, with per-slot `fcntl` locks. Entries too large for a
+  slot spill to a SQLite file next to it.
+- `SQLiteCache`: persistent, size-bounded disk store used as the second
+  tier of a `TieredCache`, so restarted workers come up warm.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import socket
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_kwargs(kwargs: dict) -> dict:
+    """
+    Canonical form of repository call arguments.
+
+    Surrounding whitespace is stripped from strings and floats are rounded to
+    four decimals (the precision api.weather.gov uses for points). The same
+    arguments are sent upstream, so a cached result (or error) always
+    belongs to exactly the request that produced it.
+    """
+
+    def _normalize(value):
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, float):
+            return round(value, 4)
+        if isinstance(value, (list, tuple)):
+            return [_normalize(item) for item in value]
+        return value
+
+    return {key: _normalize(value) for key, value in kwargs.items()}
+
+
+def cache_key(method: str, kwargs: dict) -> str:
+    """Cache key for a call, independent of keyword order and spelling."""
+
+    return method + ":" + json.dumps(
+        normalize_kwargs(kwargs), sort_keys=True, separators=(",", ":"), default=str
+    )
+
+
+# Entry serialization -----------------------------------------------------------
+
+_HEADER = struct.Struct("<d")  # absolute expiry (unix seconds)
+
+
+def encode_entry(value: Any, ttl: float, level: int = 1) -> bytes:
+    # No `default=`: values must already be JSON data (see `to_jsonable`), so
+    # anything else fails here instead of decoding differently on a hit.
+    payload = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(time.time() + ttl) + zlib.compress(payload, level)
+
+
+def decode_entry(data: bytes) -> tuple[float, Any]:
+    (expires_at,) = _HEADER.unpack_from(data)
+    return expires_at, json.loads(zlib.decompress(data[_HEADER.size:]))
+
+
+# Backends ------------------------------------------------------------------------
+
+class CacheBackend(ABC):
+    """Interface shared by all cache backends. `get` returns `None` on a miss."""
+
+    @abstractmethod
+    def get_entry(self, key: str) -> tuple[float, Any] | None:
+        """`(expires_at, value)` of an unexpired entry, or None on a miss."""
+
+    def get(self, key: str) -> Any | None:
+        entry = self.get_entry(key)
+        return None if entry is None else entry[1]
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    def warm(self) -> int:
+        """Preload persisted entries into faster tiers; returns the count."""
+
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache bounded by entry count."""
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: str) -> tuple[float, Any] | None:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                return None
+            self._entries.move_to_end(key)
+        expires_at, value = decode_entry(data)
+        if expires_at <= time.time():
+            self.delete(key)
+            return None
+        return expires_at, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = encode_entry(value, ttl)
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache stored in a Redis-protocol server, shared by all workers.
+
+    Expiry is delegated to the server (`SET ... PX`); one connection is kept
+    per thread. Connection errors are treated as misses so an unavailable
+    cache degrades to upstream calls instead of failing requests.
+    """
+
+    def __init__(
+        self, url: str = "redis://localhost:6379/0", prefix: str = "noaa:",
+        timeout: float = 0.5,
+    ) -> None:
+        parsed = urlparse(url)
+        self._address = (parsed.hostname or "localhost", parsed.port or 6379)
+        self._db = int(parsed.path.lstrip("/") or 0)
+        self._password = parsed.password
+        self._prefix = prefix
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def get_entry(self, key: str) -> tuple[float, Any] | None:
+        data = self._command("GET", self._prefix + key)
+        if data is None:
+            return None
+        return decode_entry(data)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._command(
+            "SET", self._prefix + key, encode_entry(value, ttl), "PX",
+            str(max(1, int(ttl * 1000))),
+        )
+
+    def delete(self, key: str) -> None:
+        self._command("DEL", self._prefix + key)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # RESP ------------------------------------------------------------------------
+
+    def _command(self, *args):
+        try:
+            conn = self._connection()
+            conn.sendall(_encode_command(args))
+            return _read_reply(self._local.reader)
+        except OSError:
+            self.close()
+            return None
+
+    def _connection(self) -> socket.socket:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = socket.create_connection(self._address, timeout=self._timeout)
+            self._local.conn = conn
+            self._local.reader = conn.makefile("rb")
+            if self._password:
+                conn.sendall(_encode_command(("AUTH", self._password)))
+                _read_reply(self._local.reader)
+            if self._db:
+                conn.sendall(_encode_command(("SELECT", str(self._db))))
+                _read_reply(self._local.reader)
+        return conn
+
+
+def _encode_command(args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _read_reply(reader):
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("connection closed by cache server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        raise OSError(rest.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(rest)
+        return None if count < 0 else [_read_reply(reader) for _ in range(count)]
+    raise OSError(f"unexpected reply from cache server: {line!r}")
+
+
+class MmapCache(CacheBackend):
+    """
+    Fixed-size, direct-mapped cache in a memory-mapped file.
+
+    Workers on the same host open the same file and share entries. Each key
+    hashes to one slot; a colliding write simply replaces the previous entry.
+    Entries larger than a slot spill to `<path>.overflow`, a `SQLiteCache`
+    bounded by `overflow_bytes` (0 disables it, and such entries are not
+    cached); both are counted in `noaa_cache_oversize_total`.
+    """
+
+    _SLOT_HEADER = struct.Struct("<16sI")  # key digest, entry length
+
+    def __init__(
+        self,
+        path: str | Path,
+        slots: int = 4096,
+        slot_size: int = 64 * 1024,
+        overflow_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self._slots = slots
+        self._slot_size = slot_size
+        size = slots * slot_size
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._overflow = (
+            SQLiteCache(f"{path}.overflow", max_bytes=overflow_bytes)
+            if overflow_bytes > 0
+            else None
+        )
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        # fcntl record locks are per process; this serializes this process's threads.
+        self._lock = threading.Lock()
+
+    def _slot(self, key: str) -> tuple[bytes, int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        return digest, (int.from_bytes(digest[:8], "little") % self._slots) * self._slot_size
+
+    @contextmanager
+    def _locked(self, offset: int, exclusive: bool):
+        with self._lock:
+            mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            fcntl.lockf(self._fd, mode, self._slot_size, offset)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self._slot_size, offset)
+
+    def get_entry(self, key: str) -> tuple[float, Any] | None:
+        digest, offset = self._slot(key)
+        with self._locked(offset, exclusive=False):
+            stored, length = self._SLOT_HEADER.unpack_from(self._map, offset)
+            data = None
+            if stored == digest and length:
+                start = offset + self._SLOT_HEADER.size
+                data = self._map[start:start + length]
+        if data is None:
+            return None if self._overflow is None else self._overflow.get_entry(key)
+        expires_at, value = decode_entry(data)
+        if expires_at <= time.time():
+            return None
+        return expires_at, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = encode_entry(value, ttl)
+        if len(data) > self._slot_size - self._SLOT_HEADER.size:
+            self._spill(key, value, ttl, len(data))
+            return
+        digest, offset = self._slot(key)
+        with self._locked(offset, exclusive=True):
+            self._SLOT_HEADER.pack_into(self._map, offset, digest, len(data))
+            start = offset + self._SLOT_HEADER.size
+            self._map[start:start + len(data)] = data
+        if self._overflow is not None:
+            # An older oversized version must not resurface once this slot is reused.
+            self._overflow.delete(key)
+
+    def _spill(self, key: str, value: Any, ttl: float, size: int) -> None:
+        self._clear_slot(key)
+        if self._overflow is None:
+            metrics.cache_oversize_total.inc("skipped")
+            logger.debug("not caching %s: %d bytes exceed the mmap slot", key, size)
+            return
+        self._overflow.set(key, value, ttl)
+        metrics.cache_oversize_total.inc("spilled")
+
+    def _clear_slot(self, key: str) -> None:
+        digest, offset = self._slot(key)
+        with self._locked(offset, exclusive=True):
+            stored, _ = self._SLOT_HEADER.unpack_from(self._map, offset)
+            if stored == digest:
+                self._SLOT_HEADER.pack_into(self._map, offset, b"\0" * 16, 0)
+
+    def delete(self, key: str) -> None:
+        self._clear_slot(key)
+        if self._overflow is not None:
+            self._overflow.delete(key)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+        if self._overflow is not None:
+            self._overflow.close()
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Disk-backed cache in a single SQLite file.
+
+    Entries are stored with a higher zlib level than the in-memory tiers.
+    When the stored bytes exceed `max_bytes`, least recently read entries
+    (and anything expired) are evicted down to 90% of the bound.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = 512 * 1024 * 1024) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL,"
+            " size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._db.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        (self._size,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+    def get_entry(self, key: str) -> tuple[float, Any] | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+        expires_at, value = decode_entry(row[0])
+        if expires_at <= time.time():
+            self.delete(key)
+            return None
+        return expires_at, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = encode_entry(value, ttl, level=6)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, data, now + ttl, len(data), now),
+            )
+            self._size += len(data) - (row[0] if row else 0)
+            if self._size > self._max_bytes:
+                self._evict_locked(now)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            row = self._db.execute(
+                "DELETE FROM entries WHERE key = ? RETURNING size", (key,)
+            ).fetchone()
+            if row:
+                self._size -= row[0]
+
+    def items(self):
+        """Yield `(key, expires_at, value)` for unexpired entries, most recent last."""
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, data FROM entries WHERE expires_at > ?"
+                " ORDER BY accessed",
+                (time.time(),),
+            ).fetchall()
+        for key, data in rows:
+            expires_at, value = decode_entry(data)
+            yield key, expires_at, value
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _evict_locked(self, now: float) -> None:
+        target = int(self._max_bytes * 0.9)
+        self._db.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        (self._size,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        while self._size > target:
+            rows = self._db.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY accessed LIMIT 64)"
+                " RETURNING size"
+            ).fetchall()
+            if not rows:
+                break
+            self._size -= sum(size for (size,) in rows)
+
+
+class TieredCache(CacheBackend):
+    """
+    In-memory (L1) cache backed by a persistent `SQLiteCache` (L2).
+
+    Only keys for `l2_methods` are written through to disk; L2 hits are
+    promoted into L1 with their remaining lifetime. `warm` loads the whole
+    L2 into L1 at start-up.
+    """
+
+    def __init__(
+        self, l1: CacheBackend, l2: SQLiteCache, l2_methods: frozenset[str]
+    ) -> None:
+        self._l1 = l1
+        self._l2 = l2
+        self._l2_methods = l2_methods
+
+    def _in_l2(self, key: str) -> bool:
+        return key.partition(":")[0] in self._l2_methods
+
+    def get_entry(self, key: str) -> tuple[float, Any] | None:
+        entry = self._l1.get_entry(key)
+        if entry is not None or not self._in_l2(key):
+            return entry
+        entry = self._l2.get_entry(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        self._l1.set(key, value, expires_at - time.time())
+        return entry
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._l1.set(key, value, ttl)
+        if self._in_l2(key):
+            self._l2.set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self._l1.delete(key)
+        self._l2.delete(key)
+
+    def warm(self) -> int:
+        loaded = 0
+        for key, expires_at, value in self._l2.items():
+            self._l1.set(key, value, expires_at - time.time())
+            loaded += 1
+        return loaded
+
+    def close(self) -> None:
+        self._l1.close()
+        self._l2.close()
+
+
+class AccessTracker:
+    """
+    Request frequency per cache key, used to pre-fetch hot keys before expiry.
+
+    Counts are decayed periodically so popularity follows recent traffic; at
+    most `max_keys` keys are tracked (the least requested are dropped).
+    """
+
+    def __init__(self, max_keys: int = 10_000) -> None:
+        self._max_keys = max_keys
+        self._counts: dict[str, float] = {}
+        self._calls: dict[str, tuple[str, dict]] = {}
+        self._expires: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, method: str, kwargs: dict) -> None:
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0.0) + 1.0
+            if key not in self._calls:
+                self._calls[key] = (method, kwargs)
+                if len(self._calls) > self._max_keys:
+                    self._prune_locked()
+
+    def stored(self, key: str, expires_at: float) -> None:
+        """Note when the cached entry for `key` expires (stored or read here)."""
+
+        with self._lock:
+            self._expires[key] = expires_at
+
+    def expires_at(self, key: str) -> float:
+        """When `key` was last seen to expire in this process (0 if unknown)."""
+
+        return self._expires.get(key, 0.0)
+
+    def hot(self, n: int) -> list[tuple[str, str, dict, float]]:
+        """Top `n` keys as `(key, method, kwargs, expires_at)`."""
+
+        with self._lock:
+            top = sorted(self._counts, key=self._counts.__getitem__, reverse=True)[:n]
+            return [
+                (key, *self._calls[key], self._expires.get(key, 0.0)) for key in top
+            ]
+
+    def decay(self, factor: float = 0.5) -> None:
+        with self._lock:
+            for key in list(self._counts):
+                self._counts[key] *= factor
+                if self._counts[key] < 0.01:
+                    self._forget_locked(key)
+
+    def _prune_locked(self) -> None:
+        ranked = sorted(self._counts, key=self._counts.__getitem__)
+        for key in ranked[: len(ranked) // 2]:
+            self._forget_locked(key)
+
+    def _forget_locked(self, key: str) -> None:
+        self._counts.pop(key, None)
+        self._calls.pop(key, None)
+        self._expires.pop(key, None)
+
+
+def build_cache_backend(kind: str, **options) -> CacheBackend | None:
+    """Construct a backend from its configuration name (`none` disables caching)."""
+
+    if kind in ("", "none"):
+        return None
+    if kind == "memory":
+        return MemoryCache(**options)
+    if kind == "redis":
+        return RedisCache(**options)
+    if kind == "mmap":
+        return MmapCache(**options)
+    if kind == "sqlite":
+        return SQLiteCache(**options)
+    raise ValueError(f"unknown cache backend: {kind!r}")
@@ -1,7 +1,97 @@
-from functools import lru_cache
+from __future__ import annotations
 
-import openapi_client
-from openapi_client.api.default_api import DefaultApi
+import contextvars
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterator
+
+from urllib3.exceptions import MaxRetryError
+from urllib3.exceptions import TimeoutError as Urllib3TimeoutError
+from urllib3.util.retry import Retry
+
+from app import metrics
+
+from app.cache import (
+    AccessTracker,
+    CacheBackend,
+    SQLiteCache,
+    TieredCache,
+    build_cache_backend,
+    cache_key,
+    normalize_kwargs,
+)
+from app.geometry import simplify_payload
+from app.recording import (
+    RecordingApi,
+    ReplayApi,
+    TrafficArchive,
+    from_jsonable,
+    to_jsonable,
+)
+from app.request_context import DeadlineExceeded, RequestCancelled, current_request
+from app.streaming import next_cursor
+
+if TYPE_CHECKING:
+    from openapi_client.api.default_api import DefaultApi
+
+
+# Response cache lifetimes in seconds, per DefaultApi method. Methods not
+# listed here are never cached.
+CACHE_TTLS = {
+    # Alerts change minute to minute.
+    "alerts_active": 30,
+    "alerts_active_area": 30,
+    "alerts_active_count": 30,
+    "alerts_active_region": 30,
+    "alerts_active_zone": 30,
+    "alerts_query": 60,
+    "alerts_single": 300,
+    # Forecasts and observations.
+    "gridpoint": 300,
+    "gridpoint_forecast": 300,
+    "gridpoint_forecast_hourly": 300,
+    "station_observation_latest": 60,
+    "station_observation_list": 120,
+    "zone_forecast": 300,
+    "zone_obs": 120,
+    # Slowly changing metadata.
+    "gridpoint_stations": 3600,
+    "obs_station": 3600,
+    "office": 3600,
+    "point": 86400,
+    "point_radio": 3600,
+    "point_stations": 3600,
+    "radar_station": 3600,
+    "zone": 3600,
+    "zone_list_type": 3600,
+    "zone_stations": 3600,
+    # Reference datasets and deterministic assets.
+    "alerts_types": 86400,
+    "glossary": 86400,
+    "icons_summary": 86400,
+    "obs_stations": 86400,
+    "product_locations": 86400,
+    "product_types": 86400,
+    "radar_stations": 86400,
+    "zone_list": 86400,
+}
+
+# Large reference datasets that are also persisted to the on-disk L2 cache,
+# so they survive restarts and deploys.
+L2_CACHE_METHODS = frozenset(
+    {
+        "alerts_types",
+        "glossary",
+        "obs_stations",
+        "product_locations",
+        "product_types",
+        "radar_stations",
+        "zone_list",
+    }
+)
 
 
 class NOAARepository:
@@ -13,225 +103,529 @@ class NOAARepository:
     touching FastAPI routes.
     """
 
-    def __init__(self, api: DefaultApi) -> None:
+    def __init__(
+        self,
+        api: DefaultApi,
+        cache: CacheBackend | None = None,
+        ttls: dict[str, float] | None = None,
+    ) -> None:
         self._api = api
+        self._cache = cache
+        self._ttls = CACHE_TTLS if ttls is None else ttls
+        self.stats: Counter[str] = Counter()
+        self.access = AccessTracker()
+
+    def fetch(self, method: str, **kwargs):
+        """
+        Call `DefaultApi.<method>` through the response cache.
+
+        Cached results are returned as plain JSON data; with no cache
+        configured (or no TTL for `method`) the generated model is returned.
+        Client errors (4xx) are negatively cached for
+        `NOAA_NEGATIVE_CACHE_TTL` seconds and re-raised from the cache.
+        """
+
+        if self._cache is None:
+            return self._call_upstream(method, kwargs)
+
+        kwargs = normalize_kwargs(kwargs)
+        key = cache_key(method, kwargs)
+        ttl = self._ttls.get(method)
+        if not ttl:
+            self._raise_negative_hit(key, method)
+            return self._call_remembering_errors(key, method, kwargs)
+        return from_jsonable(self._fetch_entry(key, method, kwargs, ttl)[1])
+
+    def refresh(self, method: str, **kwargs):
+        """Re-fetch `method` from upstream and overwrite its cache entry."""
+
+        ttl = self._ttls.get(method)
+        if self._cache is None or not ttl:
+            return self._call_upstream(method, kwargs)
+        kwargs = normalize_kwargs(kwargs)
+        return from_jsonable(
+            self._fetch_and_store(cache_key(method, kwargs), method, kwargs, ttl)
+        )
+
+    def _fetch_entry(self, key: str, method: str, kwargs: dict, ttl: float):
+        """`(expires_at, JSON value)` of a cached call, fetched on a miss."""
+
+        self.access.record(key, method, kwargs)
+        entry = self._cache.get_entry(key)
+        if entry is not None:
+            self.stats["hit"] += 1
+            # The entry may come from L2 or another worker; its expiry is what
+            # tells the prefetcher whether it needs refreshing.
+            self.access.stored(key, entry[0])
+            self._note_cache_hit(entry[0])
+            return entry
+
+        self._raise_negative_hit(key, method)
+        self.stats["miss"] += 1
+        return time.time() + ttl, self._fetch_and_store(key, method, kwargs, ttl)
+
+    def _fetch_and_store(self, key: str, method: str, kwargs: dict, ttl: float):
+        value = to_jsonable(self._call_remembering_errors(key, method, kwargs))
+        self._cache.set(key, value, ttl)
+        self.access.stored(key, time.time() + ttl)
+        return value
+
+    def cached_expiry(self, key: str) -> float:
+        """Expiry of the cached entry for `key` (0 if not cached), noted in `access`."""
+
+        entry = None if self._cache is None else self._cache.get_entry(key)
+        if entry is None:
+            return 0.0
+        self.access.stored(key, entry[0])
+        return entry[0]
+
+    @staticmethod
+    def _note_cache_hit(expires_at: float) -> None:
+        context = current_request.get()
+        if context is not None:
+            context.note_cache_hit(expires_at)
+
+    def fetch_simplified(self, method: str, tolerance: float, **kwargs):
+        """
+        `fetch` with geometries simplified to `tolerance` degrees.
+
+        Simplified payloads are cached next to the raw response (keyed by
+        call and tolerance) and expire together with it, so they are never
+        older than the data they were derived from.
+        """
+
+        ttl = self._ttls.get(method)
+        if self._cache is None or not ttl:
+            return simplify_payload(to_jsonable(self.fetch(method, **kwargs)), tolerance)
+
+        kwargs = normalize_kwargs(kwargs)
+        raw_key = cache_key(method, kwargs)
+        key = f"{raw_key}~{tolerance:g}"
+        entry = self._cache.get_entry(key)
+        if entry is not None:
+            # Counts towards the raw key's popularity, so prefetch keeps it warm.
+            self.access.record(raw_key, method, kwargs)
+            self.stats["simplified_hit"] += 1
+            self._note_cache_hit(entry[0])
+            return entry[1]
+
+        expires_at, raw = self._fetch_entry(raw_key, method, kwargs, ttl)
+        value = simplify_payload(raw, tolerance)
+        remaining = expires_at - time.time()
+        if remaining > 0:
+            self._cache.set(key, value, remaining)
+        return value
+
+    def iter_pages(self, method: str, **kwargs) -> Iterator[dict]:
+        """
+        Yield the pages of a paginated collection, following its cursors.
+
+        Pages bypass the response cache. While the caller consumes one page
+        the next is already being fetched in the background, so at most two
+        pages are held in memory. Closing the iterator abandons the prefetch.
+        """
+
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="noaa-pages")
+        # The prefetch thread must see the same request context (budget,
+        # cancellation) as the caller.
+        context = contextvars.copy_context()
+
+        def _page(page_kwargs: dict) -> dict:
+            return to_jsonable(context.run(self._call_upstream, method, page_kwargs))
+
+        try:
+            pending = pool.submit(_page, kwargs)
+            while pending is not None:
+                page = pending.result()
+                cursor = next_cursor(page)
+                pending = (
+                    pool.submit(_page, {**kwargs, "cursor": cursor}) if cursor else None
+                )
+                yield page
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # Negative cache ---------------------------------------------------------
+
+    def _call_remembering_errors(self, key: str, method: str, kwargs: dict):
+        try:
+            return self._call_upstream(method, kwargs)
+        except Exception as exc:
+            status = getattr(exc, "status", None)
+            if isinstance(status, int) and _is_cacheable_client_error(status):
+                body = getattr(exc, "body", None)
+                if isinstance(body, (bytes, bytearray)):
+                    body = bytes(body).decode("utf-8", "replace")
+                self._cache.set(
+                    NEGATIVE_KEY_PREFIX + key,
+                    {
+                        "status": status,
+                        "reason": getattr(exc, "reason", None),
+                        "body": body,
+                    },
+                    NOAA_NEGATIVE_CACHE_TTL,
+                )
+            raise
+
+    def _raise_negative_hit(self, key: str, method: str) -> None:
+        error = self._cache.get(NEGATIVE_KEY_PREFIX + key)
+        if error is None:
+            return
+        self.stats["negative_hit"] += 1
+        metrics.negative_cache_hits_total.inc(method, str(error["status"]))
+
+        from openapi_client.exceptions import ApiException
+
+        raise ApiException(
+            status=error["status"], reason=error["reason"], body=error["body"]
+        )
+
+    def _call_upstream(self, method: str, kwargs: dict):
+        """
+        Invoke `DefaultApi.<method>` within the current request's budget.
+
+        The remaining budget is passed as the client's `_request_timeout`;
+        calls are skipped once the client has disconnected or the budget is
+        spent. Calls outside a request (warm-up, pre-fetch) use
+        `NOAA_BACKGROUND_TIMEOUT`.
+        """
+
+        context = current_request.get()
+        route_class = "background" if context is None else context.route_class
+        timeout = NOAA_BACKGROUND_TIMEOUT
+        if context is not None:
+            try:
+                timeout = min(timeout, context.check())
+            except RequestCancelled:
+                metrics.requests_cancelled_total.inc(route_class)
+                raise
+            context.note_upstream_call()
+
+        started = time.perf_counter()
+        try:
+            return getattr(self._api, method)(**kwargs, _request_timeout=timeout)
+        except Exception as exc:
+            if not _is_timeout(exc):
+                raise
+            metrics.upstream_timeouts_total.inc(route_class, method)
+            raise DeadlineExceeded(route_class) from exc
+        finally:
+            metrics.upstream_request_seconds.observe(
+                route_class, method, value=time.perf_counter() - started
+            )
 
     # Alerts -----------------------------------------------------------------
 
-    def alerts_active(self, **kwargs):
-        return self._api.alerts_active(**kwargs)
+    def alerts_active(self, simplify: float | None = None, **kwargs):
+        if simplify:
+            return self.fetch_simplified("alerts_active", simplify, **kwargs)
+        return self.fetch("alerts_active", **kwargs)
 
     def alerts_active_area(self, area: str):
-        return self._api.alerts_active_area(area=area)
+        return self.fetch("alerts_active_area", area=area)
 
     def alerts_active_count(self):
-        return self._api.alerts_active_count()
+        return self.fetch("alerts_active_count")
 
     def alerts_active_region(self, region: str):
-        return self._api.alerts_active_region(region=region)
+        return self.fetch("alerts_active_region", region=region)
 
     def alerts_active_zone(self, zone_id: str):
-        return self._api.alerts_active_zone(zone_id=zone_id)
+        return self.fetch("alerts_active_zone", zone_id=zone_id)
 
     def alerts_query(self, **kwargs):
-        return self._api.alerts_query(**kwargs)
+        return self.fetch("alerts_query", **kwargs)
 
     def alerts_single(self, id: str):
-        return self._api.alerts_single(id=id)
+        return self.fetch("alerts_single", id=id)
 
     def alerts_types(self):
-        return self._api.alerts_types()
+        return self.fetch("alerts_types")
 
     # Aviation / CWSU & SIGMET -----------------------------------------------
 
     def cwa(self, cwsu_id: str, var_date: str, sequence: int):
-        return self._api.cwa(cwsu_id=cwsu_id, var_date=var_date, sequence=sequence)
+        return self.fetch("cwa", cwsu_id=cwsu_id, var_date=var_date, sequence=sequence)
 
     def cwas(self, cwsu_id: str):
-        return self._api.cwas(cwsu_id=cwsu_id)
+        return self.fetch("cwas", cwsu_id=cwsu_id)
 
     def cwsu(self, cwsu_id: str):
-        return self._api.cwsu(cwsu_id=cwsu_id)
+        return self.fetch("cwsu", cwsu_id=cwsu_id)
 
     def sigmet(self, atsu: str, var_date: str, time: str):
-        return self._api.sigmet(atsu=atsu, var_date=var_date, time=time)
+        return self.fetch("sigmet", atsu=atsu, var_date=var_date, time=time)
 
     def sigmet_query(self, **kwargs):
-        return self._api.sigmet_query(**kwargs)
+        return self.fetch("sigmet_query", **kwargs)
 
     def sigmets_by_atsu(self, atsu: str):
-        return self._api.sigmets_by_atsu(atsu=atsu)
+        return self.fetch("sigmets_by_atsu", atsu=atsu)
 
     def sigmets_by_atsuby_date(self, atsu: str, var_date: str):
-        return self._api.sigmets_by_atsuby_date(atsu=atsu, var_date=var_date)
+        return self.fetch("sigmets_by_atsuby_date", atsu=atsu, var_date=var_date)
 
     # Glossary ----------------------------------------------------------------
 
     def glossary(self):
-        return self._api.glossary()
+        return self.fetch("glossary")
 
     # Gridpoints --------------------------------------------------------------
 
     def gridpoint(self, wfo: str, x: int, y: int):
-        return self._api.gridpoint(wfo=wfo, x=x, y=y)
+        return self.fetch("gridpoint", wfo=wfo, x=x, y=y)
 
     def gridpoint_forecast(self, wfo: str, x: int, y: int):
-        return self._api.gridpoint_forecast(wfo=wfo, x=x, y=y)
+        return self.fetch("gridpoint_forecast", wfo=wfo, x=x, y=y)
 
     def gridpoint_forecast_hourly(self, wfo: str, x: int, y: int):
-        return self._api.gridpoint_forecast_hourly(wfo=wfo, x=x, y=y)
+        return self.fetch("gridpoint_forecast_hourly", wfo=wfo, x=x, y=y)
 
     def gridpoint_stations(self, wfo: str, x: int, y: int):
-        return self._api.gridpoint_stations(wfo=wfo, x=x, y=y)
+        return self.fetch("gridpoint_stations", wfo=wfo, x=x, y=y)
 
     # Icons -------------------------------------------------------------------
 
-    def icons(self, icon_set: str, time_of_day: str, first: str):
-        return self._api.icons(set=icon_set, time_of_day=time_of_day, first=first)
+    # Icon images bypass the response cache; `app.icon_cache` stores them.
+
+    def icons(self, icon_set: str, time_of_day: str, first: str, **kwargs):
+        return self._call_upstream(
+            "icons",
+            {"set": icon_set, "time_of_day": time_of_day, "first": first, **kwargs},
+        )
 
     def icons_dual_condition(
-        self, icon_set: str, time_of_day: str, first: str, second: str
+        self, icon_set: str, time_of_day: str, first: str, second: str, **kwargs
     ):
-        return self._api.icons_dual_condition(
-            set=icon_set, time_of_day=time_of_day, first=first, second=second
+        return self._call_upstream(
+            "icons_dual_condition",
+            {
+                "set": icon_set,
+                "time_of_day": time_of_day,
+                "first": first,
+                "second": second,
+                **kwargs,
+            },
         )
 
     def icons_summary(self):
-        return self._api.icons_summary()
+        return self.fetch("icons_summary")
 
     # Products ----------------------------------------------------------------
 
     def latest_product_type_location(self, type_id: str, location_id: str):
-        return self._api.latest_product_type_location(
+        return self.fetch(
+            "latest_product_type_location",
             type_id=type_id, location_id=location_id
         )
 
     def location_products(self, location_id: str):
-        return self._api.location_products(location_id=location_id)
+        return self.fetch("location_products", location_id=location_id)
 
     def product(self, product_id: str):
-        return self._api.product(product_id=product_id)
+        return self.fetch("product", product_id=product_id)
 
     def product_locations(self):
-        return self._api.product_locations()
+        return self.fetch("product_locations")
 
     def product_types(self):
-        return self._api.product_types()
+        return self.fetch("product_types")
 
     def products_query(self, **kwargs):
-        return self._api.products_query(**kwargs)
+        return self.fetch("products_query", **kwargs)
 
     def products_type(self, type_id: str):
-        return self._api.products_type(type_id=type_id)
+        return self.fetch("products_type", type_id=type_id)
 
     def products_type_location(self, type_id: str, location_id: str):
-        return self._api.products_type_location(type_id=type_id, location_id=location_id)
+        return self.fetch(
+            "products_type_location", type_id=type_id, location_id=location_id
+        )
 
     def products_type_locations(self, type_id: str):
-        return self._api.products_type_locations(type_id=type_id)
+        return self.fetch("products_type_locations", type_id=type_id)
 
     # Stations & observations -------------------------------------------------
 
     def obs_station(self, station_id: str):
-        return self._api.obs_station(station_id=station_id)
+        return self.fetch("obs_station", station_id=station_id)
 
     def obs_stations(self, **kwargs):
-        return self._api.obs_stations(**kwargs)
+        return self.fetch("obs_stations", **kwargs)
 
     def station_observation_latest(self, station_id: str):
-        return self._api.station_observation_latest(station_id=station_id)
+        return self.fetch("station_observation_latest", station_id=station_id)
 
     def station_observation_list(self, station_id: str, **kwargs):
-        return self._api.station_observation_list(station_id=station_id, **kwargs)
+        return self.fetch("station_observation_list", station_id=station_id, **kwargs)
 
     def station_observation_time(self, station_id: str, time: str):
-        return self._api.station_observation_time(station_id=station_id, time=time)
+        return self.fetch("station_observation_time", station_id=station_id, time=time)
 
     def taf(self, station_id: str, var_date: str, time: str):
-        return self._api.taf(station_id=station_id, var_date=var_date, time=time)
+        return self.fetch("taf", station_id=station_id, var_date=var_date, time=time)
 
     def tafs(self, station_id: str):
-        return self._api.tafs(station_id=station_id)
+        return self.fetch("tafs", station_id=station_id)
 
     # Offices -----------------------------------------------------------------
 
     def office(self, office_id: str):
-        return self._api.office(office_id=office_id)
+        return self.fetch("office", office_id=office_id)
 
     def office_headline(self, office_id: str, headline_id: str):
-        return self._api.office_headline(office_id=office_id, headline_id=headline_id)
+        return self.fetch(
+            "office_headline", office_id=office_id, headline_id=headline_id
+        )
 
     def office_headlines(self, office_id: str):
-        return self._api.office_headlines(office_id=office_id)
+        return self.fetch("office_headlines", office_id=office_id)
 
     # Points ------------------------------------------------------------------
 
     def point(self, latitude: float, longitude: float):
-        return self._api.point(latitude=latitude, longitude=longitude)
+        return self.fetch("point", latitude=latitude, longitude=longitude)
 
     def point_radio(self, latitude: float, longitude: float):
-        return self._api.point_radio(latitude=latitude, longitude=longitude)
+        return self.fetch("point_radio", latitude=latitude, longitude=longitude)
 
     def point_stations(self, latitude: float, longitude: float):
-        return self._api.point_stations(latitude=latitude, longitude=longitude)
+        return self.fetch("point_stations", latitude=latitude, longitude=longitude)
 
     # Radar -------------------------------------------------------------------
 
     def radar_profiler(self, station_id: str):
-        return self._api.radar_profiler(station_id=station_id)
+        return self.fetch("radar_profiler", station_id=station_id)
 
     def radar_queue(self, host: str):
-        return self._api.radar_queue(host=host)
+        return self.fetch("radar_queue", host=host)
 
     def radar_server(self, server_id: str):
-        return self._api.radar_server(id=server_id)
+        return self.fetch("radar_server", id=server_id)
 
     def radar_servers(self):
-        return self._api.radar_servers()
+        return self.fetch("radar_servers")
 
     def radar_station(self, station_id: str):
-        return self._api.radar_station(station_id=station_id)
+        return self.fetch("radar_station", station_id=station_id)
 
     def radar_station_alarms(self, station_id: str):
-        return self._api.radar_station_alarms(station_id=station_id)
+        return self.fetch("radar_station_alarms", station_id=station_id)
 
     def radar_stations(self):
-        return self._api.radar_stations()
+        return self.fetch("radar_stations")
 
     # Satellite thumbnails ----------------------------------------------------
 
     def satellite_thumbnails(self, area: str):
-        return self._api.satellite_thumbnails(area=area)
+        return self.fetch("satellite_thumbnails", area=area)
 
     # Zones -------------------------------------------------------------------
 
-    def zone(self, zone_type: str, zone_id: str):
-        return self._api.zone(type=zone_type, zone_id=zone_id)
+    def zone(self, zone_type: str, zone_id: str, simplify: float | None = None):
+        if simplify:
+            return self.fetch_simplified(
+                "zone", simplify, type=zone_type, zone_id=zone_id
+            )
+        return self.fetch("zone", type=zone_type, zone_id=zone_id)
 
     def zone_forecast(self, zone_type: str, zone_id: str):
-        return self._api.zone_forecast(type=zone_type, zone_id=zone_id)
+        return self.fetch("zone_forecast", type=zone_type, zone_id=zone_id)
 
     def zone_list(self, **kwargs):
-        return self._api.zone_list(**kwargs)
+        return self.fetch("zone_list", **kwargs)
 
     def zone_list_type(self, zone_type: str):
-        return self._api.zone_list_type(type=zone_type)
+        return self.fetch("zone_list_type", type=zone_type)
 
     def zone_obs(self, zone_id: str):
-        return self._api.zone_obs(zone_id=zone_id)
+        return self.fetch("zone_obs", zone_id=zone_id)
 
     def zone_stations(self, zone_id: str):
-        return self._api.zone_stations(zone_id=zone_id)
+        return self.fetch("zone_stations", zone_id=zone_id)
+
+
+def _is_cacheable_client_error(status: int) -> bool:
+    # Timeouts and rate limiting are transient, not properties of the request.
+    return 400 <= status < 500 and status not in (408, 429)
+
+
+def _is_timeout(exc: Exception) -> bool:
+    if isinstance(exc, MaxRetryError):
+        exc = exc.reason
+    return isinstance(exc, (TimeoutError, Urllib3TimeoutError))
 
 
 NOAA_BASE_URL = "https://api.weather.gov"
 
+# urllib3 retries connection and read errors three times by default, each with
+# the full timeout, which would overrun the request budget. Upstream errors
+# are not retried here (the budget decides); redirects are still followed.
+UPSTREAM_RETRIES = Retry(total=3, connect=0, read=0, status=0, other=0, redirect=3)
+
+# Client errors (bad station IDs, unknown zones, out-of-coverage points) are
+# remembered briefly so repeated invalid lookups do not cost upstream quota.
+NOAA_NEGATIVE_CACHE_TTL = float(os.environ.get("NOAA_NEGATIVE_CACHE_TTL", "60"))
+NEGATIVE_KEY_PREFIX = "!"
+
+# Upstream timeout for calls made outside a request (warm-up, pre-fetch).
+# Request-driven calls use the route class budget (see app.admission).
+NOAA_BACKGROUND_TIMEOUT = float(os.environ.get("NOAA_BACKGROUND_TIMEOUT", "30"))
+
+# Record/replay of upstream traffic (see app.recording). Replay takes
+# precedence and never touches the network.
+NOAA_RECORD_PATH = os.environ.get("NOAA_RECORD_PATH")
+NOAA_REPLAY_PATH = os.environ.get("NOAA_REPLAY_PATH")
+NOAA_REPLAY_LATENCY_SCALE = float(os.environ.get("NOAA_REPLAY_LATENCY_SCALE", "0"))
+
+# Response cache backend: none, memory, redis or mmap (see app.cache). Redis
+# and mmap are shared by all uvicorn workers.
+NOAA_CACHE_BACKEND = os.environ.get("NOAA_CACHE_BACKEND", "memory")
+NOAA_REDIS_URL = os.environ.get("NOAA_REDIS_URL", "redis://localhost:6379/0")
+NOAA_CACHE_PATH = os.environ.get("NOAA_CACHE_PATH", "/tmp/noaa-cache.mmap")
+
+# Optional persistent L2 tier beneath the cache backend (disabled when unset).
+NOAA_L2_CACHE_PATH = os.environ.get("NOAA_L2_CACHE_PATH")
+NOAA_L2_CACHE_MAX_BYTES = int(
+    os.environ.get("NOAA_L2_CACHE_MAX_BYTES", str(512 * 1024 * 1024))
+)
+
 
 @lru_cache
 def get_noaa_api() -> DefaultApi:
-    configuration = openapi_client.Configuration(host=NOAA_BASE_URL)
-    api_client = openapi_client.ApiClient(configuration)
-    return DefaultApi(api_client)
+    if NOAA_REPLAY_PATH:
+        return ReplayApi.from_path(
+            NOAA_REPLAY_PATH, latency_scale=NOAA_REPLAY_LATENCY_SCALE
+        )
+
+    # Imported here so the generated models load on first upstream use rather
+    # than at application import (see app.lazy_client).
+    from openapi_client.api.default_api import DefaultApi
+    from openapi_client.api_client import ApiClient
+    from openapi_client.configuration import Configuration
+
+    configuration = Configuration(host=NOAA_BASE_URL)
+    configuration.retries = UPSTREAM_RETRIES
+    api_client = ApiClient(configuration)
+    api = DefaultApi(api_client)
+    if NOAA_RECORD_PATH:
+        return RecordingApi(api, TrafficArchive(NOAA_RECORD_PATH))
+    return api
+
+
+@lru_cache
+def get_cache_backend() -> CacheBackend | None:
+    if NOAA_CACHE_BACKEND == "redis":
+        cache = build_cache_backend("redis", url=NOAA_REDIS_URL)
+    elif NOAA_CACHE_BACKEND == "mmap":
+        cache = build_cache_backend("mmap", path=NOAA_CACHE_PATH)
+    else:
+        cache = build_cache_backend(NOAA_CACHE_BACKEND)
+
+    if cache is not None and NOAA_L2_CACHE_PATH:
+        l2 = SQLiteCache(NOAA_L2_CACHE_PATH, max_bytes=NOAA_L2_CACHE_MAX_BYTES)
+        cache = TieredCache(cache, l2, L2_CACHE_METHODS)
+    return cache
 
 
 @lru_cache
@@ -242,6 +636,6 @@ def get_noaa_repository() -> NOAARepository:
     Use this with `Depends(get_noaa_repository)` in your route functions.
     """
 
-    return NOAARepository(get_noaa_api())
+    return NOAARepository(get_noaa_api(), cache=get_cache_backend())
 
 
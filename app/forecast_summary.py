@@ -0,0 +1,244 @@
+"""
+Daily summaries of the hourly gridpoint forecast.
+
+`summarize` turns the ~156 periods of `/gridpoints/{wfo}/{x},{y}/forecast/hourly`
+into per-day highs/lows, means and maxima with one pandas group-by. Days are
+the forecast office's local calendar days, taken from each period's
+`startTime` offset.
+
+The hourly product carries no precipitation amounts. With
+`precipitation=true` the quantitativePrecipitation layer of the raw gridpoint
+(see `app.gridpoint_layers`) is aligned to the forecast hours and summed per
+day.
+
+Summaries are memoized per gridpoint and options until the forecast's
+`updateTime` changes. `summarize_batch` computes several gridpoints
+concurrently and reports failures per gridpoint.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from app.gridpoint_layers import GridpointDecoder, get_gridpoint_decoder
+from app.recording import to_jsonable
+from app.units import convert, to_system, unit_name
+
+MAX_BATCH = 25
+
+_GRIDPOINT = re.compile(r"^(?P<wfo>[A-Za-z]{3})/(?P<x>\d+),(?P<y>\d+)$")
+
+# Daily aggregate -> (hourly column, reduction)
+DAILY_FIELDS = {
+    "temperatureMax": ("temperature", "max"),
+    "temperatureMin": ("temperature", "min"),
+    "dewpointMean": ("dewpoint", "mean"),
+    "relativeHumidityMean": ("relativeHumidity", "mean"),
+    "probabilityOfPrecipitationMax": ("probabilityOfPrecipitation", "max"),
+    "windSpeedMax": ("windSpeed", "max"),
+}
+
+# Unit of each hourly column after normalization.
+HOURLY_UNITS = {
+    "temperature": "degC",
+    "dewpoint": "degC",
+    "relativeHumidity": "percent",
+    "probabilityOfPrecipitation": "percent",
+    "windSpeed": "km_h-1",
+    "precipitation": "mm",
+}
+
+_LEGACY_UNITS = {"F": "degF", "C": "degC", "mph": "mph", "km/h": "km_h-1"}
+
+
+def parse_gridpoint(spec: str) -> tuple[str, int, int]:
+    """`LWX/96,70` -> `("LWX", 96, 70)`."""
+
+    match = _GRIDPOINT.match(spec.strip())
+    if match is None:
+        raise ValueError(f"invalid gridpoint {spec!r}, expected WFO/x,y")
+    return match["wfo"].upper(), int(match["x"]), int(match["y"])
+
+
+def _quantities(periods: list[dict], name: str, unit: str) -> np.ndarray:
+    """One hourly column in `unit`, from `{unitCode, value}` or bare values."""
+
+    values = np.full(len(periods), np.nan)
+    units = []
+    for index, period in enumerate(periods):
+        item = period.get(name)
+        if isinstance(item, dict):
+            item_unit = unit_name(item.get("unitCode"))
+            item = item.get("value")
+        else:
+            item_unit = _LEGACY_UNITS.get(period.get(f"{name}Unit"), unit)
+        if isinstance(item, (int, float)):
+            values[index] = item
+        units.append(item_unit or unit)
+    for source in set(units) - {unit}:
+        mask = np.array([u == source for u in units])
+        values[mask] = convert(values[mask], source, unit)
+    return values
+
+
+def hourly_frame(payload) -> pd.DataFrame:
+    """Hourly forecast periods as a frame of SI columns plus the local `date`."""
+
+    payload = to_jsonable(payload) or {}
+    properties = payload.get("properties", payload)
+    periods = properties.get("periods") or []
+    # Each period keeps its own UTC offset, so the local date is read from
+    # the parsed value rather than from the text of the timestamp.
+    local_starts = [pd.to_datetime(p.get("startTime"), utc=False) for p in periods]
+
+    frame = pd.DataFrame(
+        {
+            "startTime": pd.to_datetime(pd.Series(local_starts, dtype="object"), utc=True),
+            "date": pd.Series(
+                [None if pd.isna(t) else t.strftime("%Y-%m-%d") for t in local_starts],
+                dtype="object",
+            ),
+            "temperature": _quantities(periods, "temperature", "degC"),
+            "dewpoint": _quantities(periods, "dewpoint", "degC"),
+            "relativeHumidity": _quantities(periods, "relativeHumidity", "percent"),
+            "probabilityOfPrecipitation": _quantities(
+                periods, "probabilityOfPrecipitation", "percent"
+            ),
+        }
+    )
+    # windSpeed is text: "10 mph" or "10 to 15 mph"; keep the upper bound.
+    wind = pd.Series([p.get("windSpeed") for p in periods], dtype="object")
+    if isinstance(next(iter(wind), None), dict):
+        frame["windSpeed"] = _quantities(periods, "windSpeed", "km_h-1")
+    else:
+        parts = wind.str.extract(r"(?:\d+\s+to\s+)?(?P<speed>\d+)\s*(?P<unit>\S+)?")
+        speed = parts["speed"].to_numpy(dtype=float, copy=True)
+        is_mph = (parts["unit"].fillna("mph") == "mph").to_numpy()
+        speed[is_mph] = convert(speed[is_mph], "mph", "km_h-1")
+        frame["windSpeed"] = speed
+    return frame
+
+
+def daily_summary(frame: pd.DataFrame, units: str = "si") -> tuple[list[dict], dict]:
+    """Per-day aggregates and the unit of every aggregate."""
+
+    fields = dict(DAILY_FIELDS)
+    if "precipitation" in frame:
+        fields["precipitationTotal"] = ("precipitation", "sum")
+    grouped = frame.groupby("date", sort=True)
+    daily = pd.DataFrame({"hours": grouped.size()})
+    for name, (column, how) in fields.items():
+        if how == "sum":
+            daily[name] = grouped[column].sum(min_count=1)
+        else:
+            daily[name] = grouped[column].agg(how)
+
+    result_units = {}
+    for name, (column, _) in fields.items():
+        values, unit = to_system(daily[name].to_numpy(), HOURLY_UNITS[column], units)
+        daily[name] = values
+        result_units[name] = unit
+
+    days = []
+    for date, row in daily.iterrows():
+        day = {"date": date, "hours": int(row["hours"])}
+        for name in fields:
+            value = row[name]
+            day[name] = None if pd.isna(value) else round(float(value), 2)
+        days.append(day)
+    return days, result_units
+
+
+class ForecastSummaries:
+    """Daily summaries memoized until the hourly forecast's `updateTime` changes."""
+
+    def __init__(
+        self, decoder: GridpointDecoder | None = None, max_entries: int = 1024
+    ) -> None:
+        self._decoder = decoder
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.computed = 0
+
+    def summarize(
+        self,
+        repo,
+        wfo: str,
+        x: int,
+        y: int,
+        units: str = "si",
+        precipitation: bool = False,
+    ) -> dict:
+        payload = to_jsonable(repo.gridpoint_forecast_hourly(wfo=wfo, x=x, y=y)) or {}
+        properties = payload.get("properties", payload)
+        update_time = properties.get("updateTime")
+        key = (wfo.upper(), x, y, units, precipitation)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and update_time and cached["updateTime"] == update_time:
+                self._entries.move_to_end(key)
+                return cached
+
+        frame = hourly_frame(payload)
+        if precipitation:
+            decoder = self._decoder or get_gridpoint_decoder()
+            decoded = decoder.get(repo, wfo, x, y)
+            if "quantitativePrecipitation" in decoded.layers:
+                qpf = decoded.frame()["quantitativePrecipitation"]
+                hours = frame["startTime"].dt.floor("h")
+                frame["precipitation"] = qpf.reindex(hours).to_numpy()
+            else:
+                frame["precipitation"] = np.nan
+        days, result_units = daily_summary(frame, units)
+        result = {
+            "gridpoint": f"{wfo.upper()}/{x},{y}",
+            "updateTime": update_time,
+            "units": result_units,
+            "days": days,
+        }
+        with self._lock:
+            self.computed += 1
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def summarize_batch(
+        self,
+        repo,
+        gridpoints: list[tuple[str, int, int]],
+        units: str = "si",
+        precipitation: bool = False,
+        concurrency: int = 8,
+    ) -> list[dict]:
+        """Summaries in request order; a failing gridpoint yields an `error` entry."""
+
+        def _one(gridpoint: tuple[str, int, int]) -> dict:
+            try:
+                return self.summarize(repo, *gridpoint, units, precipitation)
+            except Exception as exc:
+                wfo, x, y = gridpoint
+                error = getattr(exc, "reason", None) or str(exc) or type(exc).__name__
+                return {"gridpoint": f"{wfo}/{x},{y}", "error": error}
+
+        if len(gridpoints) <= 1:
+            return [_one(gridpoint) for gridpoint in gridpoints]
+        # Worker threads must see the request context (budget, cancellation).
+        contexts = [contextvars.copy_context() for _ in gridpoints]
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(gridpoints))) as pool:
+            return list(pool.map(lambda c, g: c.run(_one, g), contexts, gridpoints))
+
+
+@lru_cache
+def get_forecast_summaries() -> ForecastSummaries:
+    return ForecastSummaries()
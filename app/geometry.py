@@ -0,0 +1,166 @@
+"""
+Server-side simplification of GeoJSON geometries.
+
+Alert and zone polygons are published at survey resolution, far finer than a
+map can show at low zoom. `simplify_payload` runs Douglas-Peucker over every
+ring and line (the distance computations are vectorized with numpy) and then
+quantizes coordinates to the precision the tolerance can still resolve.
+
+Clients pass either `simplify=<tolerance in degrees>` or `zoom=<web map
+zoom>`; the tolerance is rounded to two significant digits so simplified
+results can be cached per (resource, tolerance) without an unbounded number
+of variants.
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+from fastapi import Query
+
+# Degrees of longitude covered by one 256 px tile at zoom 0.
+_DEGREES_PER_PIXEL_Z0 = 360.0 / 256
+
+MAX_ZOOM = 22
+
+
+def tolerance_for_zoom(zoom: int) -> float:
+    """Simplification tolerance (degrees) of about one pixel at `zoom`."""
+
+    return _DEGREES_PER_PIXEL_Z0 / (1 << zoom)
+
+
+def canonical_tolerance(tolerance: float) -> float:
+    return float(f"{tolerance:.2g}")
+
+
+def _decimals(tolerance: float) -> int:
+    # One digit finer than the tolerance, capped at ~1 cm.
+    return min(7, max(0, math.ceil(-math.log10(tolerance)) + 1))
+
+
+def _distances(points: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    segment = end - start
+    offsets = points - start
+    length = math.hypot(segment[0], segment[1])
+    if length == 0.0:
+        return np.hypot(offsets[:, 0], offsets[:, 1])
+    return np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+
+
+def simplify_line(coords: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker over an `(n, 2+)` coordinate array."""
+
+    count = len(coords)
+    if count < 3:
+        return coords
+    xy = coords[:, :2]
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _distances(xy[first + 1:last], xy[first], xy[last])
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            index += first + 1
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return coords[keep]
+
+
+def _quantize(coords: np.ndarray, decimals: int) -> np.ndarray:
+    coords = np.round(coords, decimals)
+    if len(coords) < 2:
+        return coords
+    changed = np.any(coords[1:] != coords[:-1], axis=1)
+    return coords[np.concatenate(([True], changed))]
+
+
+def _line(coords: list, tolerance: float, decimals: int) -> list:
+    array = np.asarray(coords, dtype=float)
+    if array.ndim != 2 or len(array) < 3:
+        return coords
+    simplified = _quantize(simplify_line(array, tolerance), decimals)
+    return simplified.tolist() if len(simplified) >= 2 else coords
+
+
+def _polygon(rings: list, tolerance: float, decimals: int) -> list:
+    result = []
+    for position, ring in enumerate(rings):
+        array = np.asarray(ring, dtype=float)
+        if array.ndim != 2 or len(array) < 4:
+            result.append(ring)
+            continue
+        simplified = _quantize(simplify_line(array, tolerance), decimals)
+        if len(simplified) >= 4:
+            result.append(simplified.tolist())
+        elif position == 0:
+            # Never lose the outer boundary; holes below tolerance are dropped.
+            result.append(_quantize(array, decimals).tolist())
+    return result
+
+
+def simplify_geometry(geometry: dict | None, tolerance: float) -> dict | None:
+    if not isinstance(geometry, dict):
+        return geometry
+    decimals = _decimals(tolerance)
+    kind = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if kind == "GeometryCollection":
+        return {
+            **geometry,
+            "geometries": [
+                simplify_geometry(part, tolerance)
+                for part in geometry.get("geometries") or []
+            ],
+        }
+    if coords is None:
+        return geometry
+    if kind == "Polygon":
+        coords = _polygon(coords, tolerance, decimals)
+    elif kind == "MultiPolygon":
+        coords = [_polygon(polygon, tolerance, decimals) for polygon in coords]
+    elif kind == "LineString":
+        coords = _line(coords, tolerance, decimals)
+    elif kind == "MultiLineString":
+        coords = [_line(line, tolerance, decimals) for line in coords]
+    elif kind == "Point":
+        coords = [round(value, decimals) for value in coords]
+    elif kind == "MultiPoint":
+        coords = np.round(np.asarray(coords, dtype=float), decimals).tolist()
+    return {**geometry, "coordinates": coords}
+
+
+def simplify_payload(payload, tolerance: float):
+    """Simplify the geometry of a Feature or of every member of a FeatureCollection."""
+
+    if not isinstance(payload, dict):
+        return payload
+    if isinstance(payload.get("features"), list):
+        return {
+            **payload,
+            "features": [simplify_payload(f, tolerance) for f in payload["features"]],
+        }
+    if isinstance(payload.get("geometry"), dict):
+        return {**payload, "geometry": simplify_geometry(payload["geometry"], tolerance)}
+    return payload
+
+
+def get_simplify_tolerance(
+    simplify: float | None = Query(
+        None, gt=0, le=1, description="Simplification tolerance in degrees."
+    ),
+    zoom: int | None = Query(
+        None, ge=0, le=MAX_ZOOM, description="Simplify for display at this map zoom."
+    ),
+) -> float | None:
+    if simplify is not None:
+        return canonical_tolerance(simplify)
+    if zoom is not None:
+        return canonical_tolerance(tolerance_for_zoom(zoom))
+    return None
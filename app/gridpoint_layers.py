@@ -0,0 +1,216 @@
+"""
+Decoding of raw gridpoint data layers onto an hourly time grid.
+
+`/gridpoints/{wfo}/{x},{y}` publishes every forecast element (temperature,
+dewpoint, skyCover, quantitativePrecipitation, ...) as a list of
+`{"validTime": "<start>/<ISO 8601 duration>", "value": ...}` intervals.
+`decode_gridpoint` parses all intervals of a layer at once with pandas and
+expands them onto one shared hourly grid with NumPy, giving aligned float
+arrays (NaN where a layer has no value).
+
+Accumulations (precipitation, snowfall, ice) are spread evenly over the hours
+of their interval so that summing the hourly grid preserves totals; every
+other element holds its value for each hour of the interval.
+
+Decoded gridpoints are cached per gridpoint and reused until the upstream
+`updateTime` changes.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from app.recording import to_jsonable
+from app.units import to_system, unit_name
+
+ACCUMULATED_LAYERS = frozenset(
+    {"quantitativePrecipitation", "snowfallAmount", "iceAccumulation"}
+)
+
+_HOUR = np.timedelta64(1, "h")
+_DURATION = r"^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?)?$"
+
+
+def parse_valid_times(valid_times) -> tuple[np.ndarray, np.ndarray]:
+    """`<start>/<duration>` strings as (start hours, whole-hour lengths) arrays."""
+
+    parts = pd.Series(valid_times, dtype="object").str.split("/", n=1, expand=True)
+    if parts.empty:
+        empty = np.array([], dtype="datetime64[h]")
+        return empty, np.array([], dtype=np.int64)
+    starts = pd.to_datetime(parts[0], utc=True).dt.tz_convert(None)
+    starts = starts.to_numpy("datetime64[ns]").astype("datetime64[h]")
+    durations = parts[1].str.extract(_DURATION).fillna(0).astype(np.int64)
+    hours = durations["days"] * 24 + durations["hours"] + -(-durations["minutes"] // 60)
+    return starts, np.maximum(hours.to_numpy(), 1)
+
+
+def expand_intervals(
+    grid_start: np.datetime64,
+    size: int,
+    starts: np.ndarray,
+    hours: np.ndarray,
+    values: np.ndarray,
+    spread: bool = False,
+) -> np.ndarray:
+    """Lay interval values onto an hourly grid of `size` hours from `grid_start`."""
+
+    grid = np.full(size, np.nan)
+    if not len(starts):
+        return grid
+    offsets = ((starts - grid_start) // _HOUR).astype(np.int64)
+    if spread:
+        values = values / hours
+    total = int(hours.sum())
+    first = np.repeat(np.cumsum(hours) - hours, hours)
+    index = np.repeat(offsets, hours) + (np.arange(total) - first)
+    filled = np.repeat(values, hours)
+    inside = (index >= 0) & (index < size)
+    grid[index[inside]] = filled[inside]
+    return grid
+
+
+@dataclass
+class DecodedGridpoint:
+    update_time: str | None
+    times: np.ndarray  # datetime64[h], UTC
+    layers: dict[str, np.ndarray]
+    units: dict[str, str | None]
+
+    def frame(self, layers: list[str] | None = None) -> pd.DataFrame:
+        names = self.layers if layers is None else layers
+        index = pd.DatetimeIndex(self.times.astype("datetime64[ns]"), tz="UTC")
+        return pd.DataFrame({name: self.layers[name] for name in names}, index=index)
+
+
+def _is_numeric_layer(layer) -> bool:
+    if not isinstance(layer, dict) or not isinstance(layer.get("values"), list):
+        return False
+    return all(
+        item.get("value") is None or isinstance(item.get("value"), (int, float))
+        for item in layer["values"]
+    )
+
+
+def decode_gridpoint(payload) -> DecodedGridpoint:
+    """Decode every numeric layer of a gridpoint response."""
+
+    payload = to_jsonable(payload) or {}
+    properties = payload.get("properties", payload)
+    raw = {
+        name: layer for name, layer in properties.items() if _is_numeric_layer(layer)
+    }
+    parsed = {
+        name: parse_valid_times([item["validTime"] for item in layer["values"]])
+        for name, layer in raw.items()
+    }
+
+    spans = [(s.min(), (s + h * _HOUR).max()) for s, h in parsed.values() if len(s)]
+    if not spans:
+        return DecodedGridpoint(
+            properties.get("updateTime"), np.array([], dtype="datetime64[h]"), {}, {}
+        )
+    grid_start = min(start for start, _ in spans)
+    size = int((max(end for _, end in spans) - grid_start) // _HOUR)
+
+    layers = {}
+    for name, (starts, hours) in parsed.items():
+        values = np.array(
+            [item["value"] for item in raw[name]["values"]], dtype=float
+        )
+        layers[name] = expand_intervals(
+            grid_start, size, starts, hours, values, spread=name in ACCUMULATED_LAYERS
+        )
+    return DecodedGridpoint(
+        update_time=properties.get("updateTime"),
+        times=grid_start + np.arange(size) * _HOUR,
+        layers=layers,
+        units={name: unit_name(layer.get("uom")) for name, layer in raw.items()},
+    )
+
+
+def _utc(value) -> pd.Timestamp:
+    stamp = pd.Timestamp(value)
+    return stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")
+
+
+def select(
+    decoded: DecodedGridpoint,
+    layers: list[str] | None = None,
+    units: str = "si",
+    freq: str | None = None,
+    how: str = "mean",
+    start=None,
+    end=None,
+) -> dict:
+    """Column-oriented JSON view of (a subset of) a decoded gridpoint."""
+
+    unknown = sorted(set(layers or ()) - decoded.layers.keys())
+    if unknown:
+        raise KeyError(f"unknown layers: {unknown}")
+    frame = decoded.frame(layers)
+    if start is not None:
+        frame = frame[frame.index >= _utc(start)]
+    if end is not None:
+        frame = frame[frame.index <= _utc(end)]
+    if freq and len(frame.columns):
+        # Accumulations are totals over the period whatever `how` says.
+        resampled = frame.resample(freq)
+        agg = {
+            name: "sum" if name in ACCUMULATED_LAYERS else how for name in frame.columns
+        }
+        frame = resampled.agg(agg).where(resampled.count() > 0)
+
+    result_units = {}
+    columns = {}
+    for name in frame.columns:
+        values, unit = to_system(frame[name].to_numpy(), decoded.units.get(name), units)
+        result_units[name] = unit
+        columns[name] = [None if np.isnan(v) else round(float(v), 3) for v in values]
+    return {
+        "updateTime": decoded.update_time,
+        "validTimes": [stamp.isoformat() for stamp in frame.index],
+        "units": result_units,
+        "layers": columns,
+    }
+
+
+class GridpointDecoder:
+    """Decoded gridpoints, reused while their `updateTime` is unchanged."""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple, DecodedGridpoint] = OrderedDict()
+        self._lock = threading.Lock()
+        self.decoded = 0
+
+    def get(self, repo, wfo: str, x: int, y: int) -> DecodedGridpoint:
+        payload = to_jsonable(repo.gridpoint(wfo=wfo, x=x, y=y))
+        properties = (payload or {}).get("properties", payload) or {}
+        key = (wfo.upper(), x, y)
+        update_time = properties.get("updateTime")
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and update_time and cached.update_time == update_time:
+                self._entries.move_to_end(key)
+                return cached
+
+        decoded = decode_gridpoint(payload)
+        with self._lock:
+            self.decoded += 1
+            self._entries[key] = decoded
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return decoded
+
+
+@lru_cache
+def get_gridpoint_decoder() -> GridpointDecoder:
+    return GridpointDecoder()
@@ -0,0 +1,256 @@
+"""
+Content-addressed cache of forecast icons.
+
+An icon is fully determined by its set, time of day, condition(s) and size,
+so each one is generated upstream once and then served from disk:
+
+    <root>/objects/ab/ab12...    icon bytes, named by their SHA-256
+    <root>/keys/3f/3f9a....json  icon parameters -> {"digest", "media_type"}
+
+Icons that render identically share one object. Objects and key entries are
+written to a temporary file and renamed into place, so concurrent workers
+(and several processes sharing `NOAA_ICON_CACHE`) never read a partial file.
+Nothing expires: a given set of parameters always yields the same image.
+
+Frequently used icons are also kept in memory, up to `NOAA_ICON_MEMORY_BYTES`:
+an icon is read into memory on its `PROMOTE_AFTER`-th disk hit, if it fits.
+Other disk hits are sent as file responses without loading the image into
+Python. The digest is the strong ETag of the response.
+
+`pregenerate` fetches the common single-condition icons at start-up.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import product
+from pathlib import Path
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+NOAA_ICON_CACHE = os.environ.get(
+    "NOAA_ICON_CACHE", os.path.join(tempfile.gettempdir(), "noaa-icons")
+)
+NOAA_ICON_MEMORY_BYTES = int(os.environ.get("NOAA_ICON_MEMORY_BYTES", str(8 * 1024 * 1024)))
+NOAA_ICON_PREGENERATE = os.environ.get("NOAA_ICON_PREGENERATE", "1") != "0"
+
+ICON_CACHE_CONTROL = "public, max-age=2592000, immutable"
+PROMOTE_AFTER = 2
+
+# Conditions of the NWS "land" icon set used by forecast periods.
+COMMON_CONDITIONS = (
+    "skc", "few", "sct", "bkn", "ovc",
+    "wind_skc", "wind_few", "wind_sct", "wind_bkn", "wind_ovc",
+    "snow", "rain_snow", "rain_sleet", "snow_sleet", "fzra", "rain_fzra",
+    "snow_fzra", "sleet", "rain", "rain_showers", "rain_showers_hi",
+    "tsra", "tsra_sct", "tsra_hi", "tornado", "hurricane", "tropical_storm",
+    "dust", "smoke", "haze", "hot", "cold", "blizzard", "fog",
+)
+COMMON_ICONS = [
+    ("land", time_of_day, condition, None)
+    for time_of_day, condition in product(("day", "night"), COMMON_CONDITIONS)
+]
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+)
+
+
+def media_type(content: bytes) -> str:
+    for signature, name in _SIGNATURES:
+        if content.startswith(signature):
+            return name
+    if content[8:12] == b"WEBP":
+        return "image/webp"
+    if content.lstrip()[:5] in (b"<?xml", b"<svg "):
+        return "image/svg+xml"
+    return "application/octet-stream"
+
+
+def icon_bytes(payload) -> bytes | None:
+    """The image in an upstream payload, or None when it is not binary."""
+
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return bytes(payload)
+    data = getattr(payload, "data", None)  # urllib3 / RESTResponse
+    return bytes(data) if isinstance(data, (bytes, bytearray)) else None
+
+
+def icon_key(
+    icon_set: str,
+    time_of_day: str,
+    first: str,
+    second: str | None = None,
+    size: str | None = None,
+    fontsize: int | None = None,
+) -> tuple:
+    return (icon_set, time_of_day, first, second, size, fontsize)
+
+
+@dataclass(frozen=True)
+class Icon:
+    digest: str
+    media_type: str
+    path: Path
+    content: bytes | None = None  # set when served from memory
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class IconCache:
+    """Icons on disk by content digest, with a byte-bounded in-memory tier."""
+
+    def __init__(self, root: str, memory_bytes: int = NOAA_ICON_MEMORY_BYTES) -> None:
+        self.root = Path(root)
+        self._memory_bytes = memory_bytes
+        self._hot: OrderedDict[tuple, Icon] = OrderedDict()
+        self._hot_size = 0
+        self._disk_hits: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self.generated = 0
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def _key_path(self, key: tuple) -> Path:
+        name = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+        return self.root / "keys" / name[:2] / f"{name}.json"
+
+    def _remember(self, key: tuple, icon: Icon) -> Icon:
+        with self._lock:
+            previous = self._hot.pop(key, None)
+            if previous is not None:
+                self._hot_size -= len(previous.content)
+            if len(icon.content) <= self._memory_bytes:
+                self._hot[key] = icon
+                self._hot_size += len(icon.content)
+            while self._hot_size > self._memory_bytes:
+                _, evicted = self._hot.popitem(last=False)
+                self._hot_size -= len(evicted.content)
+        return icon
+
+    def get(self, key: tuple) -> Icon | None:
+        """The cached icon, from memory or disk; None if never generated."""
+
+        with self._lock:
+            icon = self._hot.get(key)
+            if icon is not None:
+                self._hot.move_to_end(key)
+                return icon
+        try:
+            entry = json.loads(self._key_path(key).read_text())
+        except (OSError, ValueError):
+            return None
+        path = self._object_path(entry["digest"])
+        if not path.is_file():
+            return None
+        icon = Icon(entry["digest"], entry["media_type"], path)
+        if self._should_promote(key, path):
+            # This hit is still served from the file; later ones from memory.
+            self._remember(key, Icon(icon.digest, icon.media_type, path, path.read_bytes()))
+        return icon
+
+    def _should_promote(self, key: tuple, path: Path) -> bool:
+        with self._lock:
+            hits = self._disk_hits.get(key, 0) + 1
+            if hits < PROMOTE_AFTER:
+                if len(self._disk_hits) >= 100_000:
+                    self._disk_hits.clear()
+                self._disk_hits[key] = hits
+                return False
+            self._disk_hits.pop(key, None)
+        try:
+            return path.stat().st_size <= self._memory_bytes
+        except OSError:
+            return False
+
+    def put(self, key: tuple, content: bytes) -> Icon:
+        digest = hashlib.sha256(content).hexdigest()
+        icon = Icon(digest, media_type(content), self._object_path(digest), content)
+        if not icon.path.is_file():
+            _write_atomic(icon.path, content)
+        entry = {"digest": digest, "media_type": icon.media_type, "key": list(key)}
+        _write_atomic(self._key_path(key), json.dumps(entry).encode("utf-8"))
+        with self._lock:
+            self.generated += 1
+        return self._remember(key, icon)
+
+    def get_or_generate(self, key: tuple, generate: Callable[[], object]):
+        """The cached icon, or the result of `generate()` stored as one.
+
+        Returns the upstream payload unchanged when it is not binary.
+        """
+
+        icon = self.get(key)
+        if icon is not None:
+            return icon
+        payload = generate()
+        content = icon_bytes(payload)
+        return payload if content is None else self.put(key, content)
+
+    def pregenerate(
+        self, repo, icons: Iterable[tuple] = COMMON_ICONS, concurrency: int = 4
+    ) -> dict:
+        """Make sure every `(set, time_of_day, first, second)` icon is cached."""
+
+        def _one(icon: tuple) -> bool:
+            icon_set, time_of_day, first, second = icon
+            key = icon_key(icon_set, time_of_day, first, second)
+            if second is None:
+                generate = lambda: repo.icons(  # noqa: E731
+                    icon_set=icon_set, time_of_day=time_of_day, first=first
+                )
+            else:
+                generate = lambda: repo.icons_dual_condition(  # noqa: E731
+                    icon_set=icon_set, time_of_day=time_of_day, first=first, second=second
+                )
+            try:
+                return isinstance(self.get_or_generate(key, generate), Icon)
+            except Exception:
+                logger.warning("icon pre-generation failed for %s", icon, exc_info=True)
+                return False
+
+        icons = list(icons)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            cached = sum(pool.map(_one, icons))
+        return {"icons": len(icons), "cached": cached}
+
+
+def start_pregeneration(repo, cache: IconCache) -> threading.Thread:
+    def _run() -> None:
+        logger.info("icon pre-generation finished: %s", cache.pregenerate(repo))
+
+    thread = threading.Thread(target=_run, name="noaa-icons", daemon=True)
+    thread.start()
+    return thread
+
+
+@lru_cache
+def get_icon_cache() -> IconCache:
+    return IconCache(NOAA_ICON_CACHE)
@@ -0,0 +1,52 @@
+"""
+Deferred loading of the generated `openapi_client` package.
+
+The generated package `__init__` eagerly imports every model module, which
+dominates worker start-up time and resident memory. `defer_package_init`
+registers the package without running its `__init__`, so light submodules
+such as `openapi_client.exceptions` can be imported on their own; the full
+package (and its models) is only loaded the first time a top-level name is
+accessed or `DefaultApi` is constructed for an upstream call.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+CLIENT_PACKAGE = "openapi_client"
+
+
+def defer_package_init(name: str = CLIENT_PACKAGE) -> ModuleType | None:
+    """
+    Register `name` in `sys.modules` with its `__init__` left unexecuted.
+
+    Returns the placeholder module, the already-imported module, or `None` if
+    the package cannot be found (normal import errors then surface on use).
+    """
+
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None or spec.submodule_search_locations is None:
+        return None
+
+    module = importlib.util.module_from_spec(spec)
+
+    def __getattr__(attr: str):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        # `from openapi_client import rest` resolves submodules without
+        # paying for the whole package.
+        if importlib.util.find_spec(f"{name}.{attr}") is not None:
+            return importlib.import_module(f"{name}.{attr}")
+        del module.__dict__["__getattr__"]
+        spec.loader.exec_module(module)
+        return getattr(module, attr)
+
+    module.__getattr__ = __getattr__
+    sys.modules[name] = module
+    return module
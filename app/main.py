@@ -1,8 +1,74 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.admission import AdmissionControl, size_threadpool
+from app.alert_archive import ArchiveUnavailable
 from app.api_routes import router as api_router
+from app.domain_noaa_repository import get_cache_backend, get_noaa_repository
+from app.icon_cache import NOAA_ICON_PREGENERATE, get_icon_cache, start_pregeneration
+from app.observation_store import get_observation_poller
+from app.recording import NotRecorded
+from app.request_context import DeadlineExceeded, RequestCancelled
+from app.warmup import PrefetchScheduler, load_warmup_targets, start_warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Every route class at its concurrency limit must still leave threads free.
+    size_threadpool()
+    # Load the persistent L2 cache so restarted workers come up warm.
+    cache = get_cache_backend()
+    if cache is not None:
+        cache.warm()
 
+    # Pre-fetch the warm-up list in the background; /ready flips once done.
+    repo = get_noaa_repository()
+    start_warmup(repo, load_warmup_targets())
+    scheduler = PrefetchScheduler(repo)
+    scheduler.start()
+    # Generate the common forecast icons so first requests hit the icon cache.
+    if NOAA_ICON_PREGENERATE:
+        start_pregeneration(repo, get_icon_cache())
+    # Keep the local observation store up to date, if one is configured.
+    poller = get_observation_poller()
+    if poller is not None:
+        poller.start()
+    yield
+    scheduler.stop()
+    if poller is not None:
+        poller.stop()
 
-app = FastAPI(title="NOAA API wrapper", version="0.1.0")
+
+app = FastAPI(title="NOAA API wrapper", version="0.1.0", lifespan=lifespan)
+app.add_middleware(AdmissionControl)
 app.include_router(api_router)
 
+
+@app.exception_handler(DeadlineExceeded)
+def deadline_exceeded(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(
+        {"detail": f"upstream did not answer within the {exc} latency budget"},
+        status_code=504,
+    )
+
+
+@app.exception_handler(ArchiveUnavailable)
+def archive_unavailable(request: Request, exc: ArchiveUnavailable):
+    return JSONResponse({"detail": str(exc)}, status_code=503)
+
+
+@app.exception_handler(NotRecorded)
+def not_recorded(request: Request, exc: NotRecorded):
+    # Replay mode (NOAA_REPLAY_PATH): the archive has no answer for this call.
+    return JSONResponse(
+        {"detail": "upstream call missing from the replay recording", "key": exc.key},
+        status_code=503,
+    )
+
+
+@app.exception_handler(RequestCancelled)
+def request_cancelled(request: Request, exc: RequestCancelled):
+    # Client closed the request (nginx convention); nobody reads this body.
+    return JSONResponse({"detail": "client disconnected"}, status_code=499)
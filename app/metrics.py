@@ -0,0 +1,160 @@
+"""
+Minimal in-process metrics registry with Prometheus text exposition.
+
+Kept dependency-free on purpose; `render` is served at `/metrics`. With
+several uvicorn workers each worker reports its own series.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {value}"
+            for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        with self._lock:
+            series = self._series.setdefault(labels, [[0] * len(self.buckets), 0.0, 0])
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted((labels, (list(b), s, c)) for labels, (b, s, c) in self._series.items())
+        for labels, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                le = _labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Request budgets and upstream calls -------------------------------------------
+
+route_budget_seconds = registry.register(
+    Gauge("noaa_route_budget_seconds", "Configured latency budget per route class.",
+          ("route_class",))
+)
+upstream_request_seconds = registry.register(
+    Histogram("noaa_upstream_request_seconds", "Upstream DefaultApi call latency.",
+              ("route_class", "method"))
+)
+upstream_timeouts_total = registry.register(
+    Counter("noaa_upstream_timeouts_total",
+            "Upstream calls that ran out of request budget.", ("route_class", "method"))
+)
+requests_cancelled_total = registry.register(
+    Counter("noaa_requests_cancelled_total",
+            "Upstream calls skipped because the client disconnected.", ("route_class",))
+)
+budget_remaining_seconds = registry.register(
+    Histogram("noaa_budget_remaining_seconds",
+              "Request budget left when a response completed.", ("route_class",))
+)
+admission_rejected_total = registry.register(
+    Counter("noaa_admission_rejected_total", "Requests shed by admission control.",
+            ("route_class", "reason"))
+)
+negative_cache_hits_total = registry.register(
+    Counter("noaa_negative_cache_hits_total",
+            "Upstream client errors answered from the negative cache.",
+            ("method", "status"))
+)
+
+# Cache ------------------------------------------------------------------------
+
+cache_oversize_total = registry.register(
+    Counter("noaa_cache_oversize_total",
+            "Entries too large for an mmap cache slot, spilled or not cached.",
+            ("outcome",))
+)
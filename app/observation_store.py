@@ -0,0 +1,408 @@
+"""
+Local columnar store of station observations.
+
+Observations are kept per station and UTC day as column files under
+`NOAA_OBSERVATION_STORE`:
+
+    <root>/station=KDCA/date=2024-05-01/part.parquet
+
+Partitions are written as Parquet when a Parquet engine (pyarrow or
+fastparquet) is installed and as compressed NumPy archives (`part.npz`)
+otherwise; both are read back. Every write replaces a whole partition
+atomically, so readers never see a half-written day.
+
+`ObservationPoller` appends new observations for the tracked stations in the
+background (`NOAA_OBSERVATION_STATIONS`, plus every station queried through
+the history endpoints), asking upstream only for what is newer than the
+station's latest stored observation. A new station starts with the last
+`NOAA_OBSERVATION_INITIAL_HOURS` of history. A station whose first poll fails
+is dropped again, and at most `NOAA_OBSERVATION_MAX_STATIONS` are tracked. Time-range queries, resampling and
+aggregates are then answered from the store without touching upstream.
+
+Values are stored in the units api.weather.gov reports them in (degC, km/h,
+Pa, m, percent, mm).
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import logging
+import os
+import tempfile
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from app.domain_noaa_repository import NOAARepository, get_noaa_repository
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_COLUMNS = (
+    "temperature",
+    "dewpoint",
+    "windDirection",
+    "windSpeed",
+    "windGust",
+    "barometricPressure",
+    "seaLevelPressure",
+    "visibility",
+    "relativeHumidity",
+    "windChill",
+    "heatIndex",
+    "precipitationLastHour",
+)
+TEXT_COLUMNS = ("textDescription",)
+COLUMNS = ("timestamp", *NUMERIC_COLUMNS, *TEXT_COLUMNS)
+
+AGGREGATIONS = ("mean", "min", "max", "sum", "median", "first", "last", "count")
+
+NOAA_OBSERVATION_STORE = os.environ.get("NOAA_OBSERVATION_STORE")
+NOAA_OBSERVATION_STATIONS = os.environ.get("NOAA_OBSERVATION_STATIONS", "")
+NOAA_OBSERVATION_POLL_INTERVAL = float(
+    os.environ.get("NOAA_OBSERVATION_POLL_INTERVAL", "300")
+)
+NOAA_OBSERVATION_MAX_STATIONS = int(os.environ.get("NOAA_OBSERVATION_MAX_STATIONS", "200"))
+# History loaded when a station is first tracked.
+NOAA_OBSERVATION_INITIAL_HOURS = float(
+    os.environ.get("NOAA_OBSERVATION_INITIAL_HOURS", "72")
+)
+INITIAL_SYNC_MAX_PAGES = 5
+
+_PARQUET = any(
+    importlib.util.find_spec(engine) is not None for engine in ("pyarrow", "fastparquet")
+)
+
+
+def observations_frame(pages: Iterable[dict]) -> pd.DataFrame:
+    """Observation collection pages as one frame, sorted by timestamp."""
+
+    properties = [
+        feature.get("properties") or {}
+        for page in pages
+        for feature in page.get("features") or []
+    ]
+    columns = {"timestamp": [p.get("timestamp") for p in properties]}
+    for name in NUMERIC_COLUMNS:
+        columns[name] = [(p.get(name) or {}).get("value") for p in properties]
+    for name in TEXT_COLUMNS:
+        columns[name] = [p.get(name) for p in properties]
+
+    frame = pd.DataFrame(columns)
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True, errors="coerce")
+    frame[list(NUMERIC_COLUMNS)] = frame[list(NUMERIC_COLUMNS)].astype("float64")
+    frame = frame.dropna(subset=["timestamp"])
+    return frame.sort_values("timestamp", ignore_index=True)
+
+
+def _utc(value: datetime | None) -> pd.Timestamp | None:
+    if value is None:
+        return None
+    stamp = pd.Timestamp(value)
+    return stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")
+
+
+def _merge(existing: pd.DataFrame | None, new: pd.DataFrame) -> pd.DataFrame:
+    merged = new if existing is None else pd.concat([existing, new], ignore_index=True)
+    merged = merged.drop_duplicates("timestamp", keep="last")
+    return merged.sort_values("timestamp", ignore_index=True)
+
+
+class ObservationStore:
+    """Per-station, per-day observation partitions on local disk."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._latest: dict[str, pd.Timestamp] = {}
+
+    # Partitions -------------------------------------------------------------
+
+    def _station_dir(self, station_id: str) -> Path:
+        return self.root / f"station={station_id.upper()}"
+
+    def _partitions(self, station_id: str) -> list[tuple[str, Path]]:
+        station_dir = self._station_dir(station_id)
+        if not station_dir.is_dir():
+            return []
+        return sorted(
+            (path.name.partition("=")[2], path)
+            for path in station_dir.iterdir()
+            if path.name.startswith("date=")
+        )
+
+    @staticmethod
+    def _read(partition: Path) -> pd.DataFrame | None:
+        if (partition / "part.parquet").exists():
+            return pd.read_parquet(partition / "part.parquet")
+        if not (partition / "part.npz").exists():
+            return None
+        with np.load(partition / "part.npz", allow_pickle=False) as archive:
+            frame = pd.DataFrame({name: archive[name] for name in COLUMNS})
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], unit="ns", utc=True)
+        for name in TEXT_COLUMNS:
+            frame[name] = frame[name].replace("", None)
+        return frame
+
+    @staticmethod
+    def _write(partition: Path, frame: pd.DataFrame) -> None:
+        partition.mkdir(parents=True, exist_ok=True)
+        if _PARQUET:
+            target = partition / "part.parquet"
+            buffer = io.BytesIO()
+            frame.to_parquet(buffer, index=False)
+        else:
+            target = partition / "part.npz"
+            arrays = {name: frame[name].to_numpy("float64") for name in NUMERIC_COLUMNS}
+            timestamps = frame["timestamp"].dt.tz_convert(None)
+            arrays["timestamp"] = timestamps.to_numpy("datetime64[ns]").view("int64")
+            for name in TEXT_COLUMNS:
+                arrays[name] = frame[name].fillna("").to_numpy(str)
+            buffer = io.BytesIO()
+            np.savez_compressed(buffer, **arrays)
+        # A unique temporary name per write: concurrent writers of the same
+        # partition (several workers) never share a half-written file.
+        fd, temporary = tempfile.mkstemp(dir=partition, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(buffer.getbuffer())
+            os.replace(temporary, target)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    # Writes -----------------------------------------------------------------
+
+    def stations(self) -> list[str]:
+        return sorted(
+            path.name.partition("=")[2]
+            for path in self.root.iterdir()
+            if path.name.startswith("station=")
+        )
+
+    def latest(self, station_id: str) -> pd.Timestamp | None:
+        """Timestamp of the newest stored observation of a station."""
+
+        station_id = station_id.upper()
+        if station_id not in self._latest:
+            for _, partition in reversed(self._partitions(station_id)):
+                frame = self._read(partition)
+                if frame is not None and len(frame):
+                    self._latest[station_id] = frame["timestamp"].max()
+                    break
+        return self._latest.get(station_id)
+
+    def append(self, station_id: str, frame: pd.DataFrame) -> int:
+        """Merge observations into their day partitions; returns rows added."""
+
+        if frame.empty:
+            return 0
+        station_id = station_id.upper()
+        added = 0
+        with self._lock:
+            for day, rows in frame.groupby(frame["timestamp"].dt.strftime("%Y-%m-%d")):
+                partition = self._station_dir(station_id) / f"date={day}"
+                existing = self._read(partition)
+                merged = _merge(existing, rows[list(COLUMNS)])
+                self._write(partition, merged)
+                added += len(merged) - (0 if existing is None else len(existing))
+            newest = frame["timestamp"].max()
+            if station_id not in self._latest or newest > self._latest[station_id]:
+                self._latest[station_id] = newest
+        return added
+
+    # Reads ------------------------------------------------------------------
+
+    def query(
+        self,
+        station_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """Observations in `[start, end]`, reading only the partitions needed."""
+
+        start, end = _utc(start), _utc(end)
+        first_day = None if start is None else start.strftime("%Y-%m-%d")
+        last_day = None if end is None else end.strftime("%Y-%m-%d")
+
+        frames = []
+        for day, partition in self._partitions(station_id):
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            frame = self._read(partition)
+            if frame is not None:
+                frames.append(frame)
+        if not frames:
+            frame = observations_frame([])
+        else:
+            frame = pd.concat(frames, ignore_index=True)
+
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= (frame["timestamp"] >= start).to_numpy()
+        if end is not None:
+            mask &= (frame["timestamp"] <= end).to_numpy()
+        frame = frame[mask]
+        if columns:
+            frame = frame[["timestamp", *[c for c in columns if c != "timestamp"]]]
+        return frame.reset_index(drop=True)
+
+    def resample(
+        self,
+        station_id: str,
+        freq: str,
+        how: str = "mean",
+        start: datetime | None = None,
+        end: datetime | None = None,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        frame = self.query(station_id, start, end, columns or list(NUMERIC_COLUMNS))
+        numeric = frame.set_index("timestamp").select_dtypes("number")
+        return numeric.resample(freq).agg(how).reset_index()
+
+    def aggregate(
+        self,
+        station_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        columns: list[str] | None = None,
+        how: Iterable[str] = ("min", "max", "mean", "count"),
+    ) -> dict[str, dict[str, float | None]]:
+        frame = self.query(station_id, start, end, columns or list(NUMERIC_COLUMNS))
+        summary = frame.drop(columns="timestamp").select_dtypes("number").agg(list(how))
+        return {
+            column: {
+                name: (None if pd.isna(value) else float(value))
+                for name, value in summary[column].items()
+            }
+            for column in summary.columns
+        }
+
+
+def frame_records(frame: pd.DataFrame) -> list[dict]:
+    """JSON-ready rows (ISO timestamps, NaN as null)."""
+
+    records = frame.astype(object).where(frame.notna(), None).to_dict("records")
+    for record in records:
+        if record.get("timestamp") is not None:
+            record["timestamp"] = record["timestamp"].isoformat()
+    return records
+
+
+class TrackingLimitReached(Exception):
+    """The poller already tracks its maximum number of stations."""
+
+
+class ObservationPoller:
+    """Background thread appending new observations of the tracked stations."""
+
+    def __init__(
+        self,
+        repo: NOAARepository,
+        store: ObservationStore,
+        stations: Iterable[str] = (),
+        interval: float = NOAA_OBSERVATION_POLL_INTERVAL,
+        max_stations: int = NOAA_OBSERVATION_MAX_STATIONS,
+        initial_hours: float = NOAA_OBSERVATION_INITIAL_HOURS,
+    ) -> None:
+        self._repo = repo
+        self._store = store
+        self._stations = {station.upper() for station in stations}
+        self._stations.update(store.stations())
+        self._interval = interval
+        self._max_stations = max_stations
+        self._initial_hours = initial_hours
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def store(self) -> ObservationStore:
+        return self._store
+
+    @property
+    def stations(self) -> list[str]:
+        with self._lock:
+            return sorted(self._stations)
+
+    def track(self, station_id: str) -> bool:
+        """Start tracking a station; returns False if it already was."""
+
+        station_id = station_id.upper()
+        with self._lock:
+            if station_id in self._stations:
+                return False
+            if len(self._stations) >= self._max_stations:
+                raise TrackingLimitReached(
+                    f"already tracking {self._max_stations} stations"
+                )
+            self._stations.add(station_id)
+        return True
+
+    def untrack(self, station_id: str) -> None:
+        with self._lock:
+            self._stations.discard(station_id.upper())
+
+    def poll_station(self, station_id: str) -> int:
+        kwargs = {"station_id": station_id}
+        latest = self._store.latest(station_id)
+        max_pages = None
+        if latest is not None:
+            kwargs["start"] = (latest + timedelta(seconds=1)).to_pydatetime()
+        else:
+            start = pd.Timestamp.now("UTC") - pd.Timedelta(hours=self._initial_hours)
+            kwargs["start"] = start.to_pydatetime()
+            max_pages = INITIAL_SYNC_MAX_PAGES
+        # Closed explicitly: a page cap leaves the iterator (and the page it is
+        # prefetching) unfinished.
+        with closing(self._repo.iter_pages("station_observation_list", **kwargs)) as pages:
+            frame = observations_frame(islice(pages, max_pages))
+        return self._store.append(station_id, frame)
+
+    def run_once(self) -> int:
+        added = 0
+        for station_id in self.stations:
+            try:
+                added += self.poll_station(station_id)
+            except Exception:
+                logger.warning("observation poll failed for %s", station_id, exc_info=True)
+        return added
+
+    def start(self) -> None:
+        if self._interval <= 0:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="noaa-observations", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval)
+
+    def _run(self) -> None:
+        self.run_once()
+        while not self._stop.wait(self._interval):
+            self.run_once()
+
+
+@lru_cache
+def get_observation_poller() -> ObservationPoller | None:
+    """The process-wide poller, or None when no store path is configured."""
+
+    if not NOAA_OBSERVATION_STORE:
+        return None
+    stations = [s.strip() for s in NOAA_OBSERVATION_STATIONS.split(",") if s.strip()]
+    return ObservationPoller(
+        get_noaa_repository(), ObservationStore(NOAA_OBSERVATION_STORE), stations
+    )
@@ -0,0 +1,71 @@
+"""
+Sparse fieldsets for collection responses.
+
+`?fields=id,event,severity` keeps only the named properties of every feature
+(GeoJSON `properties` or JSON-LD `@graph` members) and `?geometry=false`
+drops geometries, so typical consumers download a fraction of the payload.
+Feature `id` and `type` are always kept, as are collection-level keys such as
+`pagination` and `updated`.
+"""
+
+from __future__ import annotations
+
+from fastapi import Query
+
+from app.recording import to_jsonable
+
+_ALWAYS_KEPT = ("id", "@id", "type", "@type")
+
+
+class Projection:
+    def __init__(self, fields: frozenset[str] | None = None, geometry: bool = True) -> None:
+        self.fields = fields
+        self.geometry = geometry
+
+    @property
+    def is_identity(self) -> bool:
+        return self.fields is None and self.geometry
+
+    def __call__(self, payload):
+        if self.is_identity:
+            return payload
+        payload = to_jsonable(payload)
+        if not isinstance(payload, dict):
+            return payload
+        if isinstance(payload.get("features"), list):
+            return {**payload, "features": [self.feature(f) for f in payload["features"]]}
+        if isinstance(payload.get("@graph"), list):
+            return {**payload, "@graph": [self.member(m) for m in payload["@graph"]]}
+        if isinstance(payload.get("properties"), dict):
+            return self.feature(payload)
+        return payload
+
+    def feature(self, feature: dict) -> dict:
+        projected = {key: value for key, value in feature.items() if key != "geometry"}
+        if self.geometry and "geometry" in feature:
+            projected["geometry"] = feature["geometry"]
+        if self.fields is not None and isinstance(feature.get("properties"), dict):
+            projected["properties"] = self.member(feature["properties"])
+        return projected
+
+    def member(self, member: dict) -> dict:
+        if self.fields is None:
+            if self.geometry:
+                return member
+            return {key: value for key, value in member.items() if key != "geometry"}
+        return {
+            key: value
+            for key, value in member.items()
+            if key in self.fields or key in _ALWAYS_KEPT
+            or (key == "geometry" and self.geometry)
+        }
+
+
+def get_projection(
+    fields: str | None = Query(
+        None, description="Comma-separated feature properties to keep."
+    ),
+    geometry: bool = Query(True, description="Include feature geometries."),
+) -> Projection:
+    names = frozenset(filter(None, (name.strip() for name in (fields or "").split(","))))
+    return Projection(names or None, geometry)
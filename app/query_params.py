@@ -0,0 +1,109 @@
+"""
+Query-parameter dependencies shared by the collection routes.
+
+Each dependency declares the upstream filters of one `DefaultApi` collection
+method (same names as the generated client) and returns only the ones the
+client actually sent, ready to be passed through as keyword arguments.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import Depends, Query
+
+
+def _present(**params) -> dict:
+    return {name: value for name, value in params.items() if value is not None}
+
+
+def active_alert_filters(
+    status: list[str] | None = Query(None),
+    message_type: list[str] | None = Query(None),
+    event: list[str] | None = Query(None),
+    code: list[str] | None = Query(None),
+    area: list[str] | None = Query(None),
+    point: str | None = None,
+    region: list[str] | None = Query(None),
+    region_type: str | None = None,
+    zone: list[str] | None = Query(None),
+    urgency: list[str] | None = Query(None),
+    severity: list[str] | None = Query(None),
+    certainty: list[str] | None = Query(None),
+    limit: int | None = Query(None, ge=1),
+) -> dict:
+    return _present(
+        status=status, message_type=message_type, event=event, code=code,
+        area=area, point=point, region=region, region_type=region_type,
+        zone=zone, urgency=urgency, severity=severity, certainty=certainty,
+        limit=limit,
+    )
+
+
+def alert_query_filters(
+    base: dict = Depends(active_alert_filters),
+    active: bool | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: str | None = None,
+) -> dict:
+    return {**base, **_present(active=active, start=start, end=end, cursor=cursor)}
+
+
+def zone_filters(
+    id: list[str] | None = Query(None),
+    area: list[str] | None = Query(None),
+    region: list[str] | None = Query(None),
+    type: list[str] | None = Query(None),
+    point: str | None = None,
+    include_geometry: bool | None = None,
+    limit: int | None = Query(None, ge=1),
+    effective: datetime | None = None,
+) -> dict:
+    return _present(
+        id=id, area=area, region=region, type=type, point=point,
+        include_geometry=include_geometry, limit=limit, effective=effective,
+    )
+
+
+def station_filters(
+    id: list[str] | None = Query(None),
+    state: list[str] | None = Query(None),
+    limit: int | None = Query(None, ge=1),
+    cursor: str | None = None,
+) -> dict:
+    return _present(id=id, state=state, limit=limit, cursor=cursor)
+
+
+def observation_filters(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int | None = Query(None, ge=1),
+    cursor: str | None = None,
+) -> dict:
+    return _present(start=start, end=end, limit=limit, cursor=cursor)
+
+
+def product_filters(
+    location: list[str] | None = Query(None),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    office: list[str] | None = Query(None),
+    wmoid: list[str] | None = Query(None),
+    type: list[str] | None = Query(None),
+    limit: int | None = Query(None, ge=1),
+) -> dict:
+    return _present(
+        location=location, start=start, end=end, office=office, wmoid=wmoid,
+        type=type, limit=limit,
+    )
+
+
+def sigmet_filters(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    date: str | None = None,
+    atsu: str | None = None,
+    sequence: str | None = None,
+) -> dict:
+    return _present(start=start, end=end, date=date, atsu=atsu, sequence=sequence)
@@ -0,0 +1,266 @@
+"""
+Record/replay support for upstream NOAA traffic.
+
+`RecordingApi` wraps the generated `DefaultApi` and appends every upstream
+call (method, arguments, outcome and latency) to a gzip-compressed JSON-lines
+archive. `ReplayApi` serves an archive back deterministically, optionally
+sleeping for the original (or a scaled) latency, so production traffic shapes
+can be reproduced offline by the benchmark harness or cache simulations.
+"""
+
+from __future__ import annotations
+
+import atexit
+import base64
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+
+class NotRecorded(LookupError):
+    """A replayed call has no exchange in the recording."""
+
+    def __init__(self, key: str) -> None:
+        super().__init__(f"no recorded exchange for {key}")
+        self.key = key
+
+
+@dataclass(frozen=True)
+class Exchange:
+    """A single recorded upstream call."""
+
+    method: str
+    kwargs: dict
+    offset: float
+    latency: float
+    status: int = 200
+    result: Any = None
+    reason: str | None = None
+    body: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def to_record(self) -> dict:
+        record = {
+            "m": self.method,
+            "k": self.kwargs,
+            "t": round(self.offset, 6),
+            "l": round(self.latency, 6),
+            "s": self.status,
+        }
+        if self.ok:
+            record["r"] = self.result
+        else:
+            record["e"] = [self.reason, self.body]
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Exchange":
+        reason, body = record.get("e") or (None, None)
+        return cls(
+            method=record["m"],
+            kwargs=record["k"],
+            offset=record["t"],
+            latency=record["l"],
+            status=record["s"],
+            result=record.get("r"),
+            reason=reason,
+            body=body,
+        )
+
+
+def exchange_key(method: str, kwargs: dict) -> str:
+    """Stable lookup key for a call, independent of keyword order."""
+
+    return method + ":" + json.dumps(kwargs, sort_keys=True, default=str)
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Convert a generated-client return value into plain JSON data.
+
+    Models are dumped in JSON mode, so datetimes and enums come out as the
+    same strings a cache hit decodes; a miss and a hit return equal values.
+    """
+
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", by_alias=True, exclude_none=True)
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, (bytes, bytearray)):
+        return {"$b64": base64.b64encode(bytes(value)).decode("ascii")}
+    return value
+
+
+def from_jsonable(value: Any) -> Any:
+    if isinstance(value, dict) and value.keys() == {"$b64"}:
+        return base64.b64decode(value["$b64"])
+    return value
+
+
+def _public_kwargs(kwargs: dict) -> dict:
+    # Transport options such as `_request_timeout` are not part of the request.
+    return {key: value for key, value in kwargs.items() if not key.startswith("_")}
+
+
+# Archive ----------------------------------------------------------------------
+
+class TrafficArchive:
+    """
+    Append-only writer for a recorded traffic archive.
+
+    Entries are buffered and flushed every `flush_every` calls (and at exit),
+    so recording adds no per-request disk round trip.
+    """
+
+    def __init__(self, path: str | Path, flush_every: int = 100) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._flush_every = flush_every
+        self._pending: list[str] = []
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        atexit.register(self.close)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def append(self, exchange: Exchange) -> None:
+        line = json.dumps(exchange.to_record(), separators=(",", ":"), default=str)
+        with self._lock:
+            self._pending.append(line)
+            if len(self._pending) >= self._flush_every:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        self.flush()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        # Each flush appends a new gzip member; readers see one continuous stream.
+        with gzip.open(self.path, "at", encoding="utf-8") as fh:
+            fh.write("\n".join(self._pending) + "\n")
+        self._pending.clear()
+
+
+def iter_exchanges(path: str | Path) -> Iterator[Exchange]:
+    """Yield the exchanges of an archive in recorded order."""
+
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield Exchange.from_record(json.loads(line))
+
+
+# Record / replay proxies ------------------------------------------------------
+
+class RecordingApi:
+    """Transparent `DefaultApi` proxy that records every call it forwards."""
+
+    def __init__(self, api, archive: TrafficArchive) -> None:
+        self._api = api
+        self._archive = archive
+
+    def __getattr__(self, name: str):
+        target = getattr(self._api, name)
+        if name.startswith("_") or not callable(target):
+            return target
+
+        def _call(**kwargs):
+            offset = self._archive.elapsed()
+            started = time.perf_counter()
+            try:
+                result = target(**kwargs)
+            except Exception as exc:
+                status = getattr(exc, "status", None)
+                if status is None:
+                    raise
+                self._archive.append(
+                    Exchange(
+                        method=name,
+                        kwargs=_public_kwargs(kwargs),
+                        offset=offset,
+                        latency=time.perf_counter() - started,
+                        status=status,
+                        reason=getattr(exc, "reason", None),
+                        body=getattr(exc, "body", None),
+                    )
+                )
+                raise
+            self._archive.append(
+                Exchange(
+                    method=name,
+                    kwargs=_public_kwargs(kwargs),
+                    offset=offset,
+                    latency=time.perf_counter() - started,
+                    result=to_jsonable(result),
+                )
+            )
+            return result
+
+        return _call
+
+
+class ReplayApi:
+    """
+    `DefaultApi` stand-in that answers calls from a recorded archive.
+
+    Calls with the same method and arguments are answered in recorded order;
+    once a key's recordings are exhausted the last one keeps being served.
+    Calls that were never recorded raise `NotRecorded`.
+    `latency_scale` multiplies the recorded latency (0 disables sleeping).
+    """
+
+    def __init__(self, exchanges, latency_scale: float = 0.0) -> None:
+        self._latency_scale = latency_scale
+        self._by_key: dict[str, deque[Exchange]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        for exchange in exchanges:
+            self._by_key[exchange_key(exchange.method, exchange.kwargs)].append(exchange)
+
+    @classmethod
+    def from_path(cls, path: str | Path, latency_scale: float = 0.0) -> "ReplayApi":
+        return cls(iter_exchanges(path), latency_scale=latency_scale)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def _call(**kwargs):
+            return self._serve(self._next(name, _public_kwargs(kwargs)))
+
+        return _call
+
+    def _next(self, method: str, kwargs: dict) -> Exchange:
+        key = exchange_key(method, kwargs)
+        with self._lock:
+            recorded = self._by_key.get(key)
+            if not recorded:
+                raise NotRecorded(key)
+            return recorded.popleft() if len(recorded) > 1 else recorded[0]
+
+    def _serve(self, exchange: Exchange):
+        if self._latency_scale > 0:
+            time.sleep(exchange.latency * self._latency_scale)
+        if exchange.ok:
+            return from_jsonable(exchange.result)
+
+        from openapi_client.exceptions import ApiException
+
+        raise ApiException(
+            status=exchange.status, reason=exchange.reason, body=exchange.body
+        )
@@ -0,0 +1,63 @@
+"""
+Per-request state shared between the ASGI middleware and the repository.
+
+The middleware installs a `RequestContext` in a context variable; FastAPI
+copies the context into the threadpool that runs sync routes, so repository
+calls made while serving the request see (and update) the same object.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+
+class DeadlineExceeded(Exception):
+    """The request's latency budget ran out before upstream answered."""
+
+
+class RequestCancelled(Exception):
+    """The client disconnected; remaining upstream work is abandoned."""
+
+
+@dataclass
+class RequestContext:
+    route_class: str
+    # Absolute `time.monotonic()` deadline for the whole request.
+    deadline: float = math.inf
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    # Repository outcomes: upstream calls made, and until when every cache
+    # entry used to answer the request stays fresh.
+    upstream_calls: int = 0
+    fresh_until: float = math.inf
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def check(self) -> float:
+        """Remaining budget in seconds; raises once cancelled or exhausted."""
+
+        if self.cancelled.is_set():
+            raise RequestCancelled(self.route_class)
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(self.route_class)
+        return remaining
+
+    def note_cache_hit(self, expires_at: float) -> None:
+        self.fresh_until = min(self.fresh_until, expires_at)
+
+    def note_upstream_call(self) -> None:
+        self.upstream_calls += 1
+
+    @property
+    def served_from_cache(self) -> bool:
+        return self.upstream_calls == 0 and self.fresh_until > time.time()
+
+
+current_request: ContextVar[RequestContext | None] = ContextVar(
+    "current_request", default=None
+)
@@ -0,0 +1,107 @@
+"""
+Streaming export of paginated upstream collections as NDJSON.
+
+`NOAARepository.iter_pages` follows the `pagination.next` cursors of a
+collection lazily (prefetching one page ahead); `ndjson_lines` turns those
+pages into one JSON document per feature and stops at the configured item or
+byte caps, so arbitrarily large result sets never have to be buffered.
+
+The last line of every stream is a summary record:
+
+    {"type": "StreamEnd", "items": 1234, "truncated": false, "next_cursor": null,
+     "skip": 0}
+
+Errors after the response has started (e.g. a later page failing upstream)
+end the stream early with `truncated: true` and an `error` message.
+
+A truncated stream (cap or error) is resumed from the start of the page that
+was cut: pass `next_cursor` back as `cursor=`, or, when it is null because
+the first page was cut, repeat the original request without a cursor. The
+first `skip` members of that page were already streamed.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Iterable, Iterator
+from urllib.parse import parse_qs, urlparse
+
+from app.recording import to_jsonable
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+DEFAULT_MAX_ITEMS = 10_000
+MAX_ITEMS_LIMIT = 100_000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def page_items(page: dict) -> list:
+    """Members of a collection page (GeoJSON `features` or JSON-LD `@graph`)."""
+
+    if "features" in page:
+        return page["features"] or []
+    return page.get("@graph") or []
+
+
+def next_cursor(page: dict) -> str | None:
+    """The cursor of the next page, taken from `pagination.next`."""
+
+    next_url = (page.get("pagination") or {}).get("next")
+    if not next_url:
+        return None
+    cursor = parse_qs(urlparse(next_url).query).get("cursor")
+    return cursor[0] if cursor else None
+
+
+def ndjson_lines(
+    pages: Iterable[dict],
+    max_items: int = DEFAULT_MAX_ITEMS,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Iterator[bytes]:
+    items = 0
+    written = 0
+    truncated = False
+    error = None
+    resume_cursor = None
+    page_sent = 0
+    pages = iter(pages)
+    while not truncated:
+        try:
+            page = next(pages, None)
+        except Exception as exc:
+            truncated, error = True, str(exc) or type(exc).__name__
+            break
+        if page is None:
+            break
+        page = to_jsonable(page)
+        page_sent = 0
+        for member in page_items(page):
+            if items >= max_items or written >= max_bytes:
+                truncated = True
+                break
+            # Members are dumped in JSON mode: pages that skip the cache may
+            # still hold generated models (with datetimes) rather than JSON.
+            line = json.dumps(to_jsonable(member), separators=(",", ":")).encode("utf-8")
+            line += b"\n"
+            items += 1
+            page_sent += 1
+            written += len(line)
+            yield line
+        if not truncated:
+            resume_cursor = next_cursor(page)
+            page_sent = 0
+    if not truncated:
+        resume_cursor = None
+    if hasattr(pages, "close"):
+        pages.close()
+
+    summary = {
+        "type": "StreamEnd",
+        "items": items,
+        "truncated": truncated,
+        "next_cursor": resume_cursor,
+        "skip": page_sent,
+    }
+    if error:
+        summary["error"] = error
+    yield json.dumps(summary, separators=(",", ":")).encode("utf-8") + b"\n"
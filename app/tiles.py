@@ -0,0 +1,374 @@
+"""
+Mapbox vector tiles (MVT 2.1) for active alerts and zones.
+
+Each layer keeps a snapshot of its source collection, re-read through the
+repository (and so through the response cache) at most every
+`refresh_interval` seconds. Features are projected to Web Mercator once per
+snapshot. A tile request only clips, simplifies and encodes the features
+whose bounding box touches the tile. Encoded tiles are kept in an LRU that is
+dropped whenever the snapshot content changes, so map clients never get
+stale tiles and never force a re-encode of unchanged data.
+
+Only (Multi)Polygon geometries are encoded. Zone-based alerts without their
+own geometry do not appear in the alerts layer.
+
+The protobuf encoding is written by hand; the tile schema is small and
+stable and this avoids a protobuf dependency.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+
+from app.geometry import simplify_line
+from app.recording import to_jsonable
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+EXTENT = 4096
+BUFFER = 64
+MAX_TILE_ZOOM = 18
+MAX_LATITUDE = 85.05112878
+
+# Simplification tolerance in tile units (1/16 of a 256 px display pixel).
+_TOLERANCE = EXTENT / 256 / 16
+
+_POLYGON = 3
+
+
+@dataclass(frozen=True)
+class TileLayer:
+    method: str
+    properties: tuple[str, ...]
+    kwargs: dict = field(default_factory=dict)
+    refresh_interval: float = 15.0
+
+
+LAYERS = {
+    "alerts": TileLayer(
+        "alerts_active",
+        ("id", "event", "severity", "urgency", "certainty", "headline", "onset", "ends"),
+    ),
+    "zones": TileLayer(
+        "zone_list",
+        ("id", "type", "name", "state", "cwa"),
+        kwargs={"include_geometry": True},
+        refresh_interval=3600.0,
+    ),
+}
+
+
+# Protobuf wire format ----------------------------------------------------------
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _key(number: int, wire_type: int) -> bytes:
+    return _varint(number << 3 | wire_type)
+
+
+def _uint_field(number: int, value: int) -> bytes:
+    return _key(number, 0) + _varint(value)
+
+
+def _bytes_field(number: int, payload: bytes) -> bytes:
+    return _key(number, 2) + _varint(len(payload)) + payload
+
+
+def _packed_field(number: int, values) -> bytes:
+    return _bytes_field(number, b"".join(_varint(value) for value in values))
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _value(value) -> bytes:
+    if isinstance(value, bool):
+        return _uint_field(7, int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _uint_field(5, value)
+        return _uint_field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack("<d", value)
+    return _bytes_field(1, str(value).encode("utf-8"))
+
+
+def _command(command_id: int, count: int) -> int:
+    return (command_id & 0x7) | (count << 3)
+
+
+def _polygon_commands(rings: list[np.ndarray]) -> list[int]:
+    commands: list[int] = []
+    cursor = np.zeros((1, 2), dtype=np.int64)
+    for ring in rings:
+        deltas = np.diff(ring, axis=0, prepend=cursor)
+        params = ((deltas << 1) ^ (deltas >> 63)).ravel().tolist()
+        commands.append(_command(1, 1))
+        commands.extend(params[:2])
+        commands.append(_command(2, len(ring) - 1))
+        commands.extend(params[2:])
+        commands.append(_command(7, 1))
+        cursor = ring[-1:]
+    return commands
+
+
+def encode_layer(name: str, features: list[tuple[list[np.ndarray], dict]]) -> bytes:
+    """One encoded `Tile.layers` entry for `(rings, properties)` polygon features."""
+
+    keys: dict[str, int] = {}
+    values: dict[tuple[str, object], int] = {}
+    encoded_values: list[bytes] = []
+    body = bytearray()
+    for rings, properties in features:
+        tags: list[int] = []
+        for key, value in properties.items():
+            if value is None or isinstance(value, (dict, list)):
+                continue
+            value_key = (type(value).__name__, value)
+            if value_key not in values:
+                values[value_key] = len(encoded_values)
+                encoded_values.append(_value(value))
+            tags += [keys.setdefault(key, len(keys)), values[value_key]]
+        feature = (
+            _packed_field(2, tags)
+            + _uint_field(3, _POLYGON)
+            + _packed_field(4, _polygon_commands(rings))
+        )
+        body += _bytes_field(2, feature)
+
+    layer = (
+        _uint_field(15, 2)
+        + _bytes_field(1, name.encode("utf-8"))
+        + bytes(body)
+        + b"".join(_bytes_field(3, key.encode("utf-8")) for key in keys)
+        + b"".join(_bytes_field(4, value) for value in encoded_values)
+        + _uint_field(5, EXTENT)
+    )
+    return _bytes_field(3, layer)
+
+
+# Projection and clipping -----------------------------------------------------
+
+def to_mercator(lonlat: np.ndarray) -> np.ndarray:
+    """Longitude/latitude to Web Mercator, normalized to the unit square."""
+
+    lon = lonlat[:, 0]
+    lat = np.radians(np.clip(lonlat[:, 1], -MAX_LATITUDE, MAX_LATITUDE))
+    x = (lon + 180.0) / 360.0
+    y = 0.5 - np.log(np.tan(np.pi / 4 + lat / 2)) / (2 * np.pi)
+    return np.column_stack([x, y])
+
+
+def _clip_edge(ring: np.ndarray, axis: int, bound: float, keep_below: bool) -> np.ndarray:
+    # One Sutherland-Hodgman pass, vectorized: every vertex contributes the
+    # crossing point of its incoming edge (if any) followed by itself (if inside).
+    inside = ring[:, axis] <= bound if keep_below else ring[:, axis] >= bound
+    previous = np.roll(ring, 1, axis=0)
+    crosses = inside != np.roll(inside, 1)
+    span = ring[:, axis] - previous[:, axis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(crosses, (bound - previous[:, axis]) / span, 0.0)
+    crossing = previous + t[:, None] * (ring - previous)
+    candidates = np.stack([crossing, ring], axis=1).reshape(-1, 2)
+    return candidates[np.column_stack([crosses, inside]).ravel()]
+
+
+def clip_ring(ring: np.ndarray, low: float, high: float) -> np.ndarray:
+    """Clip an open ring to the square `[low, high]²`."""
+
+    for axis in (0, 1):
+        for bound, keep_below in ((high, True), (low, False)):
+            if len(ring) == 0:
+                return ring
+            ring = _clip_edge(ring, axis, bound, keep_below)
+    return ring
+
+
+def _signed_area(ring: np.ndarray) -> float:
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+
+
+def _tile_ring(ring: np.ndarray, exterior: bool) -> np.ndarray | None:
+    ring = clip_ring(ring, -BUFFER, EXTENT + BUFFER)
+    if len(ring) < 3:
+        return None
+    closed = simplify_line(np.vstack([ring, ring[:1]]), _TOLERANCE)[:-1]
+    ring = np.round(closed).astype(np.int64)
+    distinct = np.any(ring != np.roll(ring, 1, axis=0), axis=1)
+    ring = ring[distinct]
+    if len(ring) < 3:
+        return None
+    area = _signed_area(ring)
+    if area == 0:
+        return None
+    # MVT winding: exterior rings positive area (clockwise on screen).
+    if (area > 0) != exterior:
+        ring = ring[::-1]
+    return ring
+
+
+# Snapshots and tile cache ----------------------------------------------------
+
+@dataclass
+class _Feature:
+    polygons: list[list[np.ndarray]]
+    bbox: tuple[float, float, float, float]
+    properties: dict
+
+
+def _polygons(geometry) -> list[list]:
+    if not isinstance(geometry, dict):
+        return []
+    if geometry.get("type") == "Polygon":
+        return [geometry.get("coordinates") or []]
+    if geometry.get("type") == "MultiPolygon":
+        return geometry.get("coordinates") or []
+    return []
+
+
+def prepare_features(payload, properties: tuple[str, ...]) -> list[_Feature]:
+    features = []
+    for feature in (payload or {}).get("features") or []:
+        polygons = []
+        for polygon in _polygons(feature.get("geometry")):
+            rings = [
+                to_mercator(np.asarray(ring, dtype=float)[:-1, :2])
+                for ring in polygon
+                if len(ring) >= 4
+            ]
+            if rings:
+                polygons.append(rings)
+        if not polygons:
+            continue
+        points = np.vstack([polygon[0] for polygon in polygons])
+        source = feature.get("properties") or {}
+        features.append(
+            _Feature(
+                polygons=polygons,
+                bbox=(*points.min(axis=0), *points.max(axis=0)),
+                properties={name: source.get(name) for name in properties},
+            )
+        )
+    return features
+
+
+def render_tile(name: str, features: list[_Feature], z: int, x: int, y: int) -> bytes:
+    """Encoded tile (empty bytes when no feature touches it)."""
+
+    scale = 1 << z
+    margin = BUFFER / EXTENT
+    west, north = (x - margin) / scale, (y - margin) / scale
+    east, south = (x + 1 + margin) / scale, (y + 1 + margin) / scale
+    origin = np.array([x, y], dtype=float)
+
+    encoded = []
+    for feature in features:
+        min_x, min_y, max_x, max_y = feature.bbox
+        if max_x < west or min_x > east or max_y < north or min_y > south:
+            continue
+        rings = []
+        for polygon in feature.polygons:
+            exterior = _tile_ring((polygon[0] * scale - origin) * EXTENT, True)
+            if exterior is None:
+                continue
+            rings.append(exterior)
+            for hole in polygon[1:]:
+                hole = _tile_ring((hole * scale - origin) * EXTENT, False)
+                if hole is not None:
+                    rings.append(hole)
+        if rings:
+            encoded.append((rings, feature.properties))
+    return encode_layer(name, encoded) if encoded else b""
+
+
+@dataclass
+class _Snapshot:
+    version: str = ""
+    loaded_at: float = float("-inf")
+    features: list[_Feature] = field(default_factory=list)
+
+
+class TileService:
+    """Per-layer snapshots plus an LRU of encoded tiles."""
+
+    def __init__(
+        self, layers: dict[str, TileLayer] | None = None, max_tiles: int = 4096
+    ) -> None:
+        self.layers = LAYERS if layers is None else layers
+        self._max_tiles = max_tiles
+        self._snapshots = {name: _Snapshot() for name in self.layers}
+        self._tiles: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._refresh_locks = {name: threading.Lock() for name in self.layers}
+
+    def version(self, repo, layer: str) -> str:
+        """Current snapshot version of `layer`; tiles of one version never change."""
+
+        return self._snapshot(repo, layer).version
+
+    def tile(self, repo, layer: str, z: int, x: int, y: int) -> tuple[bytes, str]:
+        """`(encoded tile, snapshot version)` for one tile of `layer`."""
+
+        snapshot = self._snapshot(repo, layer)
+        key = (layer, snapshot.version, z, x, y)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key], snapshot.version
+
+        content = render_tile(layer, snapshot.features, z, x, y)
+        with self._lock:
+            self._tiles[key] = content
+            while len(self._tiles) > self._max_tiles:
+                self._tiles.popitem(last=False)
+        return content, snapshot.version
+
+    def _snapshot(self, repo, layer: str) -> _Snapshot:
+        config = self.layers[layer]
+        with self._refresh_locks[layer]:
+            snapshot = self._snapshots[layer]
+            if time.monotonic() - snapshot.loaded_at < config.refresh_interval:
+                return snapshot
+            payload = to_jsonable(repo.fetch(config.method, **config.kwargs))
+            version = hashlib.sha1(
+                json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()[:16]
+            if version == snapshot.version:
+                snapshot.loaded_at = time.monotonic()
+                return snapshot
+
+            snapshot = _Snapshot(
+                version, time.monotonic(), prepare_features(payload, config.properties)
+            )
+            self._snapshots[layer] = snapshot
+            with self._lock:
+                for key in [key for key in self._tiles if key[0] == layer]:
+                    del self._tiles[key]
+            return snapshot
+
+
+@lru_cache
+def get_tile_service() -> TileService:
+    return TileService()
+
+
+def tile_in_range(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < (1 << z) and 0 <= y < (1 << z)
@@ -0,0 +1,84 @@
+"""
+Vectorized conversion between the units api.weather.gov reports.
+
+Units are named by their WMO code (the part after `wmoUnit:` in a
+`unitCode`/`uom`). Every supported conversion is linear, so converting a
+whole array is one multiply-add.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+# unit -> (dimension, scale to the dimension's base unit, offset)
+_UNITS = {
+    # Temperature (base: degC).
+    "degC": ("temperature", 1.0, 0.0),
+    "degF": ("temperature", 5 / 9, -32 * 5 / 9),
+    "K": ("temperature", 1.0, -273.15),
+    # Speed (base: km/h).
+    "km_h-1": ("speed", 1.0, 0.0),
+    "m_s-1": ("speed", 3.6, 0.0),
+    "mph": ("speed", 1.609344, 0.0),
+    "kt": ("speed", 1.852, 0.0),
+    # Length (base: m).
+    "m": ("length", 1.0, 0.0),
+    "km": ("length", 1000.0, 0.0),
+    "mm": ("length", 0.001, 0.0),
+    "cm": ("length", 0.01, 0.0),
+    "in": ("length", 0.0254, 0.0),
+    "ft": ("length", 0.3048, 0.0),
+    "mi": ("length", 1609.344, 0.0),
+    # Pressure (base: Pa).
+    "Pa": ("pressure", 1.0, 0.0),
+    "hPa": ("pressure", 100.0, 0.0),
+    "inHg": ("pressure", 3386.389, 0.0),
+}
+
+# The unit each SI unit is shown in for `units=us`.
+US_UNITS = {
+    "degC": "degF",
+    "K": "degF",
+    "km_h-1": "mph",
+    "m_s-1": "mph",
+    "mm": "in",
+    "cm": "in",
+    "m": "ft",
+    "km": "mi",
+    "Pa": "inHg",
+    "hPa": "inHg",
+}
+
+UNIT_SYSTEMS = ("si", "us")
+
+
+def unit_name(code: str | None) -> str | None:
+    """`wmoUnit:degC` -> `degC`."""
+
+    if not code:
+        return None
+    return code.rpartition(":")[2]
+
+
+def convert(values: np.ndarray, source: str, target: str) -> np.ndarray:
+    """Convert `values` from unit `source` to unit `target`."""
+
+    if source == target:
+        return values
+    try:
+        dimension, scale, offset = _UNITS[source]
+        target_dimension, target_scale, target_offset = _UNITS[target]
+    except KeyError as exc:
+        raise ValueError(f"cannot convert {source} to {target}") from exc
+    if dimension != target_dimension:
+        raise ValueError(f"cannot convert {source} to {target}")
+    base = np.asarray(values, dtype=float) * scale + offset
+    return (base - target_offset) / target_scale
+
+
+def to_system(values: np.ndarray, unit: str | None, system: str) -> tuple[np.ndarray, str | None]:
+    """Values and unit in the requested unit system (`si` leaves them as reported)."""
+
+    if system == "us" and unit in US_UNITS:
+        return convert(values, unit, US_UNITS[unit]), US_UNITS[unit]
+    return values, unit
@@ -0,0 +1,168 @@
+"""
+Start-up cache warming and scheduled pre-fetch of hot keys.
+
+At start-up the warm-up targets are fetched through the repository with
+bounded concurrency; `/ready` reports 503 until that has finished. Afterwards
+`PrefetchScheduler` periodically re-fetches the most requested cache keys
+that are about to expire, so popular entries never fall out of the cache.
+
+Warm-up targets are read from the JSON file named by `NOAA_WARMUP_FILE`, a
+list of `{"method": "<DefaultApi method>", "kwargs": {...}}` objects, e.g.:
+
+    [
+        {"method": "point", "kwargs": {"latitude": 38.9, "longitude": -77.0}},
+        {"method": "zone", "kwargs": {"type": "forecast", "zone_id": "MDZ001"}},
+        {"method": "station_observation_latest", "kwargs": {"station_id": "KDCA"}}
+    ]
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.domain_noaa_repository import NOAARepository
+
+logger = logging.getLogger(__name__)
+
+# Reference endpoints warmed when no warm-up file is configured.
+DEFAULT_WARMUP_TARGETS = [
+    {"method": "alerts_active", "kwargs": {}},
+    {"method": "alerts_types", "kwargs": {}},
+    {"method": "glossary", "kwargs": {}},
+    {"method": "product_types", "kwargs": {}},
+    {"method": "radar_stations", "kwargs": {}},
+]
+
+NOAA_WARMUP_FILE = os.environ.get("NOAA_WARMUP_FILE")
+NOAA_WARMUP_CONCURRENCY = int(os.environ.get("NOAA_WARMUP_CONCURRENCY", "8"))
+NOAA_PREFETCH_TOP_N = int(os.environ.get("NOAA_PREFETCH_TOP_N", "50"))
+NOAA_PREFETCH_INTERVAL = float(os.environ.get("NOAA_PREFETCH_INTERVAL", "30"))
+
+
+class Readiness:
+    """Process-wide readiness flag reported by `/ready`."""
+
+    def __init__(self) -> None:
+        self._ready = threading.Event()
+        self.detail: dict = {"status": "warming"}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def mark_ready(self, **detail) -> None:
+        self.detail = {"status": "ready", **detail}
+        self._ready.set()
+
+
+readiness = Readiness()
+
+
+def load_warmup_targets(path: str | Path | None = NOAA_WARMUP_FILE) -> list[dict]:
+    if not path:
+        return list(DEFAULT_WARMUP_TARGETS)
+    return json.loads(Path(path).read_text())
+
+
+def warm_cache(
+    repo: NOAARepository, targets: list[dict], concurrency: int = NOAA_WARMUP_CONCURRENCY
+) -> dict:
+    """
+    Fetch every target through the repository; failures are logged, not raised.
+
+    Targets already cached (e.g. loaded from the persistent L2 tier) are
+    left alone; only misses go upstream.
+    """
+
+    def _warm(target: dict) -> bool:
+        try:
+            repo.fetch(target["method"], **target.get("kwargs", {}))
+            return True
+        except Exception:
+            logger.warning("cache warm-up failed for %s", target, exc_info=True)
+            return False
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(_warm, targets))
+    return {
+        "warmed": sum(results),
+        "failed": len(results) - sum(results),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+class PrefetchScheduler:
+    """
+    Background thread that keeps the `top_n` most requested keys fresh.
+
+    Every `interval` seconds, hot keys expiring within the next two intervals
+    are re-fetched from upstream, then access counts are decayed. Expiries
+    are taken from the shared cache, so keys refreshed by another worker are
+    not fetched again.
+    """
+
+    def __init__(
+        self,
+        repo: NOAARepository,
+        top_n: int = NOAA_PREFETCH_TOP_N,
+        interval: float = NOAA_PREFETCH_INTERVAL,
+    ) -> None:
+        self._repo = repo
+        self._top_n = top_n
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._interval <= 0 or self._top_n <= 0:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="noaa-prefetch", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval)
+
+    def run_once(self) -> int:
+        horizon = time.time() + 2 * self._interval
+        refreshed = 0
+        for key, method, kwargs, expires_at in self._repo.access.hot(self._top_n):
+            if expires_at > horizon:
+                continue
+            # Another worker (or the L2 tier) may already hold a fresher entry.
+            if self._repo.cached_expiry(key) > horizon:
+                continue
+            try:
+                self._repo.refresh(method, **kwargs)
+                refreshed += 1
+            except Exception:
+                logger.warning("pre-fetch failed for %s %s", method, kwargs, exc_info=True)
+        self._repo.access.decay()
+        return refreshed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.run_once()
+
+
+def start_warmup(repo: NOAARepository, targets: list[dict]) -> threading.Thread:
+    """Warm the cache in the background and mark the process ready when done."""
+
+    def _run() -> None:
+        summary = warm_cache(repo, targets)
+        logger.info("cache warm-up finished: %s", summary)
+        readiness.mark_ready(**summary)
+
+    thread = threading.Thread(target=_run, name="noaa-warmup", daemon=True)
+    thread.start()
+    return thread
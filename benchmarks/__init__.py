@@ -0,0 +1 @@
+"""Benchmark and replay harness for the NOAA FastAPI service."""
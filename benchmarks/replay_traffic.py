@@ -0,0 +1,93 @@
+"""
+Replay a recorded upstream traffic archive and report per-method latency.
+
+Usage:
+    python -m benchmarks.replay_traffic ARCHIVE [--latency-scale 1.0]
+        [--cache memory] [--realtime]
+
+The calls are issued in recorded order against `ReplayApi`, so results are
+deterministic and need no network access. Record an archive by running the
+service with `NOAA_RECORD_PATH=/path/to/traffic.jsonl.gz`.
+
+With `--cache`, calls go through `NOAARepository.fetch` and the cache hit
+ratio is reported. Without `--realtime` calls are issued back to back, so
+TTLs rarely expire and the hit ratio is an upper bound; `--realtime` keeps
+the recorded inter-arrival times.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from collections import defaultdict
+
+from app.cache import build_cache_backend
+from app.domain_noaa_repository import NOAARepository
+from app.recording import ReplayApi, iter_exchanges
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def replay(
+    archive: str,
+    latency_scale: float = 0.0,
+    cache: str = "none",
+    realtime: bool = False,
+) -> dict:
+    exchanges = list(iter_exchanges(archive))
+    api = ReplayApi(exchanges, latency_scale=latency_scale)
+    repo = NOAARepository(api, cache=build_cache_backend(cache))
+
+    timings: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    started = time.perf_counter()
+    for exchange in exchanges:
+        if realtime:
+            time.sleep(max(0.0, exchange.offset - (time.perf_counter() - started)))
+        call_started = time.perf_counter()
+        try:
+            repo.fetch(exchange.method, **exchange.kwargs)
+        except Exception:
+            errors[exchange.method] += 1
+        timings[exchange.method].append(time.perf_counter() - call_started)
+    wall = time.perf_counter() - started
+    lookups = repo.stats["hit"] + repo.stats["miss"]
+
+    return {
+        "archive": archive,
+        "latency_scale": latency_scale,
+        "cache": cache,
+        "calls": len(exchanges),
+        "wall_seconds": round(wall, 4),
+        "cache_hit_ratio": round(repo.stats["hit"] / lookups, 4) if lookups else None,
+        "methods": {
+            method: {
+                "calls": len(samples),
+                "errors": errors[method],
+                "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+                "p95_ms": round(_percentile(samples, 95) * 1000, 3),
+            }
+            for method, samples in sorted(timings.items())
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("archive")
+    parser.add_argument("--latency-scale", type=float, default=0.0)
+    parser.add_argument("--cache", default="none", choices=["none", "memory"])
+    parser.add_argument("--realtime", action="store_true")
+    args = parser.parse_args()
+    result = replay(args.archive, args.latency_scale, args.cache, args.realtime)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
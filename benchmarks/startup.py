@@ -0,0 +1,90 @@
+"""
+Cold-start benchmark: `app.main` import to first served request.
+
+Usage:
+    python -m benchmarks.startup [--runs 5] [--route /glossary]
+
+Each run starts a fresh interpreter, imports `app.main`, then serves
+`/health` and (optionally) one upstream-backed route through the ASGI test
+client. Point `NOAA_REPLAY_PATH` at a recorded archive to exercise an
+upstream route without network access. Reports the median of each phase,
+the number of generated-client modules loaded and peak RSS.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_PROBE = r"""
+import json, resource, sys, time
+
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+client_modules_after_import = sum(m.startswith("openapi_client.") for m in sys.modules)
+
+from fastapi.testclient import TestClient
+
+client = TestClient(app.main.app, raise_server_exceptions=False)
+client.get("/health")
+health = time.perf_counter()
+
+route = sys.argv[1] if len(sys.argv) > 1 else ""
+if route:
+    client.get(route)
+first_route = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_health_ms": (health - started) * 1000,
+    "first_route_ms": (first_route - started) * 1000,
+    "client_modules_after_import": client_modules_after_import,
+    "client_modules_total": sum(m.startswith("openapi_client.") for m in sys.modules),
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def run_once(route: str) -> dict:
+    # Same import layout as tests/conftest.py: repo root plus the generated client.
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(ROOT), str(ROOT / "noaa_client"), env.get("PYTHONPATH")])
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE, route],
+        check=True,
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--route", default="")
+    args = parser.parse_args()
+
+    samples = [run_once(args.route) for _ in range(args.runs)]
+    summary = {
+        key: round(statistics.median(sample[key] for sample in samples), 3)
+        for key in samples[0]
+    }
+    summary["runs"] = args.runs
+    summary["route"] = args.route or None
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
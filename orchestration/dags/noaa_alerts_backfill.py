@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import logging
+from datetime import date, timedelta
+
+from airflow.decorators import dag, task
+from airflow.models.param import Param
+from airflow.operators.python import get_current_context
+from airflow.utils.dates import days_ago
+
+from include.noaa import compaction
+from include.noaa.backfill import backfill_window, split_windows, window_name
+from include.noaa.http import NOAA_POOL, shared_rate_limiter, shared_session
+from include.noaa.pools import ensure_pool
+from include.noaa.state import IngestionState
+from include.noaa.storage import S3ObjectStore
+
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = "noaa-prototype"          # TODO: set this
+S3_PREFIX = "noaa/alerts"                 # same layout as noaa_alerts_ingestion
+COMPACTED_PREFIX = "noaa/alerts_compacted"  # as in noaa_alerts_compaction
+OUTPUT_FORMATS = ("ndjson", "parquet")
+STATE_KEY = "noaa/_state/alerts.json"     # read only, to skip alerts already landed
+CHECKPOINT_PREFIX = "noaa/_state/backfill"
+AWS_CONN_ID = None
+
+
+@dag(
+    schedule=None,                        # triggered manually with a range
+    start_date=days_ago(1),
+    catchup=False,
+    max_active_runs=1,
+    params={
+        "start": Param(type="string", format="date-time"),
+        "end": Param(type="string", format="date-time"),
+        "window_hours": Param(6, type="integer", minimum=1),
+    },
+    tags=["noaa", "alerts", "backfill"],
+)
+def noaa_alerts_backfill():
+    """
+    Land historical alerts for `[start, end)` in parallel windows.
+
+    Re-triggering with the same range resumes unfinished windows from their
+    checkpoints and skips finished ones. The ingestion days the windows wrote
+    to are compacted at the end, since the scheduled compaction only covers
+    recent hours.
+    """
+
+    @task
+    def create_pool() -> None:
+        # The pool shared with the other DAGs that call api.weather.gov.
+        ensure_pool()
+
+    @task
+    def plan_windows() -> list[dict]:
+        params = get_current_context()["params"]
+        windows = split_windows(
+            params["start"], params["end"], timedelta(hours=params["window_hours"])
+        )
+        logger.info("%d windows to backfill", len(windows))
+        return windows
+
+    @task(pool=NOAA_POOL, retries=3, retry_delay=timedelta(minutes=2))
+    def backfill(window: dict) -> dict:
+        store = S3ObjectStore(BUCKET_NAME, aws_conn_id=AWS_CONN_ID)
+        checkpoint = backfill_window(
+            store,
+            shared_session(),
+            window,
+            S3_PREFIX,
+            CHECKPOINT_PREFIX,
+            known=IngestionState.load(store, STATE_KEY),
+            formats=OUTPUT_FORMATS,
+            limiter=shared_rate_limiter(),
+        )
+        logger.info(
+            "window %s: %d pages, %d alerts",
+            window_name(window),
+            checkpoint.pages,
+            checkpoint.records,
+        )
+        return {
+            "window": window_name(window),
+            "pages": checkpoint.pages,
+            "records": checkpoint.records,
+            "days": [day.isoformat() for day in compaction.partition_days(checkpoint.keys)],
+        }
+
+    @task
+    def compact(results: list[dict]) -> list[str]:
+        store = S3ObjectStore(BUCKET_NAME, aws_conn_id=AWS_CONN_ID)
+        days = sorted({day for result in results for day in result["days"]})
+        keys = []
+        for day in days:
+            key = compaction.compact_day(
+                store, S3_PREFIX, COMPACTED_PREFIX, date.fromisoformat(day)
+            )
+            logger.info("day %s compacted to %s", day, key)
+            keys.append(key)
+        return keys
+
+    windows = plan_windows()
+    create_pool() >> windows
+    compact(backfill.expand(window=windows))
+
+
+dag = noaa_alerts_backfill()
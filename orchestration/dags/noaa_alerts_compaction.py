@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Optional
+
+from airflow.decorators import dag, task
+from airflow.utils.dates import days_ago
+
+from include.noaa import compaction
+from include.noaa.storage import S3ObjectStore
+
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = "noaa-prototype"          # TODO: set this
+S3_PREFIX = "noaa/alerts"                 # written by noaa_alerts_ingestion
+COMPACTED_PREFIX = "noaa/alerts_compacted"
+AWS_CONN_ID = None
+
+
+@dag(
+    schedule="20 * * * *",                # after the hour's last ingestion run
+    start_date=days_ago(1),
+    catchup=True,                         # every closed hour gets compacted
+    max_active_runs=1,
+    tags=["noaa", "alerts", "compaction"],
+)
+def noaa_alerts_compaction():
+    """
+    Merge the 15-minute alert partitions of the previous hour into one Parquet
+    file, and bring that day's daily file up to date.
+    """
+
+    @task
+    def compact_hour(data_interval_start: Optional[datetime] = None) -> Optional[str]:
+        store = S3ObjectStore(BUCKET_NAME, aws_conn_id=AWS_CONN_ID)
+        hour = data_interval_start
+        key = compaction.compact_hour(
+            store, S3_PREFIX, COMPACTED_PREFIX, hour.date(), hour.hour
+        )
+        logger.info("hour %s compacted to %s", hour, key)
+        return key
+
+    @task
+    def compact_day(data_interval_start: Optional[datetime] = None) -> Optional[str]:
+        store = S3ObjectStore(BUCKET_NAME, aws_conn_id=AWS_CONN_ID)
+        day = data_interval_start.date()
+        key = compaction.compact_day(store, S3_PREFIX, COMPACTED_PREFIX, day)
+        logger.info("day %s compacted to %s", day, key)
+        return key
+
+    compact_hour() >> compact_day()
+
+
+dag = noaa_alerts_compaction()
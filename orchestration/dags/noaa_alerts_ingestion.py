@@ -1,72 +1,78 @@
 from __future__ import annotations
 
-import json
-from datetime import datetime
-from typing import Optional
+import logging
+from datetime import timedelta
 
-import requests
 from airflow.decorators import dag, task
+from airflow.operators.python import get_current_context
 from airflow.utils.dates import days_ago
-from airflow.providers.amazon.aws.hooks.s3 import S3Hook
 
+from include.noaa.http import new_session, request_url
+from include.noaa.ingest import ingest_alerts
+from include.noaa.metrics import IngestionMetrics, log_freshness_breach, report
+from include.noaa.storage import S3ObjectStore
+
+logger = logging.getLogger(__name__)
 
 BUCKET_NAME = "noaa-prototype"          # TODO: set this
 S3_PREFIX = "noaa/alerts"                 # base prefix in the bucket
+# Written per event type; Parquet is skipped when pyarrow is not installed.
+OUTPUT_FORMATS = ("ndjson", "parquet")
+# Every fetched response body, as received, streamed to S3 via multipart upload.
+RAW_PREFIX = "noaa/raw/alerts"
+COMPRESS_RAW = True
+# Seen alert versions and HTTP validators carried between runs.
+STATE_KEY = "noaa/_state/alerts.json"
 # We rely on the local/runner AWS profile (e.g. AWS_PROFILE=sharks), not an Airflow connection.
 AWS_CONN_ID = None
+# One stable URL rather than a per-run start/end window, so the stored ETag /
+# Last-Modified apply to the next run and unchanged feeds answer 304. Alerts
+# already landed are skipped by the seen-version state; when more than one
+# page changed, `pagination.next` is followed until a page has nothing new.
+ALERTS_URL = request_url("/alerts", {"limit": 500})
+# Alerts landing later than this after their last update breach the SLA.
+FRESHNESS_SLA = timedelta(minutes=20)
 
 
 @dag(
     schedule="*/15 * * * *",              # every 15 minutes
     start_date=days_ago(1),
     catchup=False,
+    max_active_runs=1,                    # runs share the state document
     tags=["noaa", "alerts"],
 )
 def noaa_alerts_ingestion():
     """
-    Fetch NOAA alerts every 15 minutes and land raw JSON in S3.
+    Fetch NOAA alerts every 15 minutes and land new or changed alerts in S3.
     """
 
     @task
-    def fetch_alerts_to_s3(
-        data_interval_start: Optional[datetime] = None,
-        data_interval_end: Optional[datetime] = None,
-    ) -> str:
-        # Airflow passes these when using the TaskFlow API
-        start = data_interval_start.isoformat() if data_interval_start else None
-        end = data_interval_end.isoformat() if data_interval_end else None
-
-        params = {}
-        if start and end:
-            params["start"] = start
-            params["end"] = end
-
-        resp = requests.get(
-            "https://api.weather.gov/alerts",
-            params=params,
-            headers={
-                "User-Agent": "your-org-noaa-alerts/1.0 (you@example.com)",
-                "Accept": "application/geo+json",
-            },
-            timeout=30,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-
-        ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-        key = f"{S3_PREFIX}/ingest_date={ts[:8]}/ingest_hour={ts[9:11]}/alerts-{ts}.json"
-
-        s3 = S3Hook(aws_conn_id=AWS_CONN_ID)
-        s3.load_bytes(
-            bytes(json.dumps(payload), "utf-8"),
-            key=key,
-            bucket_name=BUCKET_NAME,
-            replace=False,
+    def fetch_alerts_to_s3() -> list[str]:
+        store = S3ObjectStore(BUCKET_NAME, aws_conn_id=AWS_CONN_ID)
+        metrics = IngestionMetrics()
+        with new_session() as session:
+            keys = ingest_alerts(
+                store,
+                session,
+                ALERTS_URL,
+                S3_PREFIX,
+                STATE_KEY,
+                RAW_PREFIX,
+                OUTPUT_FORMATS,
+                COMPRESS_RAW,
+                metrics=metrics,
+            )
+        report(
+            metrics,
+            "alerts_ingestion",
+            get_current_context(),
+            freshness_sla=FRESHNESS_SLA,
+            on_breach=log_freshness_breach,   # swap in paging/Slack here
         )
-        return key
+        return keys
 
     # Trigger the S3 write on each DAG run; no downstream DB work yet.
     fetch_alerts_to_s3()
 
 
-dag = noaa_alerts_ingestion()
\ No newline at end of file
+dag = noaa_alerts_ingestion()
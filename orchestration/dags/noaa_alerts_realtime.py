@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from airflow.decorators import dag
+from airflow.utils.dates import days_ago
+
+from include.noaa.operators import ActiveAlertsOperator
+
+BUCKET_NAME = "noaa-prototype"          # TODO: set this
+S3_PREFIX = "noaa/alerts"                 # same layout as noaa_alerts_ingestion
+OUTPUT_FORMATS = ("ndjson", "parquet")
+RAW_PREFIX = "noaa/raw/alerts_active"
+# Separate from noaa_alerts_ingestion's state so both DAGs can run at once;
+# compaction dedups alerts landed by both.
+STATE_KEY = "noaa/_state/alerts_active.json"
+AWS_CONN_ID = None
+POLL_INTERVAL = 30.0
+FRESHNESS_SLA = timedelta(minutes=2)
+
+
+@dag(
+    schedule="@hourly",                   # each run polls for an hour
+    start_date=days_ago(1),
+    catchup=False,
+    max_active_runs=1,
+    tags=["noaa", "alerts", "realtime"],
+)
+def noaa_alerts_realtime():
+    """
+    Land changes to the active alerts within ~30 seconds, polling from the
+    triggerer with conditional requests.
+    """
+
+    ActiveAlertsOperator(
+        task_id="poll_active_alerts",
+        bucket=BUCKET_NAME,
+        prefix=S3_PREFIX,
+        state_key=STATE_KEY,
+        raw_prefix=RAW_PREFIX,
+        formats=OUTPUT_FORMATS,
+        poll_interval=POLL_INTERVAL,
+        max_runtime=timedelta(hours=1),
+        freshness_sla=FRESHNESS_SLA,
+        aws_conn_id=AWS_CONN_ID,
+    )
+
+
+dag = noaa_alerts_realtime()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from airflow.decorators import dag, task
+from airflow.models import Variable
+from airflow.operators.python import get_current_context
+from airflow.utils.dates import days_ago
+
+from include.noaa.http import NOAA_POOL, shared_rate_limiter, shared_session
+from include.noaa.metrics import IngestionMetrics, report
+from include.noaa.pools import ensure_pool
+from include.noaa.resources import expand_resources, land_resource
+from include.noaa.storage import S3ObjectStore
+
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = "noaa-prototype"          # TODO: set this
+S3_PREFIX = "noaa/resources"
+STATE_PREFIX = "noaa/_state/resources"
+AWS_CONN_ID = None
+# JSON Variable mapping repository methods to IDs (see include/noaa/resources.py).
+RESOURCES_VARIABLE = "noaa_resources"
+DEFAULT_RESOURCES = {
+    "zone_forecast": [{"zone_type": "forecast", "zone_id": "MDZ013"}],
+    "station_observation_latest": ["KDCA"],
+    "latest_product_type_location": [{"type_id": "AFD", "location_id": "LWX"}],
+}
+
+
+@dag(
+    schedule="*/30 * * * *",
+    start_date=days_ago(1),
+    catchup=False,
+    max_active_runs=1,
+    tags=["noaa", "resources"],
+)
+def noaa_resources_ingestion():
+    """
+    Land zone forecasts, station observations, product feeds and other
+    configured resources in S3, one mapped task per resource.
+    """
+
+    @task
+    def create_pool() -> None:
+        # The pool bounding upstream requests across all workers.
+        ensure_pool()
+
+    @task
+    def list_resources() -> list[dict]:
+        config = Variable.get(
+            RESOURCES_VARIABLE, default_var=DEFAULT_RESOURCES, deserialize_json=True
+        )
+        resources = expand_resources(config)
+        logger.info("%d resources configured", len(resources))
+        return resources
+
+    @task(
+        pool=NOAA_POOL,
+        retries=2,
+        map_index_template="{{ task.op_kwargs['resource']['method'] }}",
+    )
+    def land(resource: dict) -> Optional[str]:
+        # The pool bounds concurrent instances across workers; each instance
+        # draws one slot's share of the request budget (see include/noaa/http.py).
+        store = S3ObjectStore(BUCKET_NAME, aws_conn_id=AWS_CONN_ID)
+        metrics = IngestionMetrics()
+        key = land_resource(
+            store,
+            shared_session(),
+            resource,
+            S3_PREFIX,
+            STATE_PREFIX,
+            datetime.now(timezone.utc),
+            limiter=shared_rate_limiter(),
+            metrics=metrics,
+        )
+        report(metrics, "resources_ingestion", get_current_context())
+        logger.info(
+            "%s %s -> %s", resource["method"], resource["params"], key or "not modified"
+        )
+        return key
+
+    create_pool() >> land.expand(resource=list_resources())
+
+
+dag = noaa_resources_ingestion()
@@ -0,0 +1,6 @@
+"""
+Shared helpers for the NOAA ingestion DAGs.
+
+Kept free of Airflow imports (Airflow-specific pieces are imported lazily),
+so the logic can be unit tested outside the Astro runtime.
+"""
@@ -0,0 +1,129 @@
+"""
+Backfill of historical alerts over a date range.
+
+The range is split into fixed windows (`split_windows`) that are fetched
+independently, typically as mapped Airflow tasks. `backfill_window` follows
+the `pagination.next` links of `/alerts?start=...&end=...` and writes every
+page into the regular partition layout, with the window end as the ingestion
+time. After each page it saves a checkpoint holding the next page URL:
+
+    <state_prefix>/20240501T000000Z-20240501T060000Z.json
+
+A failed or interrupted window resumes from its last saved page, and a
+window that has completed is skipped by later runs. Page files are named
+after the window and page number, so a page written again after a crash
+replaces its earlier copy instead of duplicating it. Alerts whose version
+the live ingestion has already written are left out.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from include.noaa.http import DEFAULT_TIMEOUT, RateLimiter, request_url
+from include.noaa.records import write_partitions
+from include.noaa.state import IngestionState
+from include.noaa.storage import ObjectStore
+
+PAGE_LIMIT = 500
+_STAMP = "%Y%m%dT%H%M%SZ"
+
+
+def _utc(value: datetime | str) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def split_windows(
+    start: datetime | str, end: datetime | str, size: timedelta
+) -> list[dict[str, str]]:
+    """Consecutive `[start, end)` windows covering the range, as ISO strings."""
+
+    start, end = _utc(start), _utc(end)
+    if size <= timedelta(0):
+        raise ValueError("window size must be positive")
+    windows = []
+    while start < end:
+        stop = min(start + size, end)
+        windows.append({"start": start.isoformat(), "end": stop.isoformat()})
+        start = stop
+    return windows
+
+
+def window_name(window: dict[str, str]) -> str:
+    return f"{_utc(window['start']):{_STAMP}}-{_utc(window['end']):{_STAMP}}"
+
+
+@dataclass
+class Checkpoint:
+    next_url: str | None = None
+    pages: int = 0
+    records: int = 0
+    keys: list[str] = field(default_factory=list)
+    done: bool = False
+
+    @classmethod
+    def load(cls, store: ObjectStore, key: str) -> Checkpoint:
+        data = store.get(key)
+        return cls() if data is None else cls(**json.loads(data))
+
+    def save(self, store: ObjectStore, key: str) -> None:
+        store.put(key, json.dumps(asdict(self), separators=(",", ":")).encode("utf-8"))
+
+
+def backfill_window(
+    store: ObjectStore,
+    session,
+    window: dict[str, str],
+    prefix: str,
+    state_prefix: str,
+    known: IngestionState | None = None,
+    formats: Iterable[str] = ("ndjson",),
+    limiter: RateLimiter | None = None,
+    page_limit: int = PAGE_LIMIT,
+) -> Checkpoint:
+    """Fetch and write every page of one window, resuming from its checkpoint."""
+
+    checkpoint_key = f"{state_prefix}/{window_name(window)}.json"
+    checkpoint = Checkpoint.load(store, checkpoint_key)
+    if checkpoint.done:
+        return checkpoint
+
+    ingested_at = _utc(window["end"])
+    url = checkpoint.next_url or request_url(
+        "/alerts", {"start": window["start"], "end": window["end"], "limit": page_limit}
+    )
+    while url:
+        if limiter is not None:
+            limiter.acquire()
+        response = session.get(url, timeout=DEFAULT_TIMEOUT)
+        response.raise_for_status()
+        page = response.json()
+        features = page.get("features") or []
+        if known is not None:
+            features = [feature for feature in features if known.is_changed(feature)]
+        keys = write_partitions(
+            store,
+            prefix,
+            features,
+            ingested_at,
+            formats,
+            suffix=f"backfill-p{checkpoint.pages:04d}",
+        )
+
+        # An empty page ends the window even if a next link is present.
+        next_url = (page.get("pagination") or {}).get("next")
+        checkpoint.next_url = next_url if page.get("features") else None
+        checkpoint.pages += 1
+        checkpoint.records += len(features)
+        checkpoint.keys += [key for key in keys if key not in checkpoint.keys]
+        checkpoint.done = checkpoint.next_url is None
+        checkpoint.save(store, checkpoint_key)
+        url = checkpoint.next_url
+    return checkpoint
@@ -0,0 +1,203 @@
+"""
+Compaction of the 15-minute alert partitions into hourly and daily files.
+
+Every ingestion run adds one small NDJSON object per event type under
+`<prefix>/ingest_date=.../ingest_hour=.../event=...`. Compaction merges them
+into one file per hour and one per day:
+
+    <out>/hourly/ingest_date=20240501/ingest_hour=13/alerts.parquet
+    <out>/daily/ingest_date=20240501/alerts.parquet
+
+Each alert id is kept once, in its latest version (`updated`, then
+`ingested_at`). Rows are sorted by event, updated time and id, so the Parquet
+min/max statistics of each row group let readers skip what a filter on event
+or time excludes.
+
+A `_manifest.json` next to each output lists the source partitions it was
+built from, with their version tags (size and mtime locally, ETag on S3). A
+rerun over unchanged sources does nothing. A rerun after new or rewritten
+sources (a resumed backfill rewrites its pages in place) rewrites the output. Outputs are deterministic, so reruns are
+idempotent. Source partitions are left in place.
+
+The manifest also carries `stats` about the output: the UTC range of `sent`
+and the events, severities and zone ids present. Readers use them as a
+partition index and open only the files a query can match.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import re
+from datetime import date, datetime, timezone
+from typing import Iterable
+
+from include.noaa.records import encode_ndjson_gz, encode_parquet
+
+MANIFEST = "_manifest.json"
+ROW_GROUP_SIZE = 50_000
+_EXTENSIONS = {"parquet": "parquet", "ndjson": "ndjson.gz"}
+_OLDEST = datetime.min.replace(tzinfo=timezone.utc)
+_INGEST_DATE = re.compile(r"/ingest_date=(\d{8})/")
+
+
+def _timestamp(value: str | None) -> datetime:
+    if not value:
+        return _OLDEST
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return _OLDEST
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _version(record: dict) -> tuple[datetime, datetime]:
+    return _timestamp(record.get("updated")), _timestamp(record.get("ingested_at"))
+
+
+def merge_records(records: Iterable[dict]) -> list[dict]:
+    """Latest version of every alert id, sorted by event, updated time and id."""
+
+    latest: dict[str, dict] = {}
+    for record in records:
+        known = latest.get(record["id"])
+        if known is None or _version(record) >= _version(known):
+            latest[record["id"]] = record
+    return sorted(
+        latest.values(),
+        key=lambda r: (r.get("event") or "", _timestamp(r.get("updated")), r["id"]),
+    )
+
+
+def _zone_ids(affected_zones: str | None) -> list[str]:
+    try:
+        urls = json.loads(affected_zones) if affected_zones else []
+    except ValueError:
+        return []
+    return [url.rstrip("/").rpartition("/")[2] for url in urls if isinstance(url, str)]
+
+
+def file_stats(records: list[dict]) -> dict:
+    """Index entry of a compacted file (see the module docstring)."""
+
+    sent = [_timestamp(r.get("sent")) for r in records if r.get("sent")]
+    sent = [stamp.astimezone(timezone.utc) for stamp in sent if stamp != _OLDEST]
+    return {
+        "sent_min": min(sent).isoformat() if sent else None,
+        "sent_max": max(sent).isoformat() if sent else None,
+        "events": sorted({r["event"] for r in records if r.get("event")}),
+        "severities": sorted({r["severity"] for r in records if r.get("severity")}),
+        "zones": sorted({z for r in records for z in _zone_ids(r.get("affected_zones"))}),
+    }
+
+
+def decode(key: str, data: bytes) -> list[dict]:
+    if key.endswith(".ndjson.gz"):
+        return [json.loads(line) for line in gzip.decompress(data).splitlines() if line]
+    if key.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(io.BytesIO(data)).to_pylist()
+    raise ValueError(f"unsupported alert file {key}")
+
+
+def encode(records: list[dict], fmt: str) -> bytes:
+    if fmt == "parquet":
+        return encode_parquet(records, row_group_size=ROW_GROUP_SIZE)
+    return encode_ndjson_gz(records)
+
+
+def hour_sources(store, prefix: str, day: date, hour: int) -> dict[str, str]:
+    """NDJSON partitions written during one ingestion hour, with their versions."""
+
+    hour_prefix = f"{prefix}/ingest_date={day:%Y%m%d}/ingest_hour={hour:02d}/"
+    versions = store.versions(hour_prefix)
+    return {key: tag for key, tag in versions.items() if key.endswith(".ndjson.gz")}
+
+
+def partition_days(keys: Iterable[str]) -> list[date]:
+    """Ingestion days of the given partition keys, e.g. the pages of a backfill."""
+
+    days = {match[1] for key in keys if (match := _INGEST_DATE.search(key))}
+    return [datetime.strptime(day, "%Y%m%d").date() for day in sorted(days)]
+
+
+def hourly_key(out_prefix: str, day: date, hour: int, fmt: str = "parquet") -> str:
+    return (
+        f"{out_prefix}/hourly/ingest_date={day:%Y%m%d}/ingest_hour={hour:02d}/"
+        f"alerts.{_EXTENSIONS[fmt]}"
+    )
+
+
+def daily_key(out_prefix: str, day: date, fmt: str = "parquet") -> str:
+    return f"{out_prefix}/daily/ingest_date={day:%Y%m%d}/alerts.{_EXTENSIONS[fmt]}"
+
+
+def _manifest_key(key: str) -> str:
+    return f"{key.rpartition('/')[0]}/{MANIFEST}"
+
+
+def compact(
+    store,
+    sources: dict[str, str],
+    target: str,
+    fmt: str = "parquet",
+    inputs: list[str] | None = None,
+) -> bool:
+    """
+    Merge `inputs` into `target`; returns False when it was already up to date.
+
+    `sources` maps the 15-minute partitions the output derives from to their
+    versions and is what the manifest compares; `inputs` (default: the
+    sources) are the files actually merged. The manifest is written after the
+    output, so an interrupted run is simply redone by the next one.
+    """
+
+    inputs = sorted(sources) if inputs is None else inputs
+    if not inputs:
+        return False
+    manifest_key = _manifest_key(target)
+    manifest = store.get(manifest_key)
+    if manifest is not None and json.loads(manifest).get("sources") == sources:
+        return False
+
+    records = merge_records(
+        record for key in inputs for record in decode(key, store.get(key) or b"")
+    )
+    store.put(target, encode(records, fmt))
+    document = {"sources": sources, "records": len(records), "stats": file_stats(records)}
+    store.put(manifest_key, json.dumps(document, separators=(",", ":")).encode("utf-8"))
+    return True
+
+
+def compact_hour(
+    store, prefix: str, out_prefix: str, day: date, hour: int, fmt: str = "parquet"
+) -> str | None:
+    """Compact one ingestion hour; returns the output key (None if the hour is empty)."""
+
+    sources = hour_sources(store, prefix, day, hour)
+    if not sources:
+        return None
+    target = hourly_key(out_prefix, day, hour, fmt)
+    compact(store, sources, target, fmt)
+    return target
+
+
+def compact_day(
+    store, prefix: str, out_prefix: str, day: date, fmt: str = "parquet"
+) -> str | None:
+    """Compact a day from its hourly files, bringing those up to date first."""
+
+    hourly, lineage = [], {}
+    for hour in range(24):
+        sources = hour_sources(store, prefix, day, hour)
+        if sources:
+            hourly.append(hourly_key(out_prefix, day, hour, fmt))
+            compact(store, sources, hourly[-1], fmt)
+            lineage.update(sources)
+    if not hourly:
+        return None
+    target = daily_key(out_prefix, day, fmt)
+    compact(store, lineage, target, fmt, hourly)
+    return target
@@ -0,0 +1,139 @@
+"""
+HTTP access to api.weather.gov for the ingestion tasks.
+
+Sessions pool connections and retry 429/5xx answers with backoff, honouring
+`Retry-After`.
+
+`shared_session` and `shared_rate_limiter` are cached per process. Airflow
+runs each task instance in its own process, so they are shared by the
+requests of one task, not by the tasks of a worker. The global request budget
+is enforced by the `NOAA_POOL` Airflow pool instead: at most `NOAA_POOL_SLOTS`
+pooled tasks run at once across all workers, and each one is limited to
+`NOAA_RATE_LIMIT / NOAA_POOL_SLOTS` requests per second, so together they
+stay within `NOAA_RATE_LIMIT`.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+NOAA_BASE_URL = os.environ.get("NOAA_BASE_URL", "https://api.weather.gov")
+USER_AGENT = os.environ.get(
+    "NOAA_USER_AGENT", "your-org-noaa-alerts/1.0 (you@example.com)"
+)
+NOAA_RATE_LIMIT = float(os.environ.get("NOAA_RATE_LIMIT", "5"))
+# Must match the slot count of the `NOAA_POOL` Airflow pool.
+NOAA_POOL = os.environ.get("NOAA_POOL", "noaa_api")
+NOAA_POOL_SLOTS = int(os.environ.get("NOAA_POOL_SLOTS", "8"))
+DEFAULT_TIMEOUT = 30
+POOL_SIZE = 16
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Wait for a token; returns the seconds waited."""
+
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+def new_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(
+        {"User-Agent": USER_AGENT, "Accept": "application/geo+json"}
+    )
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@lru_cache
+def shared_session() -> requests.Session:
+    return new_session()
+
+
+@lru_cache
+def shared_rate_limiter() -> RateLimiter:
+    """This task's share of the `NOAA_RATE_LIMIT` budget (one pool slot)."""
+
+    rate = NOAA_RATE_LIMIT / max(1, NOAA_POOL_SLOTS)
+    return RateLimiter(rate, burst=max(1, int(rate)))
+
+
+def request_url(path: str, params: dict | None = None) -> str:
+    url = NOAA_BASE_URL.rstrip("/") + path
+    return f"{url}?{urlencode(sorted(params.items()), doseq=True)}" if params else url
+
+
+def conditional_get(
+    session: requests.Session,
+    url: str,
+    validators: dict[str, str] | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    stream: bool = False,
+    limiter: RateLimiter | None = None,
+) -> tuple[requests.Response | None, dict[str, str]]:
+    """
+    GET `url` with `If-None-Match` / `If-Modified-Since` from a previous response.
+
+    Returns `(None, validators)` when the server answers 304 Not Modified,
+    otherwise the response and the validators to send next time.
+    """
+
+    headers = {}
+    validators = validators or {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    if limiter is not None:
+        limiter.acquire()
+    response = session.get(url, headers=headers, timeout=timeout, stream=stream)
+    if response.status_code == 304:
+        response.close()
+        return None, validators
+    response.raise_for_status()
+    fresh = {}
+    if response.headers.get("ETag"):
+        fresh["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        fresh["last_modified"] = response.headers["Last-Modified"]
+    return response, fresh
@@ -0,0 +1,148 @@
+"""
+One conditional, streaming ingestion pass over an alerts collection URL.
+
+Shared by the scheduled and the near-real-time ingestion DAGs: the body is
+archived raw and parsed in a single pass (see `include.noaa.streaming`), only
+alerts that are new or changed since the state document was last saved are
+written to the partition layout, and the state is saved after the writes.
+Paginated collections are followed until a page brings nothing new.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Iterable
+
+from include.noaa.http import RateLimiter, conditional_get
+from include.noaa.metrics import IngestionMetrics
+from include.noaa.records import write_partitions
+from include.noaa.state import IngestionState, alert_id, alert_version
+from include.noaa.storage import ObjectStore
+from include.noaa.streaming import (
+    CHUNK_SIZE,
+    NextLink,
+    archive_chunks,
+    iter_features,
+    raw_archive_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Pages followed per pass (of up to `limit` alerts each).
+MAX_PAGES = 20
+
+
+def ingest_alerts(
+    store: ObjectStore,
+    session,
+    url: str,
+    prefix: str,
+    state_key: str,
+    raw_prefix: str,
+    formats: Iterable[str] = ("ndjson",),
+    compress_raw: bool = True,
+    limiter: RateLimiter | None = None,
+    ingested_at: datetime | None = None,
+    metrics: IngestionMetrics | None = None,
+    max_pages: int = MAX_PAGES,
+) -> list[str]:
+    """
+    Land the new or changed alerts of `url`; returns the partition keys written.
+
+    Only the first page is requested conditionally; `pagination.next` is then
+    followed, newest alerts first, until a page holds no new or changed alert
+    (or after `max_pages`), so bursts larger than one page are not lost.
+    Timings, volumes and freshness of the pass are recorded into `metrics`.
+    """
+
+    started = time.perf_counter()
+    metrics = IngestionMetrics() if metrics is None else metrics
+    state = IngestionState.load(store, state_key)
+    ingested_at = ingested_at or datetime.now(timezone.utc)
+    versions: dict[str | None, str | None] = {}
+    changed_on_page = 0
+
+    def _counted(chunks):
+        for chunk in chunks:
+            metrics.payload_bytes += len(chunk)
+            yield chunk
+
+    def _observed(features):
+        for feature in features:
+            versions[alert_id(feature)] = alert_version(feature)
+            yield feature
+
+    def _landed(features):
+        nonlocal changed_on_page
+        for feature in features:
+            changed_on_page += 1
+            metrics.observe_landed(feature, ingested_at)
+            yield feature
+
+    resp, validators = conditional_get(
+        session, url, state.validators.get(url), stream=True, limiter=limiter
+    )
+    metrics.fetch_seconds = time.perf_counter() - started
+    if resp is None:
+        metrics.total_seconds = time.perf_counter() - started
+        logger.info("alerts not modified since the last run")
+        return []
+
+    keys: list[str] = []
+    page = 0
+    while resp is not None:
+        # One pass over the body: archive it, parse features one at a time and
+        # write only the changed ones, so memory stays flat.
+        name = f"alerts-p{page:04d}" if page else "alerts"
+        raw_key = raw_archive_key(raw_prefix, ingested_at, compress_raw, name=name)
+        link = NextLink()
+        changed_on_page = 0
+        with resp, store.open_writer(raw_key) as raw:
+            body = archive_chunks(
+                link.watch(_counted(resp.iter_content(CHUNK_SIZE))), raw, compress_raw
+            )
+            changed = (
+                feature
+                for feature in _observed(iter_features(body))
+                if state.is_changed(feature)
+            )
+            suffix = f"p{page:04d}" if page else None
+            keys += write_partitions(
+                store, prefix, _landed(changed), ingested_at, formats, suffix=suffix
+            )
+            # Drain anything after the features array into the archive.
+            for _ in body:
+                pass
+        metrics.archived_bytes += raw.bytes_written
+        metrics.upload_seconds += raw.seconds
+        logger.info("page %d archived to %s (%d bytes)", page, raw_key, raw.bytes_written)
+        page += 1
+
+        # Later pages are older; one with nothing new means the rest is landed.
+        next_url = link.url if changed_on_page else None
+        if next_url and page >= max_pages:
+            logger.warning("stopped after %d pages; %s not fetched", page, next_url)
+            next_url = None
+        resp = None
+        if next_url:
+            resp, _ = conditional_get(session, next_url, stream=True, limiter=limiter)
+
+    # One feed per state document: validators of any other URL are stale.
+    state.remember(url, validators, limit=1)
+    metrics.records = len(versions)
+    metrics.partitions = len(keys)
+    logger.info(
+        "%d alerts fetched in %d pages, %d partitions written",
+        len(versions),
+        page,
+        len(keys),
+    )
+
+    # Only after the write succeeded, so a failed run is retried in full.
+    state.mark_versions(versions)
+    state.prune()
+    state.save(store, state_key)
+    metrics.total_seconds = time.perf_counter() - started
+    return keys
@@ -0,0 +1,122 @@
+"""
+Performance metrics of the ingestion tasks.
+
+Each ingestion pass fills an `IngestionMetrics`, and `report` sends it to
+three places:
+
+- the task log, as one JSON line;
+- XCom, under the `metrics` key;
+- Airflow's `Stats` client, and so whichever StatsD/OpenTelemetry backend
+  the deployment configures, under `noaa.<task>.<metric>`.
+
+Freshness lag is how long after its last upstream update (`updated`, else
+`sent`) an alert landed, taken over the alerts written in the pass. `report`
+invokes the breach callback when the worst lag exceeds the SLA. The first
+run after a long pause therefore reports the pause.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from include.noaa.state import alert_version
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "noaa"
+_COUNTERS = ("payload_bytes", "archived_bytes", "records", "changed_records", "partitions")
+
+
+@dataclass
+class IngestionMetrics:
+    fetch_seconds: float = 0.0  # request sent -> response headers
+    total_seconds: float = 0.0
+    payload_bytes: int = 0  # as received (after transfer decoding)
+    archived_bytes: int = 0
+    upload_seconds: float = 0.0
+    records: int = 0
+    changed_records: int = 0
+    partitions: int = 0
+    freshness_lag_seconds: float | None = None
+
+    @property
+    def upload_bytes_per_second(self) -> float | None:
+        if not self.upload_seconds:
+            return None
+        return self.archived_bytes / self.upload_seconds
+
+    def observe_landed(self, feature: dict, landed_at: datetime) -> None:
+        """Count a written alert and fold its lag into the freshness lag."""
+
+        self.changed_records += 1
+        version = alert_version(feature)
+        try:
+            updated = datetime.fromisoformat(version) if version else None
+        except ValueError:
+            updated = None
+        if updated is None:
+            return
+        if updated.tzinfo is None:
+            updated = updated.replace(tzinfo=timezone.utc)
+        lag = max(0.0, (landed_at - updated).total_seconds())
+        if self.freshness_lag_seconds is None or lag > self.freshness_lag_seconds:
+            self.freshness_lag_seconds = lag
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["upload_bytes_per_second"] = self.upload_bytes_per_second
+        return data
+
+
+def _airflow_stats():
+    try:
+        from airflow.stats import Stats
+    except ImportError:
+        return None
+    return Stats
+
+
+def log_freshness_breach(context, data: dict) -> None:
+    logger.error(
+        "freshness SLA missed: alerts landed %.0fs after their last update",
+        data["freshness_lag_seconds"],
+    )
+
+
+def report(
+    metrics: IngestionMetrics,
+    task: str,
+    context: dict | None = None,
+    freshness_sla: timedelta | None = None,
+    on_breach: Callable[[dict | None, dict], None] | None = None,
+    sink=None,
+) -> dict:
+    """Log, push and emit `metrics`; returns them as a dict."""
+
+    data = metrics.as_dict()
+    logger.info("ingestion metrics %s", json.dumps({"task": task, **data}))
+    if context is not None and context.get("ti") is not None:
+        context["ti"].xcom_push(key="metrics", value=data)
+
+    sink = _airflow_stats() if sink is None else sink
+    name = f"{METRIC_PREFIX}.{task}"
+    if sink is not None:
+        for key in ("fetch_seconds", "total_seconds", "upload_seconds"):
+            sink.timing(f"{name}.{key}", timedelta(seconds=data[key]))
+        for key in _COUNTERS:
+            sink.incr(f"{name}.{key}", data[key])
+        if data["upload_bytes_per_second"] is not None:
+            sink.gauge(f"{name}.upload_bytes_per_second", data["upload_bytes_per_second"])
+        if data["freshness_lag_seconds"] is not None:
+            sink.gauge(f"{name}.freshness_lag_seconds", data["freshness_lag_seconds"])
+
+    lag = data["freshness_lag_seconds"]
+    if freshness_sla is not None and lag is not None and lag > freshness_sla.total_seconds():
+        if sink is not None:
+            sink.incr(f"{name}.freshness_sla_miss")
+        (on_breach or log_freshness_breach)(context, data)
+    return data
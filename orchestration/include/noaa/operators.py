@@ -0,0 +1,105 @@
+"""
+Operators for the NOAA ingestion DAGs.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from typing import Any, Iterable
+
+from airflow.models import BaseOperator
+
+from include.noaa.http import new_session, request_url
+from include.noaa.ingest import ingest_alerts
+from include.noaa.metrics import IngestionMetrics, report
+from include.noaa.realtime import DEFAULT_POLL_INTERVAL
+from include.noaa.storage import S3ObjectStore
+from include.noaa.triggers import ActiveAlertsTrigger
+
+
+class ActiveAlertsOperator(BaseOperator):
+    """
+    Land changes to `/alerts/active` within one poll interval of upstream.
+
+    The task defers to `ActiveAlertsTrigger` and only occupies a worker slot
+    while a change is being written. It returns after `max_runtime` with the
+    number of partitions written, so a schedule of the same period keeps
+    polling continuous.
+    """
+
+    def __init__(
+        self,
+        *,
+        bucket: str,
+        prefix: str,
+        state_key: str,
+        raw_prefix: str,
+        formats: Iterable[str] = ("ndjson",),
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        max_runtime: timedelta = timedelta(hours=1),
+        freshness_sla: timedelta | None = None,
+        on_freshness_breach=None,
+        aws_conn_id: str | None = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.state_key = state_key
+        self.raw_prefix = raw_prefix
+        self.formats = tuple(formats)
+        self.poll_interval = poll_interval
+        self.max_runtime = max_runtime
+        self.freshness_sla = freshness_sla
+        self.on_freshness_breach = on_freshness_breach
+        self.aws_conn_id = aws_conn_id
+
+    def execute(self, context: Any) -> None:
+        # No digest yet: the first poll fires and catches up on anything that
+        # changed since the previous run ended.
+        end_at = time.time() + self.max_runtime.total_seconds()
+        self._defer(end_at, {}, None, 0)
+
+    def _defer(self, end_at: float, validators: dict, digest: str | None, written: int):
+        self.defer(
+            trigger=ActiveAlertsTrigger(
+                request_url("/alerts/active"),
+                end_at,
+                validators,
+                digest,
+                self.poll_interval,
+            ),
+            method_name="execute_complete",
+            kwargs={"end_at": end_at, "written": written},
+        )
+
+    def execute_complete(
+        self, context: Any, event: dict, end_at: float, written: int
+    ) -> int:
+        if event["status"] == "changed":
+            store = S3ObjectStore(self.bucket, aws_conn_id=self.aws_conn_id)
+            metrics = IngestionMetrics()
+            with new_session() as session:
+                keys = ingest_alerts(
+                    store,
+                    session,
+                    request_url("/alerts/active"),
+                    self.prefix,
+                    self.state_key,
+                    self.raw_prefix,
+                    self.formats,
+                    metrics=metrics,
+                )
+            written += len(keys)
+            self.log.info("active alerts changed, %d partitions written", len(keys))
+            report(
+                metrics,
+                "alerts_realtime",
+                context,
+                freshness_sla=self.freshness_sla,
+                on_breach=self.on_freshness_breach,
+            )
+        if event["status"] == "timeout" or time.time() >= end_at:
+            return written
+        self._defer(end_at, event["validators"], event["digest"], written)
@@ -0,0 +1,33 @@
+"""
+The Airflow pool bounding concurrent requests to api.weather.gov.
+
+Tasks assigned to a pool that does not exist are never scheduled, so the
+DAGs that use `NOAA_POOL` create it in an unpooled first task. An existing
+pool is left as is, so slots adjusted by an operator are kept.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from include.noaa.http import NOAA_POOL, NOAA_POOL_SLOTS
+
+logger = logging.getLogger(__name__)
+
+POOL_DESCRIPTION = "Upstream requests to api.weather.gov"
+
+
+def ensure_pool(
+    name: str = NOAA_POOL,
+    slots: int = NOAA_POOL_SLOTS,
+    description: str = POOL_DESCRIPTION,
+) -> bool:
+    """Create the pool if it is missing; returns True when it was created."""
+
+    from airflow.models.pool import Pool
+
+    if Pool.get_pool(name) is not None:
+        return False
+    Pool.create_or_update_pool(name, slots, description, include_deferred=False)
+    logger.info("created pool %s with %d slots", name, slots)
+    return True
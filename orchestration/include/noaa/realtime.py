@@ -0,0 +1,44 @@
+"""
+Change detection for near-real-time polling of `/alerts/active`.
+
+`poll_once` makes one conditional request and reduces the answer to a digest
+of the active alert set (ids and versions). A poller only needs to keep the
+validators and the last digest between polls, both small enough to travel
+in a deferred trigger's kwargs, and reports a change only when the digest
+differs. A new ETag over identical content is not a change.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable
+
+from include.noaa.http import RateLimiter, conditional_get
+from include.noaa.state import alert_id, alert_version
+from include.noaa.streaming import CHUNK_SIZE, iter_features
+
+DEFAULT_POLL_INTERVAL = 30.0
+
+
+def active_digest(features: Iterable[dict]) -> str:
+    """Order-independent digest of the `(id, version)` pairs of `features`."""
+
+    pairs = sorted(f"{alert_id(f)}@{alert_version(f)}" for f in features)
+    return hashlib.sha256("\n".join(pairs).encode("utf-8")).hexdigest()
+
+
+def poll_once(
+    session,
+    url: str,
+    validators: dict[str, str] | None = None,
+    limiter: RateLimiter | None = None,
+) -> tuple[dict[str, str], str | None]:
+    """`(validators, digest)`; the digest is None when the server answered 304."""
+
+    resp, validators = conditional_get(
+        session, url, validators, stream=True, limiter=limiter
+    )
+    if resp is None:
+        return validators, None
+    with resp:
+        return validators, active_digest(iter_features(resp.iter_content(CHUNK_SIZE)))
@@ -0,0 +1,171 @@
+"""
+Flat alert records and their partitioned, compressed encodings.
+
+Every alert feature becomes one record with a fixed set of columns
+(`ALERT_COLUMNS`); nested values (affected zones, geometry, parameters) are
+kept as JSON text so the schema never changes with the payload. Records are
+written as gzip-compressed NDJSON and, when pyarrow is installed, as Parquet,
+under Hive-style partitions:
+
+    <prefix>/ingest_date=20240501/ingest_hour=13/event=tornado_warning/
+        alerts-20240501T131500Z.ndjson.gz
+
+NDJSON partitions are streamed to the store record by record; Parquet
+partitions are buffered per event type and written as one row group.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import re
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from typing import Iterable
+
+# Column name -> source property ("" for values computed here). All strings.
+ALERT_COLUMNS = {
+    "id": "id",
+    "event": "event",
+    "status": "status",
+    "message_type": "messageType",
+    "category": "category",
+    "severity": "severity",
+    "certainty": "certainty",
+    "urgency": "urgency",
+    "sent": "sent",
+    "effective": "effective",
+    "onset": "onset",
+    "expires": "expires",
+    "ends": "ends",
+    "updated": "updated",
+    "area_desc": "areaDesc",
+    "sender_name": "senderName",
+    "headline": "headline",
+    "description": "description",
+    "instruction": "instruction",
+    "response": "response",
+    "affected_zones": "affectedZones",
+    "parameters": "parameters",
+    "geometry": "",
+    "ingested_at": "",
+}
+
+FORMATS = ("ndjson", "parquet")
+_EXTENSIONS = {"ndjson": "ndjson.gz", "parquet": "parquet"}
+
+
+def _text(value) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"), sort_keys=True)
+
+
+def alert_record(feature: dict, ingested_at: datetime) -> dict:
+    properties = feature.get("properties") or {}
+    record = {
+        column: _text(properties.get(source)) if source else None
+        for column, source in ALERT_COLUMNS.items()
+    }
+    record["id"] = feature.get("id") or record["id"]
+    record["updated"] = record["updated"] or record["sent"]
+    record["geometry"] = _text(feature.get("geometry"))
+    record["ingested_at"] = ingested_at.astimezone(timezone.utc).isoformat()
+    return record
+
+
+def event_slug(event: str | None) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "_", (event or "unknown").lower()).strip("_")
+    return slug or "unknown"
+
+
+def partition_prefix(prefix: str, ingested_at: datetime, event: str | None = None) -> str:
+    ts = ingested_at.astimezone(timezone.utc)
+    path = f"{prefix}/ingest_date={ts:%Y%m%d}/ingest_hour={ts:%H}"
+    return path if event is None else f"{path}/event={event_slug(event)}"
+
+
+def encode_ndjson_gz(records: Iterable[dict], level: int = 6) -> bytes:
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=level, mtime=0) as out:
+        for record in records:
+            out.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+    return buffer.getvalue()
+
+
+def parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema([(column, pa.string()) for column in ALERT_COLUMNS])
+
+
+def encode_parquet(records: list[dict], row_group_size: int | None = None) -> bytes:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pylist(records, schema=parquet_schema())
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="zstd", row_group_size=row_group_size)
+    return buffer.getvalue()
+
+
+def available_formats(formats: Iterable[str]) -> list[str]:
+    """`formats` minus Parquet when pyarrow is not installed."""
+
+    formats = [fmt for fmt in formats if fmt in FORMATS]
+    if "parquet" in formats:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            formats.remove("parquet")
+    return formats
+
+
+def write_partitions(
+    store,
+    prefix: str,
+    features: Iterable[dict],
+    ingested_at: datetime,
+    formats: Iterable[str] = ("ndjson",),
+    suffix: str | None = None,
+) -> list[str]:
+    """
+    Write `features` grouped by event type; returns the keys written.
+
+    `features` is consumed once and may be a lazy iterator; if consuming it
+    fails, no partition is written. `suffix` distinguishes several writes
+    sharing one `ingested_at` (`alerts-<stamp>-<suffix>`).
+    """
+
+    formats = available_formats(formats)
+    stamp = ingested_at.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    if suffix:
+        stamp = f"{stamp}-{suffix}"
+    events: set[str] = set()
+    ndjson: dict[str, gzip.GzipFile] = {}
+    parquet: dict[str, list[dict]] = {}
+
+    def _key(event: str, fmt: str) -> str:
+        base = f"{partition_prefix(prefix, ingested_at, event)}/alerts-{stamp}"
+        return f"{base}.{_EXTENSIONS[fmt]}"
+
+    with ExitStack() as stack:
+        for feature in features:
+            record = alert_record(feature, ingested_at)
+            event = event_slug(record["event"])
+            events.add(event)
+            if "ndjson" in formats:
+                if event not in ndjson:
+                    writer = stack.enter_context(store.open_writer(_key(event, "ndjson")))
+                    ndjson[event] = stack.enter_context(
+                        gzip.GzipFile(fileobj=writer, mode="wb", mtime=0)
+                    )
+                line = json.dumps(record, separators=(",", ":")).encode("utf-8")
+                ndjson[event].write(line + b"\n")
+            if "parquet" in formats:
+                parquet.setdefault(event, []).append(record)
+        for event, records in parquet.items():
+            store.put(_key(event, "parquet"), encode_parquet(records))
+
+    return [_key(event, fmt) for event in sorted(events) for fmt in formats]
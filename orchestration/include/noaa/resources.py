@@ -0,0 +1,136 @@
+"""
+Configurable api.weather.gov resources landed as raw JSON in the object store.
+
+Resources are named after the `NOAARepository` methods of the API service
+(`zone_forecast`, `station_observation_latest`, ...) with the same
+parameters. The service itself is not part of the Airflow image, so the
+paths are mirrored in `ENDPOINTS`. A configuration maps each method to the
+IDs to fetch:
+
+    {
+        "station_observation_latest": ["KDCA", "KBWI"],
+        "zone_forecast": [{"zone_type": "forecast", "zone_id": "MDZ013"}],
+        "alerts_active": [{}]
+    }
+
+`expand_resources` turns it into one small dict per resource, suitable for
+dynamic task mapping. `land_resource` fetches one resource conditionally and
+streams the body to
+
+    <prefix>/<method>/ingest_date=20240501/ingest_hour=13/<id>-20240501T131500Z.json.gz
+
+Each resource keeps its own validators document, so mapped tasks never
+contend for shared state.
+"""
+
+from __future__ import annotations
+
+import re
+import string
+import time
+from datetime import datetime
+
+from include.noaa.http import RateLimiter, conditional_get, request_url
+from include.noaa.metrics import IngestionMetrics
+from include.noaa.state import IngestionState
+from include.noaa.storage import ObjectStore
+from include.noaa.streaming import CHUNK_SIZE, archive_chunks, raw_archive_key
+
+# Repository method -> path template.
+ENDPOINTS = {
+    "alerts_active": "/alerts/active",
+    "alerts_active_zone": "/alerts/active/zone/{zone_id}",
+    "gridpoint_forecast": "/gridpoints/{wfo}/{x},{y}/forecast",
+    "gridpoint_forecast_hourly": "/gridpoints/{wfo}/{x},{y}/forecast/hourly",
+    "latest_product_type_location": "/products/types/{type_id}/locations/{location_id}/latest",
+    "products_type_location": "/products/types/{type_id}/locations/{location_id}",
+    "station_observation_latest": "/stations/{station_id}/observations/latest",
+    "zone_forecast": "/zones/{zone_type}/{zone_id}/forecast",
+}
+
+
+def endpoint_params(method: str) -> list[str]:
+    return [
+        field
+        for _, field, _, _ in string.Formatter().parse(ENDPOINTS[method])
+        if field
+    ]
+
+
+def expand_resources(config: dict[str, list]) -> list[dict]:
+    """
+    One `{"method", "params"}` dict per configured resource, in config order.
+
+    Single-parameter methods accept bare IDs. Raises ValueError for unknown
+    methods or missing/extra parameters.
+    """
+
+    resources, seen = [], set()
+    for method, entries in config.items():
+        if method not in ENDPOINTS:
+            raise ValueError(f"unknown resource method {method!r}")
+        names = endpoint_params(method)
+        for entry in entries:
+            if not isinstance(entry, dict):
+                if len(names) != 1:
+                    raise ValueError(f"{method} needs parameters {names}, got {entry!r}")
+                entry = {names[0]: entry}
+            params = {name: str(value) for name, value in entry.items()}
+            if sorted(params) != sorted(names):
+                raise ValueError(f"{method} needs parameters {names}, got {sorted(params)}")
+            identity = (method, tuple(sorted(params.items())))
+            if identity not in seen:
+                seen.add(identity)
+                resources.append({"method": method, "params": params})
+    return resources
+
+
+def resource_path(resource: dict) -> str:
+    return ENDPOINTS[resource["method"]].format(**resource["params"])
+
+
+def resource_slug(resource: dict) -> str:
+    names = endpoint_params(resource["method"])
+    values = "_".join(resource["params"][name] for name in names)
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", values) or resource["method"]
+
+
+def land_resource(
+    store: ObjectStore,
+    session,
+    resource: dict,
+    prefix: str,
+    state_prefix: str,
+    ingested_at: datetime,
+    limiter: RateLimiter | None = None,
+    compress: bool = True,
+    metrics: IngestionMetrics | None = None,
+) -> str | None:
+    """Stream one resource to the store; returns its key (None when not modified)."""
+
+    started = time.perf_counter()
+    metrics = IngestionMetrics() if metrics is None else metrics
+    method, slug = resource["method"], resource_slug(resource)
+    url = request_url(resource_path(resource))
+    state_key = f"{state_prefix}/{method}/{slug}.json"
+    state = IngestionState.load(store, state_key)
+
+    resp, validators = conditional_get(
+        session, url, state.validators.get(url), stream=True, limiter=limiter
+    )
+    metrics.fetch_seconds = time.perf_counter() - started
+    if resp is None:
+        metrics.total_seconds = time.perf_counter() - started
+        return None
+    key = raw_archive_key(f"{prefix}/{method}", ingested_at, compress, name=slug)
+    with resp, store.open_writer(key) as writer:
+        for chunk in archive_chunks(resp.iter_content(CHUNK_SIZE), writer, compress):
+            metrics.payload_bytes += len(chunk)
+
+    state.remember(url, validators)
+    state.save(store, state_key)
+    metrics.archived_bytes = writer.bytes_written
+    metrics.upload_seconds = writer.seconds
+    metrics.partitions = 1
+    metrics.total_seconds = time.perf_counter() - started
+    return key
@@ -0,0 +1,87 @@
+"""
+Small JSON state document persisted in the object store between runs.
+
+It holds the HTTP validators (`ETag` / `Last-Modified`) of previous requests,
+keyed by request URL, and the version (`updated`, else `sent`) of every alert
+already written, so each run only writes alerts that are new or changed.
+Alerts not seen for `retention` seconds are forgotten.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from include.noaa.storage import ObjectStore
+
+DEFAULT_RETENTION = 14 * 24 * 3600
+
+
+def alert_version(feature: dict) -> str | None:
+    properties = feature.get("properties") or {}
+    return properties.get("updated") or properties.get("sent")
+
+
+def alert_id(feature: dict) -> str | None:
+    return feature.get("id") or (feature.get("properties") or {}).get("id")
+
+
+@dataclass
+class IngestionState:
+    validators: dict[str, dict[str, str]] = field(default_factory=dict)
+    # alert id -> [version, last seen (unix seconds)]
+    seen: dict[str, list] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, store: ObjectStore, key: str) -> IngestionState:
+        data = store.get(key)
+        if data is None:
+            return cls()
+        document = json.loads(data)
+        return cls(document.get("validators", {}), document.get("seen", {}))
+
+    def save(self, store: ObjectStore, key: str) -> None:
+        document = {"validators": self.validators, "seen": self.seen}
+        store.put(key, json.dumps(document, separators=(",", ":")).encode("utf-8"))
+
+    def remember(self, url: str, validators: dict[str, str], limit: int = 64) -> None:
+        """Store the validators of `url`, keeping only the most recent URLs."""
+
+        self.validators.pop(url, None)
+        if validators:
+            self.validators[url] = validators
+        for stale in list(self.validators)[:-limit]:
+            del self.validators[stale]
+
+    def is_changed(self, feature: dict) -> bool:
+        """Whether the feature's id is new or its version differs from the last write."""
+
+        known = self.seen.get(alert_id(feature))
+        return known is None or known[0] != alert_version(feature)
+
+    def changed(self, features: Iterable[dict]) -> list[dict]:
+        return [feature for feature in features if self.is_changed(feature)]
+
+    def mark_seen(self, features: Iterable[dict], now: float | None = None) -> None:
+        self.mark_versions(
+            {alert_id(feature): alert_version(feature) for feature in features}, now
+        )
+
+    def mark_versions(
+        self, versions: dict[str | None, str | None], now: float | None = None
+    ) -> None:
+        """Record `{alert id: version}` pairs as written."""
+
+        now = time.time() if now is None else now
+        for identifier, version in versions.items():
+            if identifier:
+                self.seen[identifier] = [version, now]
+
+    def prune(self, retention: float = DEFAULT_RETENTION, now: float | None = None) -> int:
+        cutoff = (time.time() if now is None else now) - retention
+        stale = [key for key, (_, seen_at) in self.seen.items() if seen_at < cutoff]
+        for key in stale:
+            del self.seen[key]
+        return len(stale)
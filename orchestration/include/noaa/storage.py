@@ -0,0 +1,240 @@
+"""
+Minimal object-store interface used by the ingestion tasks.
+
+`S3ObjectStore` talks to S3 through the Amazon provider's `S3Hook`;
+`LocalObjectStore` keeps objects as files under a directory and stands in for
+S3 in tests and local runs.
+
+`open_writer` returns a streaming writer: data is written in chunks and only
+becomes visible under its key when the writer is closed without error. On S3
+this is a multipart upload holding at most one part in memory.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+# S3 requires every part but the last to be at least 5 MiB.
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+class ObjectWriter(ABC):
+    def __init__(self) -> None:
+        self.bytes_written = 0
+        # Time spent writing and committing, i.e. uploading on S3.
+        self.seconds = 0.0
+
+    def write(self, data: bytes) -> None:
+        if data:
+            started = time.perf_counter()
+            self.bytes_written += len(data)
+            self._write(data)
+            self.seconds += time.perf_counter() - started
+
+    @abstractmethod
+    def _write(self, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def commit(self) -> None:
+        ...
+
+    @abstractmethod
+    def abort(self) -> None:
+        ...
+
+    def __enter__(self) -> ObjectWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            started = time.perf_counter()
+            self.commit()
+            self.seconds += time.perf_counter() - started
+        else:
+            self.abort()
+
+
+class ObjectStore(ABC):
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """Object contents, or None if the key does not exist."""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def list(self, prefix: str) -> list[str]:
+        """Keys under `prefix`, sorted."""
+
+    @abstractmethod
+    def versions(self, prefix: str) -> dict[str, str]:
+        """Key -> version tag (changes whenever the object is rewritten) under `prefix`."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def open_writer(self, key: str) -> ObjectWriter:
+        ...
+
+
+class _LocalWriter(ObjectWriter):
+    def __init__(self, path: Path) -> None:
+        super().__init__()
+        self._path = path
+        self._temporary = path.with_name(path.name + ".tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._temporary, "wb")
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+
+    def commit(self) -> None:
+        self._file.close()
+        os.replace(self._temporary, self._path)
+
+    def abort(self) -> None:
+        self._file.close()
+        self._temporary.unlink(missing_ok=True)
+
+
+class _MultipartWriter(ObjectWriter):
+    def __init__(self, client, bucket: str, key: str, part_size: int) -> None:
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = part_size
+        self._buffer = bytearray()
+        self._upload_id: str | None = None
+        self._parts: list[dict] = []
+
+    def _write(self, data: bytes) -> None:
+        self._buffer += data
+        while len(self._buffer) >= self._part_size:
+            self._upload_part(bytes(self._buffer[: self._part_size]))
+            del self._buffer[: self._part_size]
+
+    def _upload_part(self, body: bytes) -> None:
+        if self._upload_id is None:
+            upload = self._client.create_multipart_upload(Bucket=self._bucket, Key=self._key)
+            self._upload_id = upload["UploadId"]
+        number = len(self._parts) + 1
+        part = self._client.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=number,
+            Body=body,
+        )
+        self._parts.append({"ETag": part["ETag"], "PartNumber": number})
+
+    def commit(self) -> None:
+        if self._upload_id is None:
+            # Small object: a single PUT is cheaper than a multipart upload.
+            self._client.put_object(Bucket=self._bucket, Key=self._key, Body=bytes(self._buffer))
+            return
+        if self._buffer:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+        self._client.complete_multipart_upload(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+    def abort(self) -> None:
+        self._buffer.clear()
+        if self._upload_id is not None:
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._upload_id
+            )
+
+
+class LocalObjectStore(ObjectStore):
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        return path.read_bytes() if path.is_file() else None
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+
+    def list(self, prefix: str) -> list[str]:
+        if not self.root.is_dir():
+            return []
+        keys = (
+            path.relative_to(self.root).as_posix()
+            for path in self.root.rglob("*")
+            if path.is_file() and not path.name.endswith(".tmp")
+        )
+        return sorted(key for key in keys if key.startswith(prefix))
+
+    def versions(self, prefix: str) -> dict[str, str]:
+        versions = {}
+        for key in self.list(prefix):
+            stat = self._path(key).stat()
+            versions[key] = f"{stat.st_size}-{stat.st_mtime_ns}"
+        return versions
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def open_writer(self, key: str) -> ObjectWriter:
+        return _LocalWriter(self._path(key))
+
+
+class S3ObjectStore(ObjectStore):
+    def __init__(
+        self,
+        bucket: str,
+        aws_conn_id: str | None = None,
+        part_size: int = DEFAULT_PART_SIZE,
+    ) -> None:
+        from airflow.providers.amazon.aws.hooks.s3 import S3Hook
+
+        self.bucket = bucket
+        self.hook = S3Hook(aws_conn_id=aws_conn_id)
+        self.part_size = part_size
+
+    def get(self, key: str) -> bytes | None:
+        if not self.hook.check_for_key(key, bucket_name=self.bucket):
+            return None
+        obj = self.hook.get_key(key, bucket_name=self.bucket)
+        return obj.get()["Body"].read()
+
+    def put(self, key: str, data: bytes) -> None:
+        self.hook.load_bytes(data, key=key, bucket_name=self.bucket, replace=True)
+
+    def list(self, prefix: str) -> list[str]:
+        return sorted(self.hook.list_keys(bucket_name=self.bucket, prefix=prefix) or [])
+
+    def versions(self, prefix: str) -> dict[str, str]:
+        paginator = self.hook.get_conn().get_paginator("list_objects_v2")
+        return {
+            item["Key"]: item["ETag"].strip('"')
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix)
+            for item in page.get("Contents", ())
+        }
+
+    def delete(self, key: str) -> None:
+        self.hook.delete_objects(bucket=self.bucket, keys=[key])
+
+    def open_writer(self, key: str) -> ObjectWriter:
+        return _MultipartWriter(self.hook.get_conn(), self.bucket, key, self.part_size)
@@ -0,0 +1,135 @@
+"""
+Streaming handling of large response bodies.
+
+`archive_chunks` copies a body, optionally gzip-compressed, into an object
+writer (an S3 multipart upload, see `include.noaa.storage`) while passing the
+chunks on unchanged. `iter_features` parses the `features` array of a GeoJSON
+FeatureCollection from the same chunks one feature at a time, and `NextLink`
+picks the collection's `pagination.next` out of them. A body is therefore
+archived and processed in a single pass, holding at most one chunk, one
+upload part and one feature in memory however large the payload is.
+"""
+
+from __future__ import annotations
+
+import codecs
+import gzip
+import json
+import re
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+from include.noaa.records import partition_prefix
+from include.noaa.storage import ObjectWriter
+
+CHUNK_SIZE = 64 * 1024
+# Upper bound on a single buffered feature; larger means a malformed body.
+MAX_FEATURE_SIZE = 64 * 1024 * 1024
+
+_FEATURES = re.compile(r'(?<!\\)"features"\s*:\s*\[')
+_SEPARATORS = " \t\r\n,"
+# `pagination` is a small top-level member, before or after `features`.
+PAGINATION_WINDOW = 8 * 1024
+_NEXT = re.compile(r'"pagination"\s*:\s*\{[^{}]*?"next"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+def raw_archive_key(
+    prefix: str, ingested_at: datetime, compress: bool = True, name: str = "alerts"
+) -> str:
+    stamp = ingested_at.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    extension = "json.gz" if compress else "json"
+    return f"{partition_prefix(prefix, ingested_at)}/{name}-{stamp}.{extension}"
+
+
+def archive_chunks(
+    chunks: Iterable[bytes], writer: ObjectWriter, compress: bool = True
+) -> Iterator[bytes]:
+    """Yield `chunks` unchanged after writing each one to `writer`."""
+
+    if not compress:
+        for chunk in chunks:
+            writer.write(chunk)
+            yield chunk
+        return
+    # GzipFile only writes to `writer`; closing it flushes the trailer but
+    # leaves the writer open for the caller to commit.
+    with gzip.GzipFile(fileobj=writer, mode="wb", mtime=0) as out:
+        for chunk in chunks:
+            out.write(chunk)
+            yield chunk
+
+
+class NextLink:
+    """
+    Finds `pagination.next` in a body while passing its chunks through.
+
+    Only the first and last `window` bytes are kept, which is where the
+    top-level `pagination` member sits around the `features` array.
+    """
+
+    def __init__(self, window: int = PAGINATION_WINDOW) -> None:
+        self._window = window
+        self._head = b""
+        self._tail = b""
+
+    def watch(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            if len(self._head) < self._window:
+                self._head += chunk[: self._window - len(self._head)]
+            self._tail = (self._tail + chunk)[-self._window:]
+            yield chunk
+
+    @property
+    def url(self) -> str | None:
+        for edge in (self._tail, self._head):
+            match = _NEXT.search(edge.decode("utf-8", "replace"))
+            if match:
+                return json.loads(match.group(1)) or None
+        return None
+
+
+def _text(chunks: Iterable[bytes]) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_features(
+    chunks: Iterable[bytes], max_feature_size: int = MAX_FEATURE_SIZE
+) -> Iterator[dict]:
+    """Features of a FeatureCollection body, parsed incrementally."""
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    in_features = False
+    for text in _text(chunks):
+        buffer += text
+        if not in_features:
+            match = _FEATURES.search(buffer)
+            if match is None:
+                # Keep enough to find the key should it straddle two chunks.
+                buffer = buffer[-64:]
+                continue
+            buffer = buffer[match.end():]
+            in_features = True
+        while True:
+            buffer = buffer.lstrip(_SEPARATORS)
+            if buffer.startswith("]"):
+                return
+            if not buffer:
+                break
+            try:
+                feature, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if len(buffer) > max_feature_size:
+                    raise ValueError("feature exceeds the maximum size") from None
+                break
+            yield feature
+            buffer = buffer[end:]
+    if in_features:
+        raise ValueError("response body ended inside the features array")
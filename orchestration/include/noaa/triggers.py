@@ -0,0 +1,79 @@
+"""
+Deferrable trigger polling `/alerts/active` from the Airflow triggerer.
+
+The blocking HTTP request of each poll runs in a thread so the triggerer's
+event loop stays free. No worker slot is held between polls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, AsyncIterator
+
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+
+from include.noaa.http import new_session
+from include.noaa.realtime import DEFAULT_POLL_INTERVAL, poll_once
+
+
+class ActiveAlertsTrigger(BaseTrigger):
+    """
+    Fires once the active alert set differs from `digest`, or at `end_at`.
+
+    Events: `{"status": "changed", "validators", "digest"}` or
+    `{"status": "timeout", "validators", "digest"}`.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        end_at: float,
+        validators: dict[str, str] | None = None,
+        digest: str | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        super().__init__()
+        self.url = url
+        self.end_at = end_at
+        self.validators = validators or {}
+        self.digest = digest
+        self.poll_interval = poll_interval
+
+    def serialize(self) -> tuple[str, dict[str, Any]]:
+        return (
+            "include.noaa.triggers.ActiveAlertsTrigger",
+            {
+                "url": self.url,
+                "end_at": self.end_at,
+                "validators": self.validators,
+                "digest": self.digest,
+                "poll_interval": self.poll_interval,
+            },
+        )
+
+    async def run(self) -> AsyncIterator[TriggerEvent]:
+        session = new_session()
+        try:
+            while time.time() < self.end_at:
+                try:
+                    self.validators, digest = await asyncio.to_thread(
+                        poll_once, session, self.url, self.validators
+                    )
+                except Exception:
+                    # Transient upstream errors must not end a long-lived poll.
+                    self.log.warning("poll of %s failed", self.url, exc_info=True)
+                    digest = None
+                if digest is not None and digest != self.digest:
+                    yield TriggerEvent(
+                        {"status": "changed", "validators": self.validators, "digest": digest}
+                    )
+                    return
+                await asyncio.sleep(
+                    max(0.0, min(self.poll_interval, self.end_at - time.time()))
+                )
+            yield TriggerEvent(
+                {"status": "timeout", "validators": self.validators, "digest": self.digest}
+            )
+        finally:
+            session.close()
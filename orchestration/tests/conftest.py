@@ -0,0 +1,14 @@
+"""
+Pytest configuration for the orchestration helpers.
+
+Makes `include.noaa` importable the way the Astro runtime does (project root
+on `sys.path`). Only Airflow-free helpers are tested here.
+"""
+
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
@@ -0,0 +1,108 @@
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+
+from include.noaa.backfill import Checkpoint, backfill_window, split_windows
+from include.noaa.state import IngestionState
+from include.noaa.storage import LocalObjectStore
+
+WINDOW = {"start": "2024-05-01T00:00:00+00:00", "end": "2024-05-01T06:00:00+00:00"}
+
+
+def _alert(identifier, updated="2024-05-01T01:00:00+00:00"):
+    return {"id": identifier, "properties": {"event": "Flood Watch", "updated": updated}}
+
+
+class JSONResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class PagedSession:
+    """Three pages linked by `pagination.next`; can fail once on a given page."""
+
+    def __init__(self, fail_on=None):
+        self.pages = {
+            "first": ([_alert("a1"), _alert("a2")], "https://api/alerts?cursor=2"),
+            "https://api/alerts?cursor=2": ([_alert("a3")], "https://api/alerts?cursor=3"),
+            "https://api/alerts?cursor=3": ([], "https://api/alerts?cursor=4"),
+        }
+        self.fail_on = fail_on
+        self.requested = []
+
+    def get(self, url, timeout=None):
+        key = url if url.startswith("https://api/") else "first"
+        self.requested.append(key)
+        if key == self.fail_on:
+            self.fail_on = None
+            raise ConnectionError("reset")
+        features, next_url = self.pages[key]
+        return JSONResponse({"features": features, "pagination": {"next": next_url}})
+
+
+def _ids(store):
+    keys = [key for key in store.list("noaa/alerts/") if key.endswith(".ndjson.gz")]
+    return sorted(
+        json.loads(line)["id"]
+        for key in keys
+        for line in gzip.decompress(store.get(key)).splitlines()
+    )
+
+
+def test_range_is_split_into_half_open_windows():
+    windows = split_windows(
+        "2024-05-01T00:00:00Z", "2024-05-01T15:00:00Z", timedelta(hours=6)
+    )
+    assert [(w["start"][11:16], w["end"][11:16]) for w in windows] == [
+        ("00:00", "06:00"),
+        ("06:00", "12:00"),
+        ("12:00", "15:00"),
+    ]
+    with pytest.raises(ValueError):
+        split_windows("2024-05-01", "2024-05-02", timedelta(0))
+
+
+def test_window_follows_pagination_until_an_empty_page(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    session = PagedSession()
+    checkpoint = backfill_window(store, session, WINDOW, "noaa/alerts", "state")
+
+    assert checkpoint.done and checkpoint.pages == 3 and checkpoint.records == 3
+    assert _ids(store) == ["a1", "a2", "a3"]
+    assert all("ingest_date=20240501/ingest_hour=06" in key for key in checkpoint.keys)
+
+    # A finished window is not fetched again.
+    backfill_window(store, session, WINDOW, "noaa/alerts", "state")
+    assert len(session.requested) == 3
+
+
+def test_interrupted_window_resumes_without_duplicates(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    session = PagedSession(fail_on="https://api/alerts?cursor=2")
+    with pytest.raises(ConnectionError):
+        backfill_window(store, session, WINDOW, "noaa/alerts", "state")
+    saved = Checkpoint.load(store, "state/20240501T000000Z-20240501T060000Z.json")
+    assert saved.pages == 1 and saved.next_url == "https://api/alerts?cursor=2"
+
+    backfill_window(store, session, WINDOW, "noaa/alerts", "state")
+    assert session.requested.count("first") == 1
+    assert _ids(store) == ["a1", "a2", "a3"]
+
+
+def test_alerts_already_ingested_are_skipped(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    known = IngestionState()
+    known.mark_seen([_alert("a2")])
+    checkpoint = backfill_window(
+        store, PagedSession(), WINDOW, "noaa/alerts", "state", known=known
+    )
+    assert checkpoint.records == 2
+    assert _ids(store) == ["a1", "a3"]
@@ -0,0 +1,131 @@
+import gzip
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from include.noaa import compaction
+from include.noaa.records import write_partitions
+from include.noaa.storage import LocalObjectStore
+
+DAY = date(2024, 5, 1)
+
+
+def _alert(identifier, event, updated):
+    return {
+        "id": identifier,
+        "properties": {
+            "event": event,
+            "updated": updated,
+            "sent": updated,
+            "affectedZones": ["https://api.weather.gov/zones/county/KSC001"],
+        },
+    }
+
+
+def _ingest(store, minute, features, hour=13):
+    ingested_at = datetime(2024, 5, 1, hour, tzinfo=timezone.utc) + timedelta(minutes=minute)
+    return write_partitions(store, "noaa/alerts", features, ingested_at)
+
+
+def _read(store, key):
+    return [json.loads(line) for line in gzip.decompress(store.get(key)).splitlines()]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    _ingest(store, 0, [_alert("a1", "Tornado Warning", "2024-05-01T13:00:00+00:00"),
+                       _alert("a2", "Flood Watch", "2024-05-01T12:00:00+00:00")])
+    _ingest(store, 15, [_alert("a1", "Tornado Warning", "2024-05-01T08:10:00-05:00")])
+    _ingest(store, 30, [_alert("a3", "Flood Watch", "2024-05-01T13:20:00+00:00")])
+    return store
+
+
+def test_latest_version_wins_and_rows_are_sorted():
+    records = compaction.merge_records(
+        [
+            {"id": "b", "event": "Flood Watch", "updated": "2024-05-01T13:00:00+00:00"},
+            {"id": "a", "event": "Tornado Warning", "updated": "2024-05-01T08:30:00-05:00"},
+            {"id": "a", "event": "Tornado Warning", "updated": "2024-05-01T13:00:00+00:00"},
+            {"id": "c", "event": "Flood Watch", "updated": "2024-05-01T12:00:00+00:00"},
+        ]
+    )
+    assert [(r["id"], r["updated"]) for r in records] == [
+        ("c", "2024-05-01T12:00:00+00:00"),
+        ("b", "2024-05-01T13:00:00+00:00"),
+        ("a", "2024-05-01T08:30:00-05:00"),
+    ]
+
+
+def test_hour_is_compacted_once(store):
+    key = compaction.compact_hour(store, "noaa/alerts", "out", DAY, 13, "ndjson")
+    assert key == "out/hourly/ingest_date=20240501/ingest_hour=13/alerts.ndjson.gz"
+    records = _read(store, key)
+    assert [(r["id"], r["updated"]) for r in records] == [
+        ("a2", "2024-05-01T12:00:00+00:00"),
+        ("a3", "2024-05-01T13:20:00+00:00"),
+        ("a1", "2024-05-01T08:10:00-05:00"),
+    ]
+
+    before = store.get(key)
+    assert not compaction.compact(
+        store, compaction.hour_sources(store, "noaa/alerts", DAY, 13), key, "ndjson"
+    )
+    assert compaction.compact_hour(store, "noaa/alerts", "out", DAY, 13, "ndjson") == key
+    assert store.get(key) == before
+    assert compaction.compact_hour(store, "noaa/alerts", "out", DAY, 14, "ndjson") is None
+
+
+def test_partition_days():
+    keys = [
+        "noaa/alerts/ingest_date=20240502/ingest_hour=06/event=flood_watch/a.ndjson.gz",
+        "noaa/alerts/ingest_date=20240501/ingest_hour=23/event=flood_watch/b.ndjson.gz",
+        "noaa/alerts/ingest_date=20240501/ingest_hour=13/event=flood_watch/c.parquet",
+    ]
+    assert compaction.partition_days(keys) == [date(2024, 5, 1), date(2024, 5, 2)]
+
+
+def test_rewritten_source_is_compacted_again(store):
+    key = compaction.compact_hour(store, "noaa/alerts", "out", DAY, 13, "ndjson")
+    assert len(_read(store, key)) == 3
+
+    # A resumed backfill rewrites a page under the same key.
+    source = next(iter(compaction.hour_sources(store, "noaa/alerts", DAY, 13)))
+    store.put(source, gzip.compress(b""))
+    compaction.compact_hour(store, "noaa/alerts", "out", DAY, 13, "ndjson")
+    assert len(_read(store, key)) < 3
+
+
+def test_day_follows_new_partitions(store):
+    key = compaction.compact_day(store, "noaa/alerts", "out", DAY, "ndjson")
+    assert key == "out/daily/ingest_date=20240501/alerts.ndjson.gz"
+    assert len(_read(store, key)) == 3
+
+    _ingest(store, 5, [_alert("a2", "Flood Watch", "2024-05-01T14:05:00+00:00")], hour=14)
+    compaction.compact_day(store, "noaa/alerts", "out", DAY, "ndjson")
+    records = {r["id"]: r["updated"] for r in _read(store, key)}
+    assert records == {
+        "a1": "2024-05-01T08:10:00-05:00",
+        "a2": "2024-05-01T14:05:00+00:00",
+        "a3": "2024-05-01T13:20:00+00:00",
+    }
+    manifest = json.loads(store.get("out/daily/ingest_date=20240501/_manifest.json"))
+    assert manifest["records"] == 3
+    assert manifest["stats"] == {
+        "sent_min": "2024-05-01T13:10:00+00:00",
+        "sent_max": "2024-05-01T14:05:00+00:00",
+        "events": ["Flood Watch", "Tornado Warning"],
+        "severities": [],
+        "zones": ["KSC001"],
+    }
+    assert len(manifest["sources"]) == 5
+
+
+def test_parquet_output_is_sorted_for_pushdown(store):
+    pq = pytest.importorskip("pyarrow.parquet")
+    import io
+
+    key = compaction.compact_day(store, "noaa/alerts", "out", DAY)
+    table = pq.read_table(io.BytesIO(store.get(key)), filters=[("event", "=", "Flood Watch")])
+    assert table.column("id").to_pylist() == ["a2", "a3"]
@@ -0,0 +1,55 @@
+from include.noaa.http import (
+    NOAA_POOL_SLOTS,
+    NOAA_RATE_LIMIT,
+    conditional_get,
+    request_url,
+    shared_rate_limiter,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.headers = None
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.headers = headers
+        return self.response
+
+
+def test_request_url_is_stable():
+    assert request_url("/alerts", {"start": "s", "end": "e"}).endswith(
+        "/alerts?end=e&start=s"
+    )
+
+
+def test_not_modified_returns_previous_validators():
+    session = FakeSession(FakeResponse(304))
+    response, validators = conditional_get(session, "u", {"etag": '"v1"'})
+    assert response is None and validators == {"etag": '"v1"'}
+    assert session.headers == {"If-None-Match": '"v1"'}
+
+
+def test_fresh_response_returns_new_validators():
+    headers = {"ETag": '"v2"', "Last-Modified": "Wed, 01 May 2024 12:00:00 GMT"}
+    response, validators = conditional_get(FakeSession(FakeResponse(200, headers)), "u")
+    assert response is not None
+    assert validators == {"etag": '"v2"', "last_modified": headers["Last-Modified"]}
+
+
+def test_pooled_tasks_share_the_rate_limit():
+    # Every pool slot may run one task; together they stay within the budget.
+    assert shared_rate_limiter().rate * NOAA_POOL_SLOTS == NOAA_RATE_LIMIT
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+
+from include.noaa.metrics import IngestionMetrics, report
+
+LANDED_AT = datetime(2024, 5, 1, 13, 15, tzinfo=timezone.utc)
+
+
+def _alert(updated):
+    return {"id": "a", "properties": {"updated": updated}}
+
+
+class RecordingSink:
+    def __init__(self):
+        self.calls = []
+
+    def timing(self, name, value):
+        self.calls.append(("timing", name, value))
+
+    def incr(self, name, count=1):
+        self.calls.append(("incr", name, count))
+
+    def gauge(self, name, value):
+        self.calls.append(("gauge", name, value))
+
+
+class RecordingTaskInstance:
+    def __init__(self):
+        self.xcom = {}
+
+    def xcom_push(self, key, value):
+        self.xcom[key] = value
+
+
+def test_freshness_lag_is_the_worst_landed_alert():
+    metrics = IngestionMetrics()
+    metrics.observe_landed(_alert("2024-05-01T13:10:00+00:00"), LANDED_AT)
+    metrics.observe_landed(_alert("2024-05-01T08:00:00-05:00"), LANDED_AT)
+    metrics.observe_landed(_alert(None), LANDED_AT)
+    assert metrics.changed_records == 3
+    assert metrics.freshness_lag_seconds == 900.0
+
+
+def test_report_reaches_xcom_and_the_sink():
+    metrics = IngestionMetrics(
+        fetch_seconds=0.2, archived_bytes=2048, upload_seconds=0.5, records=10
+    )
+    sink, ti = RecordingSink(), RecordingTaskInstance()
+    data = report(metrics, "alerts_ingestion", {"ti": ti}, sink=sink)
+
+    assert ti.xcom["metrics"] == data
+    assert data["upload_bytes_per_second"] == 4096.0
+    assert ("incr", "noaa.alerts_ingestion.records", 10) in sink.calls
+    fetch = ("timing", "noaa.alerts_ingestion.fetch_seconds", timedelta(seconds=0.2))
+    assert fetch in sink.calls
+    assert not any(call[1].endswith("freshness_lag_seconds") for call in sink.calls)
+
+
+def test_freshness_breach_invokes_the_callback():
+    breaches = []
+    sink = RecordingSink()
+    metrics = IngestionMetrics(freshness_lag_seconds=1500.0)
+
+    report(metrics, "t", None, timedelta(minutes=30), lambda c, d: breaches.append(d), sink)
+    assert breaches == []
+    report(metrics, "t", None, timedelta(minutes=20), lambda c, d: breaches.append(d), sink)
+    assert [d["freshness_lag_seconds"] for d in breaches] == [1500.0]
+    assert ("incr", "noaa.t.freshness_sla_miss", 1) in sink.calls
@@ -0,0 +1,148 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+from include.noaa.ingest import ingest_alerts
+from include.noaa.metrics import IngestionMetrics
+from include.noaa.realtime import active_digest, poll_once
+from include.noaa.storage import LocalObjectStore
+
+
+def _alert(identifier, updated):
+    return {"id": identifier, "properties": {"event": "Flood Watch", "updated": updated}}
+
+
+class StreamingResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i : i + chunk_size]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ActiveSession:
+    """Serves the current alert set, versioned by an ETag."""
+
+    def __init__(self):
+        self.set([])
+
+    def set(self, features, etag=None):
+        self.body = json.dumps({"features": features}).encode("utf-8")
+        self.etag = etag or f'"{hash(self.body)}"'
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return StreamingResponse(304)
+        return StreamingResponse(200, self.body, {"ETag": self.etag})
+
+
+def test_digest_ignores_order_but_not_versions():
+    a, b = _alert("a", "t1"), _alert("b", "t1")
+    assert active_digest([a, b]) == active_digest([b, a])
+    assert active_digest([a, b]) != active_digest([a, _alert("b", "t2")])
+
+
+def test_poll_reports_a_digest_only_for_new_content():
+    session = ActiveSession()
+    session.set([_alert("a", "t1")], etag='"v1"')
+    validators, digest = poll_once(session, "u")
+    assert validators == {"etag": '"v1"'} and digest == active_digest([_alert("a", "t1")])
+
+    assert poll_once(session, "u", validators) == (validators, None)
+
+    session.set([_alert("a", "t1")], etag='"v2"')
+    _, same = poll_once(session, "u", validators)
+    assert same == digest
+
+
+def test_ingest_writes_only_changes_between_polls(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    session = ActiveSession()
+    args = (store, session, "u", "noaa/alerts", "state.json", "noaa/raw")
+    now = datetime(2024, 5, 1, 13, 15, tzinfo=timezone.utc)
+
+    session.set([_alert("a", "t1"), _alert("b", "t1")])
+    assert len(ingest_alerts(*args, ingested_at=now)) == 1
+    assert ingest_alerts(*args, ingested_at=now) == []
+
+    session.set([_alert("a", "t1"), _alert("b", "t2")])
+    metrics = IngestionMetrics()
+    [key] = ingest_alerts(*args, ingested_at=now.replace(second=30), metrics=metrics)
+    assert metrics.records == 2 and metrics.changed_records == 1
+    assert metrics.payload_bytes == len(session.body) and metrics.archived_bytes > 0
+    assert metrics.partitions == 1 and metrics.total_seconds >= metrics.fetch_seconds
+    lines = gzip.decompress(store.get(key)).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["b"]
+    assert len(store.list("noaa/raw/")) == 2
+
+
+def test_ingest_keeps_validators_of_its_url_only(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    stale = {f"/alerts?start={i}": {"etag": f'"{i}"'} for i in range(3)}
+    store.put("state.json", json.dumps({"validators": stale, "seen": {}}).encode())
+    session = ActiveSession()
+    session.set([_alert("a", "t1")])
+
+    ingest_alerts(store, session, "/alerts?limit=500", "noaa/alerts", "state.json", "noaa/raw")
+    state = json.loads(store.get("state.json"))
+    assert state["validators"] == {"/alerts?limit=500": {"etag": session.etag}}
+
+
+class PagedSession:
+    """`/alerts` newest first, 2 per page, linked by `pagination.next`."""
+
+    def __init__(self, features):
+        self.features = features
+        self.urls = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.urls.append(url)
+        page = int(url.partition("cursor=")[2] or 0)
+        body = {"features": self.features[2 * page : 2 * page + 2]}
+        body["pagination"] = {"next": f"/alerts?limit=2&cursor={page + 1}"}
+        return StreamingResponse(200, json.dumps(body).encode("utf-8"))
+
+
+def test_ingest_follows_pages_until_nothing_is_new(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    older = [_alert(f"old{i}", "t1") for i in range(4)]
+    session = PagedSession(older)
+    args = (store, session, "/alerts?limit=2", "noaa/alerts", "state.json", "noaa/raw")
+    now = datetime(2024, 5, 1, 13, 15, tzinfo=timezone.utc)
+    ingest_alerts(*args, ingested_at=now)
+    # The empty third page ends the first pass.
+    assert len(session.urls) == 3
+
+    # A burst of three alerts spills onto the second page.
+    session.features = [_alert(f"new{i}", "t2") for i in range(3)] + older
+    session.urls = []
+    metrics = IngestionMetrics()
+    ingest_alerts(*args, ingested_at=now.replace(minute=30), metrics=metrics)
+
+    assert metrics.changed_records == 3
+    # Page 3 held only alerts already landed, so page 4 was never requested.
+    assert session.urls == [
+        "/alerts?limit=2",
+        "/alerts?limit=2&cursor=1",
+        "/alerts?limit=2&cursor=2",
+    ]
+
+    session.features = [_alert(f"new{i}", "t3") for i in range(3)] + older
+    session.urls = []
+    ingest_alerts(*args, ingested_at=now.replace(minute=45), max_pages=1)
+    assert session.urls == ["/alerts?limit=2"]
@@ -0,0 +1,98 @@
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from include.noaa.records import (
+    ALERT_COLUMNS,
+    alert_record,
+    available_formats,
+    event_slug,
+    write_partitions,
+)
+from include.noaa.storage import LocalObjectStore
+
+INGESTED_AT = datetime(2024, 5, 1, 13, 15, tzinfo=timezone.utc)
+
+
+def _alert(identifier, event):
+    return {
+        "id": identifier,
+        "geometry": None,
+        "properties": {
+            "event": event,
+            "sent": "2024-05-01T13:00:00-05:00",
+            "affectedZones": ["https://api.weather.gov/zones/county/KSC001"],
+            "extraField": "ignored",
+        },
+    }
+
+
+def test_records_have_a_stable_schema():
+    record = alert_record(_alert("a1", "Tornado Warning"), INGESTED_AT)
+    assert list(record) == list(ALERT_COLUMNS)
+    assert record["updated"] == "2024-05-01T13:00:00-05:00"
+    assert json.loads(record["affected_zones"]) == [
+        "https://api.weather.gov/zones/county/KSC001"
+    ]
+    assert record["ingested_at"] == "2024-05-01T13:15:00+00:00"
+
+
+def test_event_slug():
+    assert event_slug("Special Weather Statement") == "special_weather_statement"
+    assert event_slug(None) == "unknown"
+
+
+def test_ndjson_partitions_in_local_s3_stand_in(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    features = [
+        _alert("a1", "Tornado Warning"),
+        _alert("a2", "Flood Watch"),
+        _alert("a3", "Tornado Warning"),
+    ]
+    keys = write_partitions(store, "noaa/alerts", features, INGESTED_AT)
+
+    assert keys == [
+        "noaa/alerts/ingest_date=20240501/ingest_hour=13/event=flood_watch/"
+        "alerts-20240501T131500Z.ndjson.gz",
+        "noaa/alerts/ingest_date=20240501/ingest_hour=13/event=tornado_warning/"
+        "alerts-20240501T131500Z.ndjson.gz",
+    ]
+    assert store.list("noaa/alerts/") == keys
+    lines = gzip.decompress(store.get(keys[1])).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["a1", "a3"]
+
+
+def test_parquet_partitions(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    store = LocalObjectStore(tmp_path)
+    [key] = write_partitions(
+        store, "noaa/alerts", [_alert("a1", "Tornado Warning")], INGESTED_AT, ("parquet",)
+    )
+    table = pq.read_table(io.BytesIO(store.get(key)))
+    assert table.column_names == list(ALERT_COLUMNS)
+
+
+def test_unknown_formats_are_ignored():
+    assert "ndjson" in available_formats(["ndjson", "csv"])
+    assert "csv" not in available_formats(["ndjson", "csv"])
+
+
+def test_partitions_are_streamed_from_an_iterator(tmp_path):
+    store = LocalObjectStore(tmp_path)
+
+    def features():
+        yield _alert("a1", "Tornado Warning")
+        yield _alert("a2", "Flood Watch")
+        raise ConnectionError("stream interrupted")
+
+    with pytest.raises(ConnectionError):
+        write_partitions(store, "noaa/alerts", features(), INGESTED_AT)
+    assert store.list("noaa/alerts/") == []
+
+    keys = write_partitions(
+        store, "noaa/alerts", iter([_alert("a1", "Tornado Warning")]), INGESTED_AT
+    )
+    assert store.list("noaa/alerts/") == keys
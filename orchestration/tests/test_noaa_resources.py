@@ -0,0 +1,124 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from include.noaa.http import RateLimiter
+from include.noaa.resources import (
+    expand_resources,
+    land_resource,
+    resource_path,
+    resource_slug,
+)
+from include.noaa.storage import LocalObjectStore
+
+INGESTED_AT = datetime(2024, 5, 1, 13, 15, tzinfo=timezone.utc)
+
+
+class StreamingResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i : i + chunk_size]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ETagSession:
+    """Answers 304 when the request carries the current ETag."""
+
+    def __init__(self, body):
+        self.body = body
+        self.urls = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.urls.append(url)
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return StreamingResponse(304)
+        return StreamingResponse(200, self.body, {"ETag": '"v1"'})
+
+
+def test_config_expands_to_one_entry_per_resource():
+    resources = expand_resources(
+        {
+            "station_observation_latest": ["KDCA", "KBWI", "KDCA"],
+            "zone_forecast": [{"zone_type": "forecast", "zone_id": "MDZ013"}],
+            "alerts_active": [{}],
+        }
+    )
+    assert resources == [
+        {"method": "station_observation_latest", "params": {"station_id": "KDCA"}},
+        {"method": "station_observation_latest", "params": {"station_id": "KBWI"}},
+        {"method": "zone_forecast", "params": {"zone_type": "forecast", "zone_id": "MDZ013"}},
+        {"method": "alerts_active", "params": {}},
+    ]
+    assert resource_path(resources[2]) == "/zones/forecast/MDZ013/forecast"
+    assert resource_slug(resources[2]) == "forecast_MDZ013"
+    assert resource_slug(resources[3]) == "alerts_active"
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"unknown_method": ["x"]},
+        {"zone_forecast": ["MDZ013"]},
+        {"station_observation_latest": [{"station": "KDCA"}]},
+    ],
+)
+def test_invalid_config_is_rejected(config):
+    with pytest.raises(ValueError):
+        expand_resources(config)
+
+
+def test_resource_is_landed_once_until_it_changes(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    body = json.dumps({"properties": {"textDescription": "Clear"}}).encode("utf-8")
+    session = ETagSession(body)
+    [resource] = expand_resources({"station_observation_latest": ["KDCA"]})
+
+    key = land_resource(
+        store, session, resource, "noaa/resources", "noaa/_state", INGESTED_AT
+    )
+    assert key == (
+        "noaa/resources/station_observation_latest/ingest_date=20240501/ingest_hour=13/"
+        "KDCA-20240501T131500Z.json.gz"
+    )
+    assert gzip.decompress(store.get(key)) == body
+    assert session.urls[0].endswith("/stations/KDCA/observations/latest")
+
+    again = land_resource(
+        store, session, resource, "noaa/resources", "noaa/_state", INGESTED_AT
+    )
+    assert again is None
+    assert store.get("noaa/_state/station_observation_latest/KDCA.json") is not None
+
+
+def test_rate_limiter_spaces_requests(monkeypatch):
+    clock = {"now": 0.0}
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        clock["now"] += seconds
+
+    monkeypatch.setattr("include.noaa.http.time.monotonic", lambda: clock["now"])
+    monkeypatch.setattr("include.noaa.http.time.sleep", sleep)
+    limiter = RateLimiter(rate=2, burst=2)
+    waits = [limiter.acquire() for _ in range(4)]
+    assert waits == [0.0, 0.0, 0.5, 0.5]
+    assert slept == [0.5, 0.5]
@@ -0,0 +1,46 @@
+import json
+
+from include.noaa.state import IngestionState
+from include.noaa.storage import LocalObjectStore
+
+
+def _alert(identifier, updated):
+    return {"id": identifier, "properties": {"id": identifier, "updated": updated}}
+
+
+def test_only_new_or_changed_alerts_are_selected():
+    state = IngestionState()
+    first = [_alert("a", "t1"), _alert("b", "t1")]
+    assert state.changed(first) == first
+    state.mark_seen(first)
+
+    second = [_alert("a", "t1"), _alert("b", "t2"), _alert("c", "t1")]
+    assert [f["id"] for f in state.changed(second)] == ["b", "c"]
+
+    state.mark_versions({"b": "t2", "c": "t1"})
+    assert not any(state.is_changed(feature) for feature in second)
+
+
+def test_state_round_trips_through_the_store(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    state = IngestionState.load(store, "state.json")
+    state.remember("https://api.weather.gov/alerts", {"etag": '"v1"'})
+    state.mark_seen([_alert("a", "t1")], now=100.0)
+    state.save(store, "state.json")
+
+    loaded = IngestionState.load(store, "state.json")
+    assert loaded.validators == {"https://api.weather.gov/alerts": {"etag": '"v1"'}}
+    assert loaded.changed([_alert("a", "t1")]) == []
+    assert json.loads(store.get("state.json"))["seen"] == {"a": ["t1", 100.0]}
+
+
+def test_prune_and_validator_limit():
+    state = IngestionState()
+    state.mark_seen([_alert("old", "t1")], now=0.0)
+    state.mark_seen([_alert("new", "t1")], now=1000.0)
+    assert state.prune(retention=500, now=1000.0) == 1
+    assert list(state.seen) == ["new"]
+
+    for index in range(5):
+        state.remember(f"url-{index}", {"etag": str(index)}, limit=2)
+    assert list(state.validators) == ["url-3", "url-4"]
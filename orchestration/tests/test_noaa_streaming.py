@@ -0,0 +1,140 @@
+import gzip
+import json
+
+import pytest
+
+from include.noaa.storage import LocalObjectStore, _MultipartWriter
+from include.noaa.streaming import (
+    NextLink,
+    archive_chunks,
+    iter_features,
+    raw_archive_key,
+)
+
+
+def _collection(count):
+    return {
+        "@context": ["https://geojson.org/geojson-ld/geojson-context.jsonld"],
+        "type": "FeatureCollection",
+        "title": 'Alerts with \\"features\\": [ in the title',
+        "features": [
+            {"id": f"a{i}", "properties": {"event": "Flood Watch", "areaDesc": "Zürich ≈"}}
+            for i in range(count)
+        ],
+        "updated": "2024-05-01T13:00:00+00:00",
+    }
+
+
+def _chunks(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_features_are_parsed_across_chunk_boundaries(size):
+    body = json.dumps(_collection(5), ensure_ascii=False).encode("utf-8")
+    features = list(iter_features(_chunks(body, size)))
+    assert features == _collection(5)["features"]
+
+
+def test_next_link_is_found_before_or_after_the_features():
+    url = "https://api.weather.gov/alerts?cursor=abc%3D&limit=500"
+    after = {**_collection(200), "pagination": {"next": url}}
+    before = {"pagination": {"next": url}, **_collection(200)}
+    for document in (after, before, _collection(3)):
+        body = json.dumps(document).encode("utf-8")
+        link = NextLink(window=1024)
+        chunks = link.watch(_chunks(body, 7))
+        assert list(iter_features(chunks))
+        for _ in chunks:  # drained, as ingestion does
+            pass
+        assert link.url == (url if "pagination" in document else None)
+
+
+def test_empty_and_truncated_bodies():
+    assert list(iter_features([b'{"type": "FeatureCollection", "features": []}'])) == []
+    body = json.dumps(_collection(3)).encode("utf-8")
+    with pytest.raises(ValueError):
+        list(iter_features([body[: len(body) // 2]]))
+
+
+def test_body_is_archived_compressed_while_parsed(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    body = json.dumps(_collection(50)).encode("utf-8")
+    with store.open_writer("raw/alerts.json.gz") as writer:
+        chunks = archive_chunks(_chunks(body, 100), writer)
+        assert len(list(iter_features(chunks))) == 50
+        for _ in chunks:
+            pass
+    assert gzip.decompress(store.get("raw/alerts.json.gz")) == body
+
+
+def test_failed_stream_leaves_no_object(tmp_path):
+    store = LocalObjectStore(tmp_path)
+
+    def broken():
+        yield b'{"features": ['
+        raise ConnectionError("reset by peer")
+
+    with pytest.raises(ConnectionError):
+        with store.open_writer("raw/alerts.json") as writer:
+            list(iter_features(archive_chunks(broken(), writer, compress=False)))
+    assert store.list("raw") == []
+
+
+def test_raw_archive_key():
+    from datetime import datetime, timezone
+
+    ingested_at = datetime(2024, 5, 1, 13, 15, tzinfo=timezone.utc)
+    assert raw_archive_key("noaa/raw/alerts", ingested_at) == (
+        "noaa/raw/alerts/ingest_date=20240501/ingest_hour=13/alerts-20240501T131500Z.json.gz"
+    )
+
+
+class FakeS3Client:
+    def __init__(self):
+        self.parts = []
+        self.calls = []
+
+    def create_multipart_upload(self, **kwargs):
+        self.calls.append("create")
+        return {"UploadId": "u1"}
+
+    def upload_part(self, Body, PartNumber, **kwargs):
+        self.parts.append(len(Body))
+        return {"ETag": f"e{PartNumber}"}
+
+    def complete_multipart_upload(self, MultipartUpload, **kwargs):
+        self.calls.append(("complete", [p["PartNumber"] for p in MultipartUpload["Parts"]]))
+
+    def abort_multipart_upload(self, **kwargs):
+        self.calls.append("abort")
+
+    def put_object(self, Body, **kwargs):
+        self.calls.append(("put", len(Body)))
+
+
+def test_multipart_upload_holds_one_part_at_a_time():
+    client = FakeS3Client()
+    with _MultipartWriter(client, "bucket", "key", part_size=1000) as writer:
+        for _ in range(35):
+            writer.write(b"x" * 99)
+            assert len(writer._buffer) < 1000
+    assert client.parts == [1000, 1000, 1000, 465]
+    assert client.calls == ["create", ("complete", [1, 2, 3, 4])]
+    assert writer.bytes_written == 3465
+
+
+def test_small_objects_use_a_single_put():
+    client = FakeS3Client()
+    with _MultipartWriter(client, "bucket", "key", part_size=1000) as writer:
+        writer.write(b"small")
+    assert client.calls == [("put", 5)]
+
+
+def test_failed_multipart_upload_is_aborted():
+    client = FakeS3Client()
+    with pytest.raises(RuntimeError):
+        with _MultipartWriter(client, "bucket", "key", part_size=10) as writer:
+            writer.write(b"x" * 25)
+            raise RuntimeError("upstream failed")
+    assert client.calls == ["create", "abort"]
@@ -0,0 +1,206 @@
+import asyncio
+
+import pytest
+
+from app.admission import (
+    ROUTE_CLASS_LIMITS,
+    THREADPOOL_HEADROOM,
+    AdmissionControl,
+    Rejected,
+    RouteClassLimits,
+    RouteGate,
+    route_class_for,
+    size_threadpool,
+)
+from app.request_context import current_request
+
+
+def test_route_classes():
+    assert route_class_for("/alerts/active") == "alerts"
+    assert route_class_for("/points/39.0,-77.0") == "gridpoints"
+    assert route_class_for("/alertsfoo") == "default"
+    assert route_class_for("/zones") == "default"
+
+
+def test_gate_rejects_when_queue_full_and_when_deadline_unreachable():
+    async def scenario():
+        gate = RouteGate("alerts", RouteClassLimits(1, 1, default_deadline=10))
+        await gate.acquire(deadline=10)
+        queued = asyncio.ensure_future(gate.acquire(deadline=10))
+        await asyncio.sleep(0)
+
+        with pytest.raises(Rejected, match="queue full"):
+            await gate.acquire(deadline=10)
+
+        gate.release(elapsed=0.5)
+        await queued
+
+        gate.service_time = 5.0
+        gate.waiting = 0
+        with pytest.raises(Rejected, match="deadline"):
+            await gate.acquire(deadline=1.0)
+
+    asyncio.run(scenario())
+
+
+def _run_app(middleware, path, headers=()):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    scope = {"type": "http", "path": path, "query_string": b"", "headers": list(headers)}
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+def test_middleware_sheds_with_retry_after_but_health_bypasses():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    limits = {"default": RouteClassLimits(1, 0, default_deadline=10)}
+    middleware = AdmissionControl(app, limits=limits)
+    gate = middleware.gates["default"]
+    gate.active = 1  # simulate a saturated class
+    gate.waiting = 0
+
+    rejected = _run_app(middleware, "/zones")
+    assert rejected[0]["status"] == 503
+    assert (b"retry-after", b"1") in rejected[0]["headers"]
+
+    assert _run_app(middleware, "/health")[0]["status"] == 200
+
+
+def test_middleware_lets_cached_urls_bypass_the_queue():
+    async def app(scope, receive, send):
+        current_request.get().note_cache_hit(expires_at=9e9)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware = AdmissionControl(
+        app, limits={"default": RouteClassLimits(1, 0, default_deadline=10)}
+    )
+    assert _run_app(middleware, "/glossary")[0]["status"] == 200
+
+    middleware.gates["default"].active = 1
+    assert _run_app(middleware, "/glossary")[0]["status"] == 200
+    assert _run_app(middleware, "/zones")[0]["status"] == 503
+
+
+def test_middleware_flags_client_disconnect():
+    seen = {}
+
+    async def app(scope, receive, send):
+        await receive()  # request body
+        await receive()  # disconnect, relayed by the middleware
+        seen["cancelled"] = current_request.get().cancelled.is_set()
+
+    messages = iter(
+        [{"type": "http.request", "body": b"", "more_body": False}, {"type": "http.disconnect"}]
+    )
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        pass
+
+    middleware = AdmissionControl(app)
+    scope = {"type": "http", "path": "/alerts", "query_string": b"", "headers": []}
+    asyncio.run(middleware(scope, receive, send))
+    assert seen["cancelled"] is True
+
+
+def test_repository_propagates_budget_and_maps_timeouts():
+    import time
+
+    from app.domain_noaa_repository import NOAARepository
+    from app.request_context import (
+        DeadlineExceeded,
+        RequestCancelled,
+        RequestContext,
+    )
+
+    class Api:
+        timeouts = []
+
+        def alerts_query(self, _request_timeout=None):
+            Api.timeouts.append(_request_timeout)
+            return {"features": []}
+
+        def gridpoint(self, _request_timeout=None, **kwargs):
+            raise TimeoutError("read timed out")
+
+    repo = NOAARepository(Api())
+    context = RequestContext(route_class="alerts", deadline=time.monotonic() + 2)
+    token = current_request.set(context)
+    try:
+        repo.alerts_query()
+        assert 0 < Api.timeouts[0] <= 2
+
+        with pytest.raises(DeadlineExceeded):
+            repo.gridpoint(wfo="LWX", x=1, y=1)
+
+        context.cancelled.set()
+        with pytest.raises(RequestCancelled):
+            repo.alerts_query()
+        assert len(Api.timeouts) == 1
+    finally:
+        current_request.reset(token)
+
+
+def test_upstream_client_does_not_retry_timeouts(monkeypatch):
+    from app import domain_noaa_repository
+    from app.domain_noaa_repository import get_noaa_api
+
+    monkeypatch.setattr(domain_noaa_repository, "NOAA_REPLAY_PATH", None)
+    monkeypatch.setattr(domain_noaa_repository, "NOAA_RECORD_PATH", None)
+    get_noaa_api.cache_clear()
+    try:
+        retries = get_noaa_api().api_client.configuration.retries
+    finally:
+        get_noaa_api.cache_clear()
+
+    assert retries.connect == retries.read == retries.status == 0
+    assert retries.total == 3
+    assert not retries.is_retry("GET", 503)
+
+
+def test_gate_recovers_from_a_slow_service_time_estimate():
+    async def scenario():
+        gate = RouteGate("alerts", RouteClassLimits(1, 4, default_deadline=10))
+        for _ in range(18):
+            await gate.acquire(deadline=10)
+            gate.release(elapsed=10.2)
+        assert gate.service_time > 10
+
+        # Idle: admitted whatever the estimate says.
+        await gate.acquire(deadline=10)
+        assert gate.active == 1
+
+        # Saturated: shed, but every rejection decays the estimate.
+        for _ in range(100):
+            with pytest.raises(Rejected, match="deadline"):
+                await gate.acquire(deadline=0.4)
+        assert gate.service_time < 1
+        gate.release(elapsed=0.1)
+
+    asyncio.run(scenario())
+
+
+def test_threadpool_fits_every_route_class_at_its_limit():
+    import anyio
+    import anyio.to_thread
+
+    total = sum(limit.max_concurrency for limit in ROUTE_CLASS_LIMITS.values())
+
+    async def scenario():
+        size = size_threadpool()
+        assert size >= total + THREADPOOL_HEADROOM
+        assert anyio.to_thread.current_default_thread_limiter().total_tokens == size
+
+    anyio.run(scenario)
@@ -0,0 +1,177 @@
+import gzip
+import json
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import alert_archive
+from app.alert_archive import AlertArchive, ArchiveUnavailable, get_alert_archive
+from app.main import app
+
+
+def _record(identifier, event, sent, severity="Moderate", zones=("KSC001",), updated=None):
+    return {
+        "id": identifier,
+        "event": event,
+        "severity": severity,
+        "sent": sent,
+        "updated": updated or sent,
+        "ingested_at": updated or sent,
+        "affected_zones": json.dumps(
+            [f"https://api.weather.gov/zones/county/{zone}" for zone in zones]
+        ),
+        "parameters": json.dumps({"NWSheadline": [event.upper()]}),
+        "geometry": None,
+    }
+
+
+def _write(root, key, records, manifest_stats=None):
+    path = root / key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = b"".join(json.dumps(r).encode() + b"\n" for r in records)
+    path.write_bytes(gzip.compress(lines))
+    if manifest_stats is not None:
+        manifest = path.parent / "_manifest.json"
+        manifest.write_text(json.dumps({"sources": [], "stats": manifest_stats}))
+        os.utime(manifest, (path.stat().st_mtime + 1,) * 2)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    _write(
+        tmp_path,
+        "daily/ingest_date=20240501/alerts.ndjson.gz",
+        [
+            _record("a1", "Flood Watch", "2024-05-01T10:00:00-05:00"),
+            _record("a2", "Tornado Warning", "2024-05-01T18:00:00+00:00", "Extreme", ("OKC109",)),
+        ],
+        manifest_stats={
+            "sent_min": "2024-05-01T15:00:00+00:00",
+            "sent_max": "2024-05-01T18:00:00+00:00",
+            "events": ["Flood Watch", "Tornado Warning"],
+            "severities": ["Extreme", "Moderate"],
+            "zones": ["KSC001", "OKC109"],
+        },
+    )
+    # Hourly files of a day without a daily file yet, and no manifest.
+    _write(
+        tmp_path,
+        "hourly/ingest_date=20240502/ingest_hour=03/alerts.ndjson.gz",
+        [
+            _record(
+                "a1", "Flood Watch", "2024-05-01T10:00:00-05:00",
+                severity="Severe", updated="2024-05-02T03:00:00+00:00",
+            ),
+            _record("a3", "Flood Watch", "2024-05-02T03:10:00+00:00", zones=("MDZ013",)),
+        ],
+    )
+    # Superseded by the daily file of the same day.
+    _write(tmp_path, "hourly/ingest_date=20240501/ingest_hour=15/alerts.ndjson.gz", [])
+    return AlertArchive(str(tmp_path))
+
+
+def test_daily_files_replace_hourly_ones(archive):
+    assert archive.data_files() == [
+        "daily/ingest_date=20240501/alerts.ndjson.gz",
+        "hourly/ingest_date=20240502/ingest_hour=03/alerts.ndjson.gz",
+    ]
+
+
+def test_latest_version_is_returned_newest_first(archive):
+    result = archive.query()
+    assert [(a["id"], a["severity"]) for a in result["alerts"]] == [
+        ("a3", "Moderate"),
+        ("a2", "Extreme"),
+        ("a1", "Severe"),
+    ]
+    assert result["alerts"][0]["affected_zones"] == [
+        "https://api.weather.gov/zones/county/MDZ013"
+    ]
+    assert "geometry" not in result["alerts"][0]
+
+
+def test_index_prunes_files_before_reading(archive):
+    result = archive.query(zone=["okc109"])
+    assert [a["id"] for a in result["alerts"]] == ["a2"]
+    assert result["files"] == {"total": 2, "scanned": 1}
+
+    reads = archive.files_read
+    result = archive.query(start="2024-05-02T00:00:00Z", event=["Flood Watch"])
+    assert [a["id"] for a in result["alerts"]] == ["a3"]
+    assert result["files"]["scanned"] == 1
+    assert archive.files_read == reads + 1  # the hourly file's index entry is cached
+
+    assert archive.query(event=["Blizzard Warning"])["files"]["scanned"] == 0
+
+
+def test_filters_combine(archive):
+    result = archive.query(
+        end="2024-05-01T16:00:00Z", severity=["Moderate"], zone=["KSC001"]
+    )
+    assert [a["id"] for a in result["alerts"]] == ["a1"]
+    assert archive.query(limit=1)["alerts"][0]["id"] == "a3"
+
+
+def test_limited_query_stops_at_older_files(archive):
+    result = archive.query(limit=1)
+    # a3 comes from the newest file; nothing in the daily file can outrank it.
+    assert [a["id"] for a in result["alerts"]] == ["a3"]
+    assert result["files"] == {"total": 2, "scanned": 1}
+
+    # The daily file's a2 (18:00) is newer than the hourly file's a1 (15:00).
+    result = archive.query(limit=2)
+    assert [a["id"] for a in result["alerts"]] == ["a3", "a2"]
+    assert result["files"]["scanned"] == 2
+
+
+def test_history_route(archive):
+    app.dependency_overrides[get_alert_archive] = lambda: archive
+    try:
+        client = TestClient(app)
+        res = client.get("/alerts/history", params={"event": "Tornado Warning"})
+        assert res.status_code == 200
+        assert [a["id"] for a in res.json()["alerts"]] == ["a2"]
+        assert client.get("/alerts/history", params={"limit": 0}).status_code == 422
+
+        app.dependency_overrides[get_alert_archive] = lambda: None
+        assert client.get("/alerts/history").status_code == 503
+    finally:
+        app.dependency_overrides.pop(get_alert_archive, None)
+
+
+def test_parquet_files_are_read(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pandas as pd
+
+    path = tmp_path / "daily/ingest_date=20240501/alerts.parquet"
+    path.parent.mkdir(parents=True)
+    pd.DataFrame(
+        [
+            _record("a1", "Flood Watch", "2024-05-01T10:00:00-05:00"),
+            _record("a2", "Tornado Warning", "2024-05-01T18:00:00+00:00", "Extreme"),
+        ]
+    ).to_parquet(path, index=False)
+
+    result = AlertArchive(str(tmp_path)).query(severity=["Extreme"])
+    assert [a["id"] for a in result["alerts"]] == ["a2"]
+
+
+def test_history_route_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(alert_archive, "_PARQUET", False)
+    path = tmp_path / "daily/ingest_date=20240501/alerts.parquet"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"PAR1")
+    archive = AlertArchive(str(tmp_path))
+    app.dependency_overrides[get_alert_archive] = lambda: archive
+    try:
+        res = TestClient(app).get("/alerts/history")
+        assert res.status_code == 503
+        assert "pyarrow" in res.json()["detail"]
+    finally:
+        app.dependency_overrides.pop(get_alert_archive, None)
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ArchiveUnavailable):
+        AlertArchive("s3://bucket/alerts")
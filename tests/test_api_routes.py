@@ -39,12 +39,36 @@ def test_health():
     assert res.json() == {"status": "ok"}
 
 
+def test_ready_reflects_warmup(monkeypatch):
+    from app.warmup import Readiness
+
+    state = Readiness()
+    monkeypatch.setattr("app.api_routes.readiness", state)
+    assert client.get("/ready").status_code == 503
+
+    state.mark_ready(warmed=3)
+    res = client.get("/ready")
+    assert res.status_code == 200
+    assert res.json()["status"] == "ready"
+
+
+def test_metrics():
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert "noaa_route_budget_seconds" in res.text
+
+
 # Alerts ----------------------------------------------------------------------
 
 def test_alerts_active():
     _assert_method(client.get("/alerts/active"), "alerts_active")
 
 
+def test_alerts_active_simplify_by_zoom():
+    body = _assert_method(client.get("/alerts/active?zoom=4"), "alerts_active")
+    assert body["kwargs"]["simplify"] == 0.088
+
+
 def test_alerts_active_area():
     body = _assert_method(client.get("/alerts/active/area/MD"), "alerts_active_area")
     assert body["kwargs"]["area"] == "MD"
@@ -69,7 +93,21 @@ def test_alerts_active_zone():
 
 
 def test_alerts_query():
-    _assert_method(client.get("/alerts"), "alerts_query")
+    body = _assert_method(client.get("/alerts"), "alerts_query")
+    assert body["kwargs"] == {}
+
+
+def test_alerts_query_pushes_down_filters():
+    res = client.get(
+        "/alerts?area=KS&area=MO&status=actual&start=2024-05-01T00:00:00Z&limit=50"
+    )
+    body = _assert_method(res, "alerts_query")
+    assert body["kwargs"] == {
+        "area": ["KS", "MO"],
+        "status": ["actual"],
+        "start": "2024-05-01T00:00:00+00:00",
+        "limit": 50,
+    }
 
 
 def test_alerts_single():
@@ -440,6 +478,18 @@ def test_zone_list():
     _assert_method(client.get("/zones"), "zone_list")
 
 
+def test_zone_list_pushes_down_filters():
+    res = client.get("/zones?type=forecast&area=KS&include_geometry=false")
+    body = _assert_method(res, "zone_list")
+    assert body["kwargs"] == {
+        "type": ["forecast"], "area": ["KS"], "include_geometry": False,
+    }
+
+
+def test_rejects_invalid_limit():
+    assert client.get("/alerts/active?limit=0").status_code == 422
+
+
 def test_zone_list_type():
     body = _assert_method(
         client.get("/zones/forecast"),
@@ -0,0 +1,219 @@
+import os
+import socketserver
+import threading
+import time
+
+import pytest
+
+from app.cache import (
+    MemoryCache,
+    MmapCache,
+    RedisCache,
+    SQLiteCache,
+    TieredCache,
+    cache_key,
+)
+from app.domain_noaa_repository import NOAARepository
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol for GET / SET PX / DEL."""
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            header = self.rfile.readline()
+            if not header:
+                return
+            args = []
+            for _ in range(int(header[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            command = args[0].upper()
+            if command == b"GET":
+                value, expires_at = store.get(args[1], (None, 0))
+                if value is None or expires_at <= time.time():
+                    self.wfile.write(b"$-1\r\n")
+                else:
+                    self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+            elif command == b"SET":
+                store[args[1]] = (args[2], time.time() + int(args[4]) / 1000)
+                self.wfile.write(b"+OK\r\n")
+            elif command == b"DEL":
+                self.wfile.write(b":%d\r\n" % int(store.pop(args[1], None) is not None))
+
+
+@pytest.fixture
+def redis_stand_in():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RespHandler)
+    server.daemon_threads = True
+    server.store = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield "redis://127.0.0.1:%d/0" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "mmap", "redis", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        cache = MemoryCache()
+    elif request.param == "mmap":
+        cache = MmapCache(tmp_path / "cache.mmap", slots=64, slot_size=4096)
+    elif request.param == "sqlite":
+        cache = SQLiteCache(tmp_path / "cache.sqlite")
+    else:
+        cache = RedisCache(request.getfixturevalue("redis_stand_in"))
+    yield cache
+    cache.close()
+
+
+def test_backend_round_trip_and_ttl(backend):
+    backend.set("alerts", {"features": [1, 2, 3]}, ttl=60)
+    assert backend.get("alerts") == {"features": [1, 2, 3]}
+
+    backend.set("expired", {"x": 1}, ttl=0.001)
+    time.sleep(0.01)
+    assert backend.get("expired") is None
+
+    backend.delete("alerts")
+    assert backend.get("alerts") is None
+
+
+def test_mmap_cache_is_shared_between_handles(tmp_path):
+    path = tmp_path / "shared.mmap"
+    writer = MmapCache(path, slots=16, slot_size=4096)
+    reader = MmapCache(path, slots=16, slot_size=4096)
+    writer.set("k", [1, 2], ttl=60)
+    assert reader.get("k") == [1, 2]
+
+
+def test_mmap_cache_spills_entries_larger_than_a_slot(tmp_path):
+    from app import metrics
+
+    big = {"data": os.urandom(8192).hex()}
+    cache = MmapCache(tmp_path / "cache.mmap", slots=4, slot_size=4096)
+    spilled = metrics.cache_oversize_total.value("spilled")
+    cache.set("big", big, 60)
+    assert cache.get("big") == big
+    assert metrics.cache_oversize_total.value("spilled") == spilled + 1
+
+    cache.set("big", {"data": "small"}, 60)  # fits a slot again
+    cache.delete("big")
+    assert cache.get("big") is None
+    cache.close()
+
+    cache = MmapCache(tmp_path / "other.mmap", slots=4, slot_size=4096, overflow_bytes=0)
+    skipped = metrics.cache_oversize_total.value("skipped")
+    cache.set("big", big, 60)
+    assert cache.get("big") is None
+    assert metrics.cache_oversize_total.value("skipped") == skipped + 1
+    cache.close()
+
+
+def test_sqlite_cache_evicts_least_recently_read(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.sqlite", max_bytes=3000)
+    blobs = [os.urandom(400).hex() for _ in range(8)]  # incompressible
+    for i, blob in enumerate(blobs):
+        cache.set(f"k{i}", blob, ttl=60)
+        time.sleep(0.01)
+        if i < 4:
+            cache.get("k0")
+
+    assert cache.get("k1") is None
+    assert cache.get("k7") == blobs[7]
+
+
+def test_tiered_cache_persists_reference_data_across_restarts(tmp_path):
+    path = tmp_path / "l2.sqlite"
+    first = TieredCache(MemoryCache(), SQLiteCache(path), frozenset({"glossary"}))
+    first.set(cache_key("glossary", {}), {"terms": 1}, ttl=60)
+    first.set(cache_key("alerts_active", {}), {"features": []}, ttl=60)
+    first.close()
+
+    restarted = TieredCache(MemoryCache(), SQLiteCache(path), frozenset({"glossary"}))
+    assert restarted.warm() == 1
+    assert restarted.get(cache_key("glossary", {})) == {"terms": 1}
+    assert restarted.get(cache_key("alerts_active", {})) is None
+
+
+def test_redis_cache_unavailable_is_a_miss():
+    cache = RedisCache("redis://127.0.0.1:1/0", timeout=0.05)
+    cache.set("k", 1, ttl=60)
+    assert cache.get("k") is None
+
+
+def test_cache_key_normalizes_arguments():
+    assert cache_key("point", {"latitude": 39.12340001, "longitude": -77.0}) == (
+        cache_key("point", {"longitude": -77.0, "latitude": 39.1234})
+    )
+    assert cache_key("zone", {"zone_id": " MDZ001 "}) == cache_key("zone", {"zone_id": "MDZ001"})
+
+
+def test_repository_serves_repeat_calls_from_cache():
+    class Api:
+        calls = 0
+
+        def glossary(self, **_options):
+            Api.calls += 1
+            return {"glossary": []}
+
+    repo = NOAARepository(Api(), cache=MemoryCache())
+    assert repo.glossary() == {"glossary": []}
+    assert repo.glossary() == {"glossary": []}
+    assert Api.calls == 1
+    assert repo.stats == {"miss": 1, "hit": 1}
+
+
+def test_repository_negatively_caches_client_errors():
+    from openapi_client.exceptions import ApiException
+
+    class Api:
+        calls = 0
+
+        def obs_station(self, station_id, **_options):
+            Api.calls += 1
+            status = 404 if station_id == "NOPE" else 429
+            raise ApiException(status=status, reason="Not Found")
+
+    repo = NOAARepository(Api(), cache=MemoryCache())
+    for _ in range(3):
+        with pytest.raises(ApiException) as info:
+            repo.obs_station(station_id="NOPE ")
+        assert info.value.status == 404
+    assert Api.calls == 1
+    assert repo.stats["negative_hit"] == 2
+
+    # Rate limiting is transient and never cached.
+    for _ in range(2):
+        with pytest.raises(ApiException):
+            repo.obs_station(station_id="KDCA")
+    assert Api.calls == 3
+
+
+def test_repository_returns_json_data_on_miss_and_hit():
+    from datetime import datetime, timezone
+
+    from pydantic import BaseModel, Field
+
+    class Period(BaseModel):
+        start_time: datetime = Field(alias="startTime")
+        detail: str | None = None
+
+    class Api:
+        def glossary(self, **_options):
+            return Period(startTime=datetime(2024, 5, 1, 12, tzinfo=timezone.utc))
+
+    repo = NOAARepository(Api(), cache=MemoryCache())
+    miss = repo.glossary()
+    hit = repo.glossary()
+
+    assert miss == hit == {"startTime": "2024-05-01T12:00:00Z"}
+    assert repo.stats == {"miss": 1, "hit": 1}
+
+
+def test_cache_rejects_values_that_are_not_json():
+    from datetime import datetime
+
+    with pytest.raises(TypeError):
+        MemoryCache().set("key", {"at": datetime(2024, 5, 1)}, 60)
@@ -0,0 +1,153 @@
+from fastapi.testclient import TestClient
+
+from app.domain_noaa_repository import get_noaa_repository
+from app.forecast_summary import (
+    ForecastSummaries,
+    get_forecast_summaries,
+    hourly_frame,
+    parse_gridpoint,
+)
+from app.gridpoint_layers import GridpointDecoder
+from app.main import app
+
+
+def _period(start, temperature, pop=0, wind="5 mph"):
+    return {
+        "startTime": start,
+        "temperature": temperature,
+        "temperatureUnit": "F",
+        "probabilityOfPrecipitation": {"unitCode": "wmoUnit:percent", "value": pop},
+        "dewpoint": {"unitCode": "wmoUnit:degC", "value": 10.0},
+        "relativeHumidity": {"unitCode": "wmoUnit:percent", "value": 50},
+        "windSpeed": wind,
+    }
+
+
+def _hourly(update_time="2024-05-01T10:00:00+00:00"):
+    return {
+        "properties": {
+            "updateTime": update_time,
+            "periods": [
+                _period("2024-05-01T22:00:00-04:00", 68, pop=20),
+                _period("2024-05-01T23:00:00-04:00", 50, wind="10 to 15 mph"),
+                _period("2024-05-02T00:00:00-04:00", 41, pop=60),
+            ],
+        }
+    }
+
+
+GRIDPOINT = {
+    "properties": {
+        "updateTime": "2024-05-01T10:00:00+00:00",
+        "quantitativePrecipitation": {
+            "uom": "wmoUnit:mm",
+            "values": [{"validTime": "2024-05-02T02:00:00+00:00/PT4H", "value": 8.0}],
+        },
+    }
+}
+
+
+class ForecastRepository:
+    def __init__(self):
+        self.hourly = [_hourly()]
+        self.calls = 0
+
+    def gridpoint_forecast_hourly(self, wfo, x, y):
+        if wfo == "BAD":
+            raise RuntimeError("upstream failed")
+        self.calls += 1
+        return self.hourly[min(self.calls, len(self.hourly)) - 1]
+
+    def gridpoint(self, wfo, x, y):
+        return GRIDPOINT
+
+
+def test_parse_gridpoint():
+    assert parse_gridpoint(" lwx/96,70 ") == ("LWX", 96, 70)
+
+
+def test_hourly_frame_normalizes_units():
+    frame = hourly_frame(_hourly())
+    assert frame["temperature"].round(1).tolist() == [20.0, 10.0, 5.0]
+    assert frame["windSpeed"].round(2).tolist() == [8.05, 24.14, 8.05]
+    assert frame["date"].tolist() == ["2024-05-01", "2024-05-01", "2024-05-02"]
+
+
+def test_hourly_frame_accepts_model_objects():
+    from datetime import datetime
+
+    from pydantic import BaseModel, ConfigDict, Field
+
+    class Period(BaseModel):
+        model_config = ConfigDict(extra="allow")
+        start_time: datetime = Field(alias="startTime")
+
+    class Properties(BaseModel):
+        periods: list[Period]
+
+    class Forecast(BaseModel):
+        properties: Properties
+
+    payload = _hourly()
+    for period in payload["properties"]["periods"]:
+        period["startTime"] = datetime.fromisoformat(period["startTime"])
+
+    for source in (payload, Forecast.model_validate(payload)):
+        frame = hourly_frame(source)
+        assert frame["date"].tolist() == ["2024-05-01", "2024-05-01", "2024-05-02"]
+        assert str(frame["startTime"].iloc[0]) == "2024-05-02 02:00:00+00:00"
+
+
+def test_daily_summary_in_us_units_with_precipitation():
+    summaries = ForecastSummaries(decoder=GridpointDecoder())
+    result = summaries.summarize(
+        ForecastRepository(), "LWX", 96, 70, units="us", precipitation=True
+    )
+    first, second = result["days"]
+    assert result["units"]["temperatureMax"] == "degF"
+    assert (first["temperatureMax"], first["temperatureMin"]) == (68.0, 50.0)
+    assert first["probabilityOfPrecipitationMax"] == 20.0
+    assert first["windSpeedMax"] == 15.0
+    # 2 mm/h from 02Z: 22:00 and 23:00 EDT fall in the interval.
+    assert first["precipitationTotal"] == round(4 / 25.4, 2)
+    assert second == {**second, "date": "2024-05-02", "hours": 1, "temperatureMax": 41.0}
+
+
+def test_summaries_are_memoized_until_update_time_changes():
+    repo = ForecastRepository()
+    repo.hourly = [_hourly(), _hourly(), _hourly("2024-05-01T11:00:00+00:00")]
+    summaries = ForecastSummaries()
+    first = summaries.summarize(repo, "LWX", 96, 70)
+    assert summaries.summarize(repo, "LWX", 96, 70) is first
+    summaries.summarize(repo, "LWX", 96, 70)
+    assert summaries.computed == 2
+
+
+def test_batch_reports_failures_per_gridpoint():
+    results = ForecastSummaries().summarize_batch(
+        ForecastRepository(), [("LWX", 96, 70), ("BAD", 1, 1)]
+    )
+    assert results[0]["gridpoint"] == "LWX/96,70"
+    assert results[1] == {"gridpoint": "BAD/1,1", "error": "upstream failed"}
+
+
+def test_batch_route():
+    previous = app.dependency_overrides.get(get_noaa_repository)
+    app.dependency_overrides[get_forecast_summaries] = lambda: ForecastSummaries()
+    app.dependency_overrides[get_noaa_repository] = lambda: ForecastRepository()
+    try:
+        client = TestClient(app)
+        res = client.get("/gridpoints/daily?gridpoint=LWX/96,70&gridpoint=OKX/33,35")
+        invalid = client.get("/gridpoints/daily?gridpoint=nowhere")
+        single = client.get("/gridpoints/LWX/96,70/forecast/daily?units=us")
+    finally:
+        app.dependency_overrides.pop(get_forecast_summaries)
+        if previous is None:
+            app.dependency_overrides.pop(get_noaa_repository)
+        else:
+            app.dependency_overrides[get_noaa_repository] = previous
+
+    assert res.status_code == 200
+    assert [entry["gridpoint"] for entry in res.json()] == ["LWX/96,70", "OKX/33,35"]
+    assert invalid.status_code == 422
+    assert single.json()["days"][0]["temperatureMax"] == 68.0
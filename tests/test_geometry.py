@@ -0,0 +1,76 @@
+import numpy as np
+
+from app.cache import MemoryCache
+from app.domain_noaa_repository import NOAARepository
+from app.geometry import (
+    canonical_tolerance,
+    simplify_geometry,
+    simplify_line,
+    tolerance_for_zoom,
+)
+
+
+def _circle(points=2000):
+    angles = np.linspace(0, 2 * np.pi, points)
+    ring = np.column_stack([-97 + np.cos(angles), 38 + np.sin(angles)])
+    ring[-1] = ring[0]
+    return ring.tolist()
+
+
+def test_simplify_line_drops_collinear_points():
+    line = np.array([[0.0, 0.0], [1.0, 0.001], [2.0, 0.0], [3.0, 5.0]])
+    assert simplify_line(line, 0.01).tolist() == [[0.0, 0.0], [2.0, 0.0], [3.0, 5.0]]
+
+
+def test_polygon_is_simplified_and_quantized():
+    polygon = {"type": "Polygon", "coordinates": [_circle()]}
+    ring = simplify_geometry(polygon, 0.01)["coordinates"][0]
+    assert 4 <= len(ring) < 100
+    assert ring[0] == ring[-1]
+    assert all(round(x, 3) == x for x, _ in ring)
+
+
+def test_tiny_holes_are_dropped_but_outer_ring_kept():
+    tiny = [[0, 0], [0.0001, 0], [0.0001, 0.0001], [0, 0]]
+    polygon = {"type": "Polygon", "coordinates": [tiny, tiny]}
+    assert len(simplify_geometry(polygon, 0.1)["coordinates"]) == 1
+
+
+def test_zoom_tolerance_is_about_one_pixel():
+    assert canonical_tolerance(tolerance_for_zoom(0)) == 1.4
+    assert tolerance_for_zoom(10) < tolerance_for_zoom(5)
+
+
+class ZoneApi:
+    calls = 0
+
+    def zone(self, type, zone_id, _request_timeout=None):
+        ZoneApi.calls += 1
+        return {"id": zone_id, "geometry": {"type": "Polygon", "coordinates": [_circle()]}}
+
+
+def test_simplified_geometry_is_cached_per_tolerance():
+    ZoneApi.calls = 0
+    repo = NOAARepository(ZoneApi(), cache=MemoryCache())
+    coarse = repo.zone("forecast", "KSZ001", simplify=0.1)
+    assert repo.zone("forecast", "KSZ001", simplify=0.1) == coarse
+    fine = repo.zone("forecast", "KSZ001", simplify=0.001)
+
+    assert ZoneApi.calls == 1
+    assert repo.stats["simplified_hit"] == 1
+    assert len(coarse["geometry"]["coordinates"][0]) < len(fine["geometry"]["coordinates"][0])
+
+
+def test_simplified_geometry_is_cached_from_a_shared_raw_entry():
+    ZoneApi.calls = 0
+    cache = MemoryCache()
+    NOAARepository(ZoneApi(), cache=cache).zone("forecast", "KSZ001")
+
+    # Another worker: the raw entry is in the shared cache, not stored by it.
+    repo = NOAARepository(ZoneApi(), cache=cache)
+    simplified = repo.zone("forecast", "KSZ001", simplify=0.1)
+    assert repo.zone("forecast", "KSZ001", simplify=0.1) == simplified
+
+    assert ZoneApi.calls == 1
+    assert repo.stats["simplified_hit"] == 1
+    assert repo.access.hot(1)[0][1] == "zone"
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.domain_noaa_repository import get_noaa_repository
+from app.gridpoint_layers import (
+    GridpointDecoder,
+    decode_gridpoint,
+    get_gridpoint_decoder,
+    parse_valid_times,
+    select,
+)
+from app.main import app
+from app.units import convert
+
+
+def _gridpoint(update_time="2024-05-01T10:00:00+00:00", temperature=10.0):
+    return {
+        "properties": {
+            "updateTime": update_time,
+            "temperature": {
+                "uom": "wmoUnit:degC",
+                "values": [
+                    {"validTime": "2024-05-01T12:00:00+00:00/PT2H", "value": temperature},
+                    {"validTime": "2024-05-01T14:00:00+00:00/PT1H", "value": 20.0},
+                ],
+            },
+            "quantitativePrecipitation": {
+                "uom": "wmoUnit:mm",
+                "values": [{"validTime": "2024-05-01T12:00:00+00:00/PT6H", "value": 6.0}],
+            },
+            "weather": {
+                "values": [
+                    {
+                        "validTime": "2024-05-01T12:00:00+00:00/PT6H",
+                        "value": [{"coverage": "chance"}],
+                    }
+                ]
+            },
+        }
+    }
+
+
+def test_parse_valid_times():
+    starts, hours = parse_valid_times(
+        ["2024-05-01T12:00:00+00:00/PT2H", "2024-05-01T14:00:00-05:00/P1DT6H"]
+    )
+    assert starts.tolist()[1] == np.datetime64("2024-05-01T19", "h").tolist()
+    assert hours.tolist() == [2, 30]
+
+
+def test_decode_expands_intervals_and_spreads_accumulations():
+    decoded = decode_gridpoint(_gridpoint())
+    assert "weather" not in decoded.layers
+    assert len(decoded.times) == 6
+    np.testing.assert_array_equal(
+        decoded.layers["temperature"], [10, 10, 20, np.nan, np.nan, np.nan]
+    )
+    assert decoded.layers["quantitativePrecipitation"].sum() == 6.0
+    assert decoded.units["temperature"] == "degC"
+
+
+def test_select_resamples_and_converts_units():
+    result = select(decode_gridpoint(_gridpoint()), freq="3h", how="max", units="us")
+    assert result["units"] == {"temperature": "degF", "quantitativePrecipitation": "in"}
+    assert result["layers"]["temperature"] == [68.0, None]
+    assert result["layers"]["quantitativePrecipitation"] == [0.118, 0.118]
+
+    with pytest.raises(KeyError):
+        select(decode_gridpoint(_gridpoint()), layers=["nope"])
+
+
+def test_convert_round_trips():
+    assert convert(np.array([100.0]), "degF", "degC").round(6).tolist() == [37.777778]
+    assert convert(np.array([10.0]), "kt", "km_h-1").tolist() == [18.52]
+    with pytest.raises(ValueError):
+        convert(np.array([1.0]), "degC", "mm")
+
+
+class GridpointRepository:
+    def __init__(self, *payloads):
+        self.payloads = list(payloads)
+
+    def gridpoint(self, wfo, x, y):
+        return self.payloads.pop(0) if len(self.payloads) > 1 else self.payloads[0]
+
+
+def test_decoder_reuses_result_until_update_time_changes():
+    repo = GridpointRepository(
+        _gridpoint(), _gridpoint(), _gridpoint("2024-05-01T11:00:00+00:00", 15.0)
+    )
+    decoder = GridpointDecoder()
+    first = decoder.get(repo, "LWX", 96, 70)
+    assert decoder.get(repo, "lwx", 96, 70) is first
+    assert decoder.get(repo, "LWX", 96, 70).layers["temperature"][0] == 15.0
+    assert decoder.decoded == 2
+
+
+def test_layers_route():
+    previous = app.dependency_overrides.get(get_noaa_repository)
+    app.dependency_overrides[get_gridpoint_decoder] = lambda: GridpointDecoder()
+    app.dependency_overrides[get_noaa_repository] = lambda: GridpointRepository(
+        _gridpoint()
+    )
+    try:
+        client = TestClient(app)
+        res = client.get("/gridpoints/LWX/96,70/layers?layers=temperature&units=us")
+        unknown = client.get("/gridpoints/LWX/96,70/layers?layers=bogus")
+    finally:
+        app.dependency_overrides.pop(get_gridpoint_decoder)
+        if previous is None:
+            app.dependency_overrides.pop(get_noaa_repository)
+        else:
+            app.dependency_overrides[get_noaa_repository] = previous
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["updateTime"] == "2024-05-01T10:00:00+00:00"
+    assert body["validTimes"][0] == "2024-05-01T12:00:00+00:00"
+    assert body["layers"]["temperature"][:3] == [50.0, 50.0, 68.0]
+    assert unknown.status_code == 422
@@ -0,0 +1,172 @@
+import hashlib
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cache import MemoryCache, cache_key
+from app.domain_noaa_repository import CACHE_TTLS, NOAARepository, get_noaa_repository
+from app.icon_cache import Icon, IconCache, get_icon_cache, icon_key, media_type
+from app.main import app
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+class IconRepository:
+    def __init__(self):
+        self.calls = []
+
+    def icons(self, **kwargs):
+        self.calls.append(("icons", kwargs))
+        return bytearray(PNG)
+
+    def icons_dual_condition(self, **kwargs):
+        self.calls.append(("icons_dual_condition", kwargs))
+        return bytearray(PNG + kwargs["second"].encode())
+
+
+@pytest.fixture
+def repo():
+    return IconRepository()
+
+
+@contextmanager
+def _client(repo, cache):
+    saved = dict(app.dependency_overrides)
+    app.dependency_overrides[get_noaa_repository] = lambda: repo
+    app.dependency_overrides[get_icon_cache] = lambda: cache
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(saved)
+
+
+@pytest.fixture
+def client(tmp_path, repo):
+    with _client(repo, IconCache(str(tmp_path))) as client:
+        yield client
+
+
+def test_icons_are_content_addressed(tmp_path):
+    cache = IconCache(str(tmp_path))
+    first = cache.put(icon_key("land", "day", "skc"), PNG)
+    second = cache.put(icon_key("land", "night", "skc"), PNG)
+
+    assert first.digest == second.digest
+    assert first.media_type == "image/png"
+    assert len(list((tmp_path / "objects").rglob("*"))) == 2  # one shard, one object
+
+    # A fresh process finds the icon on disk and serves the file.
+    icon = IconCache(str(tmp_path)).get(icon_key("land", "night", "skc"))
+    assert icon == Icon(first.digest, "image/png", first.path)
+
+
+def test_memory_tier_is_byte_bounded(tmp_path):
+    cache = IconCache(str(tmp_path), memory_bytes=2 * len(PNG) + 2)
+    for condition in ("a", "b", "c"):
+        cache.put(icon_key("land", "day", condition), PNG + condition.encode())
+
+    assert cache.get(icon_key("land", "day", "a")).content is None  # from disk
+    assert cache.get(icon_key("land", "day", "c")).content is not None
+
+
+def test_media_type():
+    assert media_type(PNG) == "image/png"
+    assert media_type(b"\xff\xd8\xff\xe0") == "image/jpeg"
+    assert media_type(b"<svg xmlns='http://www.w3.org/2000/svg'/>") == "image/svg+xml"
+    assert media_type(b"???") == "application/octet-stream"
+
+
+def test_icon_is_generated_once(client, repo):
+    first = client.get("/icons/land/day/skc")
+    second = client.get("/icons/land/day/skc")
+
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content == PNG
+    assert first.headers["content-type"] == "image/png"
+    assert first.headers["etag"] == second.headers["etag"]
+    assert "immutable" in first.headers["cache-control"]
+    assert repo.calls == [
+        ("icons", {"icon_set": "land", "time_of_day": "day", "first": "skc"})
+    ]
+
+
+def test_icon_from_disk_is_a_file_response(tmp_path, repo):
+    IconCache(str(tmp_path)).put(icon_key("land", "day", "few"), PNG)
+    with _client(repo, IconCache(str(tmp_path))) as client:
+        res = client.get("/icons/land/day/few")
+
+    assert res.status_code == 200
+    assert res.content == PNG
+    assert res.headers["etag"] == f'"{hashlib.sha256(PNG).hexdigest()}"'
+    assert repo.calls == []
+
+
+def test_icon_conditional_request(client):
+    etag = client.get("/icons/land/day/skc").headers["etag"]
+
+    res = client.get("/icons/land/day/skc", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+    assert res.headers["etag"] == etag
+
+    res = client.get("/icons/land/day/skc", headers={"If-None-Match": '"other"'})
+    assert res.status_code == 200
+
+
+def test_icon_options_are_part_of_the_key(client, repo):
+    client.get("/icons/land/day/skc/rain?size=medium&fontsize=12")
+    client.get("/icons/land/day/skc/rain")
+    client.get("/icons/land/day/skc/rain?size=medium&fontsize=12")
+
+    assert [kwargs for _, kwargs in repo.calls] == [
+        {
+            "icon_set": "land",
+            "time_of_day": "day",
+            "first": "skc",
+            "second": "rain",
+            "size": "medium",
+            "fontsize": 12,
+        },
+        {"icon_set": "land", "time_of_day": "day", "first": "skc", "second": "rain"},
+    ]
+    assert client.get("/icons/land/day/skc?fontsize=99").status_code == 422
+
+
+def test_pregenerate(tmp_path, repo):
+    cache = IconCache(str(tmp_path))
+    icons = [("land", "day", "skc", None), ("land", "night", "skc", "rain")]
+
+    assert cache.pregenerate(repo, icons) == {"icons": 2, "cached": 2}
+    assert cache.pregenerate(repo, icons) == {"icons": 2, "cached": 2}
+    assert len(repo.calls) == 2
+    assert cache.generated == 2
+
+
+def test_disk_hits_are_promoted_on_repeat_use(tmp_path):
+    IconCache(str(tmp_path)).put(icon_key("land", "day", "ovc"), PNG)
+    cache = IconCache(str(tmp_path))
+    key = icon_key("land", "day", "ovc")
+
+    assert cache.get(key).content is None
+    assert cache.get(key).content is None  # promoted, still served from the file
+    assert cache.get(key).content == PNG
+
+
+def test_icons_bypass_the_response_cache():
+    class IconApi:
+        calls = 0
+
+        def icons(self, set, time_of_day, first, _request_timeout=None):
+            IconApi.calls += 1
+            return bytearray(PNG)
+
+    backend = MemoryCache()
+    repo = NOAARepository(IconApi(), cache=backend)
+    repo.icons(icon_set="land", time_of_day="day", first="skc")
+
+    assert IconApi.calls == 1
+    assert "icons" not in CACHE_TTLS
+    kwargs = {"set": "land", "time_of_day": "day", "first": "skc"}
+    assert backend.get(cache_key("icons", kwargs)) is None
@@ -0,0 +1,27 @@
+import sys
+
+from app.lazy_client import defer_package_init
+
+
+def test_package_init_deferred_until_first_attribute(tmp_path, monkeypatch):
+    pkg = tmp_path / "heavy_pkg"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("LOADED = True\nfrom heavy_pkg.light import VALUE\n")
+    (pkg / "light.py").write_text("VALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    module = defer_package_init("heavy_pkg")
+    try:
+        from heavy_pkg.light import VALUE
+
+        assert VALUE == 42
+        assert "LOADED" not in vars(module)
+
+        assert module.LOADED is True
+    finally:
+        for name in ("heavy_pkg", "heavy_pkg.light"):
+            sys.modules.pop(name, None)
+
+
+def test_missing_package_is_ignored():
+    assert defer_package_init("no_such_package_here") is None
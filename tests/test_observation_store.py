@@ -0,0 +1,160 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from openapi_client.exceptions import ApiException
+
+from app import observation_store
+from app.main import app
+from app.observation_store import (
+    ObservationPoller,
+    ObservationStore,
+    get_observation_poller,
+    observations_frame,
+)
+
+
+def _feature(timestamp, temperature, wind=None):
+    return {
+        "properties": {
+            "timestamp": timestamp,
+            "temperature": {"unitCode": "wmoUnit:degC", "value": temperature},
+            "windSpeed": {"unitCode": "wmoUnit:km_h-1", "value": wind},
+            "textDescription": "Clear",
+        }
+    }
+
+
+PAGE = {
+    "features": [
+        _feature("2024-05-01T23:00:00+00:00", 10.0, 5.0),
+        _feature("2024-05-01T23:30:00+00:00", 12.0),
+        _feature("2024-05-02T00:00:00+00:00", 14.0, 7.0),
+    ]
+}
+
+
+class ObservationRepository:
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.calls = []
+
+    def iter_pages(self, method, **kwargs):
+        self.calls.append((method, kwargs))
+        self.open_pages = True
+        try:
+            yield from self.pages
+        finally:
+            self.open_pages = False
+
+
+@pytest.fixture(params=[True, False], ids=["parquet", "npz"])
+def store(request, tmp_path, monkeypatch):
+    if request.param:
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(observation_store, "_PARQUET", request.param)
+    return ObservationStore(tmp_path)
+
+
+def test_observations_frame_extracts_values():
+    frame = observations_frame([PAGE])
+    assert list(frame["temperature"]) == [10.0, 12.0, 14.0]
+    assert frame["windSpeed"].isna().tolist() == [False, True, False]
+    assert str(frame["timestamp"].dt.tz) == "UTC"
+
+
+def test_append_partitions_by_day_and_deduplicates(store):
+    assert store.append("kdca", observations_frame([PAGE])) == 3
+    assert store.append("KDCA", observations_frame([PAGE])) == 0
+
+    partitions = sorted(p.name for p in (store.root / "station=KDCA").iterdir())
+    assert partitions == ["date=2024-05-01", "date=2024-05-02"]
+    files = [p.name for p in (store.root / "station=KDCA" / partitions[0]).iterdir()]
+    assert files in (["part.parquet"], ["part.npz"])  # no temporary files left
+    assert store.latest("KDCA") == pd.Timestamp("2024-05-02T00:00:00Z")
+
+    frame = store.query("KDCA", start=pd.Timestamp("2024-05-01T23:15:00Z"))
+    assert list(frame["temperature"]) == [12.0, 14.0]
+    assert list(frame["textDescription"]) == ["Clear", "Clear"]
+
+
+def test_resample_and_aggregate(store):
+    store.append("KDCA", observations_frame([PAGE]))
+
+    hourly = store.resample("KDCA", "1h", "max", columns=["temperature"])
+    assert list(hourly["temperature"]) == [12.0, 14.0]
+
+    summary = store.aggregate("KDCA", columns=["temperature", "windSpeed"])
+    assert summary["temperature"] == {"min": 10.0, "max": 14.0, "mean": 12.0, "count": 3.0}
+    assert summary["windSpeed"]["count"] == 2.0
+
+
+def test_poller_requests_only_newer_observations(store):
+    repo = ObservationRepository(PAGE)
+    poller = ObservationPoller(repo, store, ["KDCA"], interval=0)
+    assert poller.run_once() == 3
+    assert poller.run_once() == 0
+
+    assert repo.open_pages is False
+    # A new station starts from a bounded window, then asks only for newer ones.
+    assert repo.calls[0][1]["start"] > pd.Timestamp.now("UTC") - pd.Timedelta(hours=73)
+    assert repo.calls[1][1]["start"] > pd.Timestamp("2024-05-02T00:00:00Z")
+
+
+def test_initial_sync_is_capped_and_closes_the_pages(tmp_path):
+    repo = ObservationRepository(*[PAGE] * (observation_store.INITIAL_SYNC_MAX_PAGES + 1))
+    pages = []
+    iter_pages = repo.iter_pages
+
+    def tracking_iter_pages(method, **kwargs):
+        pages.append(iter_pages(method, **kwargs))
+        return pages[-1]
+
+    repo.iter_pages = tracking_iter_pages
+    ObservationPoller(repo, ObservationStore(tmp_path), ["KDCA"], interval=0).run_once()
+
+    assert pages[0].gi_frame is None  # closed, not left suspended at the cap
+    assert repo.open_pages is False
+
+
+def test_history_routes_track_new_stations(tmp_path):
+    repo = ObservationRepository(PAGE)
+    poller = ObservationPoller(repo, ObservationStore(tmp_path), interval=0)
+    app.dependency_overrides[get_observation_poller] = lambda: poller
+    try:
+        client = TestClient(app)
+        history = client.get("/stations/KDCA/observations/history?columns=temperature")
+        summary = client.get("/stations/KDCA/observations/summary")
+        resampled = client.get("/stations/KDCA/observations/resample?freq=1D&how=mean")
+        bad = client.get("/stations/KDCA/observations/history?columns=bogus")
+    finally:
+        app.dependency_overrides.pop(get_observation_poller)
+
+    assert history.status_code == 200
+    assert history.json()[0] == {"timestamp": "2024-05-01T23:00:00+00:00", "temperature": 10.0}
+    assert summary.json()["temperature"]["max"] == 14.0
+    assert [row["temperature"] for row in resampled.json()] == [11.0, 14.0]
+    assert bad.status_code == 422
+    assert poller.stations == ["KDCA"]
+    assert len(repo.calls) == 1
+
+
+def test_failed_and_excess_stations_are_not_tracked(tmp_path):
+    class FailingRepository(ObservationRepository):
+        def iter_pages(self, method, **kwargs):
+            if kwargs["station_id"] == "NOPE":
+                raise ApiException(status=404, reason="Not Found")
+            return super().iter_pages(method, **kwargs)
+
+    poller = ObservationPoller(
+        FailingRepository(PAGE), ObservationStore(tmp_path), interval=0, max_stations=1
+    )
+    app.dependency_overrides[get_observation_poller] = lambda: poller
+    try:
+        client = TestClient(app)
+        assert client.get("/stations/NOPE/observations/history").status_code == 502
+        assert poller.stations == []
+        assert client.get("/stations/KDCA/observations/history").status_code == 200
+        assert client.get("/stations/KIAD/observations/history").status_code == 503
+    finally:
+        app.dependency_overrides.pop(get_observation_poller)
+    assert poller.stations == ["KDCA"]
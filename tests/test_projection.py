@@ -0,0 +1,39 @@
+from app.projection import Projection, get_projection
+
+COLLECTION = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "id": "a1",
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [-97.0, 38.0]},
+            "properties": {"id": "a1", "event": "Tornado Warning", "description": "..."},
+        }
+    ],
+    "pagination": {"next": "https://api.weather.gov/alerts?cursor=x"},
+}
+
+
+def test_identity_projection_returns_payload_unchanged():
+    assert get_projection(fields=None, geometry=True)(COLLECTION) is COLLECTION
+
+
+def test_fields_trim_feature_properties():
+    projected = get_projection(fields=" event, ", geometry=True)(COLLECTION)
+    feature = projected["features"][0]
+    assert feature["properties"] == {"id": "a1", "event": "Tornado Warning"}
+    assert feature["geometry"]["type"] == "Point"
+    assert projected["pagination"] == COLLECTION["pagination"]
+
+
+def test_geometry_can_be_dropped():
+    feature = Projection(geometry=False)(COLLECTION)["features"][0]
+    assert "geometry" not in feature
+    assert feature["properties"] == COLLECTION["features"][0]["properties"]
+
+
+def test_json_ld_graph_members_are_projected():
+    payload = {"@graph": [{"@id": "z1", "name": "Zone", "geometry": "POLYGON(...)"}]}
+    assert Projection(frozenset({"name"}), geometry=False)(payload) == {
+        "@graph": [{"@id": "z1", "name": "Zone"}]
+    }
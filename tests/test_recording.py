@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.domain_noaa_repository import NOAARepository, get_noaa_repository
+from app.main import app
+from app.recording import (
+    NotRecorded,
+    RecordingApi,
+    ReplayApi,
+    TrafficArchive,
+    iter_exchanges,
+)
+
+
+class FakeApi:
+    def __init__(self):
+        self.calls = 0
+
+    def zone(self, type, zone_id, _request_timeout=None):
+        self.calls += 1
+        return {"id": zone_id, "type": type, "n": self.calls}
+
+    def icons(self, set, time_of_day, first):
+        return b"\x89PNG"
+
+
+def test_record_then_replay_round_trip(tmp_path):
+    path = tmp_path / "traffic.jsonl.gz"
+    archive = TrafficArchive(path, flush_every=1)
+    recorder = RecordingApi(FakeApi(), archive)
+
+    recorder.zone(type="forecast", zone_id="MDZ001")
+    recorder.zone(type="forecast", zone_id="MDZ001", _request_timeout=5)
+    recorder.icons(set="land", time_of_day="day", first="skc")
+    archive.close()
+
+    exchanges = list(iter_exchanges(path))
+    assert [e.method for e in exchanges] == ["zone", "zone", "icons"]
+    assert exchanges[1].kwargs == {"type": "forecast", "zone_id": "MDZ001"}
+
+    replay = ReplayApi(exchanges)
+    assert replay.zone(zone_id="MDZ001", type="forecast")["n"] == 1
+    assert replay.zone(zone_id="MDZ001", type="forecast")["n"] == 2
+    # Exhausted keys keep serving the last recording.
+    assert replay.zone(zone_id="MDZ001", type="forecast")["n"] == 2
+    assert replay.icons(set="land", time_of_day="day", first="skc") == b"\x89PNG"
+
+
+def test_replay_unknown_call():
+    with pytest.raises(NotRecorded) as info:
+        ReplayApi([]).zone(type="forecast", zone_id="NOPE")
+    assert info.value.key == 'zone:{"type": "forecast", "zone_id": "NOPE"}'
+
+
+def test_replay_miss_is_a_503_naming_the_call():
+    saved = dict(app.dependency_overrides)
+    app.dependency_overrides[get_noaa_repository] = lambda: NOAARepository(ReplayApi([]))
+    try:
+        res = TestClient(app).get("/zones/forecast/MDZ001")
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(saved)
+
+    assert res.status_code == 503
+    assert res.json()["key"].startswith("zone:")
@@ -0,0 +1,116 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.domain_noaa_repository import NOAARepository, get_noaa_repository
+from app.main import app
+from app.streaming import ndjson_lines, next_cursor
+
+BASE = "https://api.weather.gov/alerts"
+
+
+class PagedApi:
+    """Three pages of two alerts each, linked by `pagination.next` cursors."""
+
+    def __init__(self):
+        self.calls = []
+
+    def alerts_query(self, cursor=None, _request_timeout=None, **kwargs):
+        self.calls.append(cursor)
+        index = int(cursor or 0)
+        page = {"features": [{"id": f"a{index * 2}"}, {"id": f"a{index * 2 + 1}"}]}
+        if index < 2:
+            page["pagination"] = {"next": f"{BASE}?limit=2&cursor={index + 1}"}
+        return page
+
+
+def _lines(chunks):
+    return [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+
+def test_next_cursor():
+    assert next_cursor({"pagination": {"next": f"{BASE}?cursor=abc&limit=5"}}) == "abc"
+    assert next_cursor({"features": []}) is None
+
+
+def test_iter_pages_follows_cursors():
+    api = PagedApi()
+    pages = list(NOAARepository(api).iter_pages("alerts_query", limit=2))
+    assert len(pages) == 3
+    assert api.calls == [None, "1", "2"]
+
+
+def test_ndjson_lines_caps_items_and_reports_resume_cursor():
+    pages = NOAARepository(PagedApi()).iter_pages("alerts_query")
+    lines = _lines(ndjson_lines(pages, max_items=3))
+
+    assert [line["id"] for line in lines[:-1]] == ["a0", "a1", "a2"]
+    assert lines[-1] == {
+        "type": "StreamEnd", "items": 3, "truncated": True, "next_cursor": "1", "skip": 1,
+    }
+
+
+def test_ndjson_lines_cut_on_the_first_page_resumes_from_the_request():
+    pages = NOAARepository(PagedApi()).iter_pages("alerts_query")
+    lines = _lines(ndjson_lines(pages, max_items=1))
+
+    assert [line["id"] for line in lines[:-1]] == ["a0"]
+    assert lines[-1]["truncated"] is True
+    assert lines[-1]["next_cursor"] is None
+    assert lines[-1]["skip"] == 1
+
+
+def test_ndjson_lines_exports_model_objects():
+    from datetime import datetime, timezone
+
+    from pydantic import BaseModel, Field
+
+    class Alert(BaseModel):
+        id: str
+        sent: datetime
+        ends: datetime | None = None
+
+    class Page(BaseModel):
+        features: list[Alert]
+        pagination: dict | None = Field(default=None)
+
+    sent = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    pages = [
+        Page(features=[Alert(id="a0", sent=sent)]),
+        {"features": [Alert(id="a1", sent=sent)]},
+    ]
+    lines = _lines(ndjson_lines(pages))
+
+    assert lines[:-1] == [
+        {"id": "a0", "sent": "2024-05-01T12:00:00Z"},
+        {"id": "a1", "sent": "2024-05-01T12:00:00Z"},
+    ]
+    assert lines[-1]["items"] == 2
+
+
+def test_ndjson_lines_reports_late_errors():
+    def pages():
+        yield {"features": [{"id": "a0"}]}
+        raise RuntimeError("upstream went away")
+
+    lines = _lines(ndjson_lines(pages()))
+    assert lines[-1]["truncated"] is True
+    assert lines[-1]["error"] == "upstream went away"
+
+
+def test_export_route_streams_all_pages():
+    previous = app.dependency_overrides.get(get_noaa_repository)
+    app.dependency_overrides[get_noaa_repository] = lambda: NOAARepository(PagedApi())
+    try:
+        res = TestClient(app).get("/export/alerts?limit=2")
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(get_noaa_repository)
+        else:
+            app.dependency_overrides[get_noaa_repository] = previous
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert len(lines) == 7
+    assert lines[-1]["truncated"] is False
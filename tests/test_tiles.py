@@ -0,0 +1,165 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.domain_noaa_repository import get_noaa_repository
+from app.main import app
+from app.tiles import (
+    EXTENT,
+    MVT_MEDIA_TYPE,
+    TileLayer,
+    TileService,
+    clip_ring,
+    get_tile_service,
+)
+
+
+def _varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        result |= (byte & 0x7F) << shift
+        pos += 1
+        shift += 7
+        if not byte & 0x80:
+            return result, pos
+
+
+def _fields(data):
+    """Decode one protobuf message into `[(field number, value)]`."""
+
+    pos, fields = 0, []
+    while pos < len(data):
+        key, pos = _varint(data, pos)
+        if key & 7 == 0:
+            value, pos = _varint(data, pos)
+        else:
+            length, pos = _varint(data, pos)
+            value, pos = data[pos:pos + length], pos + length
+        fields.append((key >> 3, value))
+    return fields
+
+
+def _packed(data):
+    values, pos = [], 0
+    while pos < len(data):
+        value, pos = _varint(data, pos)
+        values.append(value)
+    return values
+
+
+def _decode_layer(tile):
+    [(number, layer)] = _fields(tile)
+    assert number == 3
+    fields = _fields(layer)
+    features = [dict(_fields(value)) for number, value in fields if number == 2]
+    keys = [value.decode() for number, value in fields if number == 3]
+    return dict(fields), keys, features
+
+
+def _square(west, south, east, north, event="Flood Warning"):
+    ring = [[west, south], [east, south], [east, north], [west, north], [west, south]]
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Polygon", "coordinates": [ring]},
+        "properties": {"id": "a1", "event": event, "parameters": {"x": 1}},
+    }
+
+
+class SnapshotRepository:
+    def __init__(self, *payloads):
+        self.payloads = list(payloads)
+        self.calls = 0
+
+    def fetch(self, method, **kwargs):
+        self.calls += 1
+        return self.payloads[min(self.calls, len(self.payloads)) - 1]
+
+
+def _service(interval=60.0):
+    layer = TileLayer("alerts_active", ("id", "event"), refresh_interval=interval)
+    return TileService({"alerts": layer})
+
+
+def test_clip_ring_to_square():
+    ring = np.array([[-10.0, -10.0], [10.0, -10.0], [10.0, 10.0], [-10.0, 10.0]])
+    clipped = clip_ring(ring, 0.0, 5.0)
+    assert sorted(map(tuple, clipped.tolist())) == [(0, 0), (0, 5), (5, 0), (5, 5)]
+
+
+def test_polygon_is_encoded_as_mvt():
+    payload = {"features": [_square(-100, 30, -90, 40)]}
+    content, _ = _service().tile(SnapshotRepository(payload), "alerts", 0, 0, 0)
+
+    layer, keys, [feature] = _decode_layer(content)
+    assert layer[1] == b"alerts" and layer[15] == 2 and layer[5] == EXTENT
+    assert keys == ["id", "event"]
+    assert feature[3] == 3
+    commands = _packed(feature[4])
+    # MoveTo(1), 2 params, LineTo(3), 6 params, ClosePath(1).
+    assert commands[0] == (1 | 1 << 3)
+    assert commands[3] == (2 | 3 << 3)
+    assert commands[-1] == (7 | 1 << 3)
+
+    zigzag = [(v >> 1) ^ -(v & 1) for v in commands[1:3] + commands[4:10]]
+    ring = np.cumsum(np.array(zigzag).reshape(-1, 2), axis=0)
+    x, y = ring[:, 0], ring[:, 1]
+    # Exterior rings have positive area in tile coordinates.
+    assert np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y) > 0
+
+
+def test_tiles_outside_features_are_empty():
+    payload = {"features": [_square(-100, 30, -90, 40)]}
+    content, _ = _service().tile(SnapshotRepository(payload), "alerts", 2, 3, 0)
+    assert content == b""
+
+
+def test_tile_cache_is_invalidated_when_snapshot_changes():
+    first = {"features": [_square(-100, 30, -90, 40)]}
+    second = {"features": [_square(-100, 30, -90, 40, event="Tornado Warning")]}
+    repo = SnapshotRepository(first, first, second)
+    service = _service(interval=0)
+
+    tile_a, version_a = service.tile(repo, "alerts", 0, 0, 0)
+    tile_b, version_b = service.tile(repo, "alerts", 0, 0, 0)
+    tile_c, version_c = service.tile(repo, "alerts", 0, 0, 0)
+
+    assert version_a == version_b and tile_a == tile_b
+    assert version_c != version_a
+    assert b"Tornado Warning" in tile_c
+
+
+def test_tile_route():
+    payload = {"features": [_square(-100, 30, -90, 40)]}
+    service = _service()
+    previous = app.dependency_overrides.get(get_noaa_repository)
+    app.dependency_overrides[get_tile_service] = lambda: service
+    app.dependency_overrides[get_noaa_repository] = lambda: SnapshotRepository(payload)
+    try:
+        client = TestClient(app)
+        res = client.get("/tiles/alerts/0/0/0")
+        empty = client.get("/tiles/alerts/2/3/0")
+        unknown = client.get("/tiles/rivers/0/0/0")
+        out_of_range = client.get("/tiles/alerts/1/2/0")
+        rendered = len(service._tiles)
+        not_modified = client.get(
+            "/tiles/alerts/1/0/0", headers={"If-None-Match": res.headers["etag"]}
+        )
+        stale = client.get("/tiles/alerts/0/0/0", headers={"If-None-Match": '"old"'})
+    finally:
+        app.dependency_overrides.pop(get_tile_service)
+        if previous is None:
+            app.dependency_overrides.pop(get_noaa_repository)
+        else:
+            app.dependency_overrides[get_noaa_repository] = previous
+
+    assert res.status_code == 200
+    assert res.headers["content-type"] == MVT_MEDIA_TYPE
+    assert res.headers["etag"]
+    assert empty.status_code == 204
+    assert unknown.status_code == 404
+    assert out_of_range.status_code == 404
+    # Same layer snapshot: 304 without rendering the tile.
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == res.headers["etag"]
+    assert len(service._tiles) == rendered
+    assert stale.status_code == 200
@@ -0,0 +1,84 @@
+from app.cache import MemoryCache
+from app.domain_noaa_repository import NOAARepository
+from app.warmup import PrefetchScheduler, warm_cache
+
+
+class CountingApi:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def _(**kwargs):
+            if kwargs.get("zone_id") == "BAD":
+                raise RuntimeError("upstream failure")
+            self.calls.append((name, kwargs))
+            return {"method": name, "kwargs": kwargs}
+
+        return _
+
+
+def test_warm_cache_fills_cache_and_reports_failures():
+    api = CountingApi()
+    repo = NOAARepository(api, cache=MemoryCache())
+    summary = warm_cache(
+        repo,
+        [
+            {"method": "glossary"},
+            {"method": "zone", "kwargs": {"type": "forecast", "zone_id": "MDZ001"}},
+            {"method": "zone", "kwargs": {"type": "forecast", "zone_id": "BAD"}},
+        ],
+        concurrency=2,
+    )
+    assert summary["warmed"] == 2
+    assert summary["failed"] == 1
+
+    repo.glossary()
+    repo.zone(zone_type="forecast", zone_id="MDZ001")
+    assert len(api.calls) == 2
+    assert repo.stats["hit"] == 2
+
+
+def test_warm_cache_skips_targets_already_cached():
+    cache = MemoryCache()
+    NOAARepository(CountingApi(), cache=cache).glossary()
+
+    api = CountingApi()
+    summary = warm_cache(NOAARepository(api, cache=cache), [{"method": "glossary"}])
+
+    assert summary["warmed"] == 1
+    assert api.calls == []
+
+
+def test_prefetch_refreshes_hot_keys_close_to_expiry():
+    api = CountingApi()
+    repo = NOAARepository(api, cache=MemoryCache(), ttls={"zone": 10, "glossary": 3600})
+    for _ in range(3):
+        repo.zone(zone_type="forecast", zone_id="MDZ001")
+    repo.glossary()
+
+    refreshed = PrefetchScheduler(repo, top_n=5, interval=10).run_once()
+
+    # Only the zone entry expires within the look-ahead window.
+    assert refreshed == 1
+    assert [name for name, _ in api.calls] == ["zone", "glossary", "zone"]
+
+
+def test_prefetch_skips_keys_kept_fresh_by_another_worker():
+    cache = MemoryCache()
+    ttls = {"zone": 10, "glossary": 3600}
+    other = NOAARepository(CountingApi(), cache=cache, ttls=ttls)
+    other.glossary()
+    other.zone(zone_type="forecast", zone_id="MDZ001")
+
+    api = CountingApi()
+    repo = NOAARepository(api, cache=cache, ttls=ttls)
+    repo.glossary()  # hit on an entry this instance never stored
+    for _ in range(3):
+        repo.zone(zone_type="forecast", zone_id="MDZ001")
+    # Meanwhile another worker refreshes the zone with a longer lifetime.
+    NOAARepository(CountingApi(), cache=cache, ttls={"zone": 3600}).refresh(
+        "zone", type="forecast", zone_id="MDZ001"
+    )
+
+    assert PrefetchScheduler(repo, top_n=5, interval=10).run_once() == 0
+    assert api.calls == []